@@ -0,0 +1,74 @@
+"""
+Benchmark of the cache storage backends: latency of saving new items of one feed and of reading one feed's items
+of one day, while the total cache size grows.
+Run from the repository root: python benchmarks/bench_cache_query.py [--feeds 20] [--days 10 100 500]
+"""
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+import tempfile
+import time
+
+import fixtures  # noqa: F401 adds the sources to sys.path
+
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage
+from rss_parser.date_parser import parse_date
+from rss_parser.feed_model import FeedItem
+
+BACKENDS = {
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+}
+FEED_INFO = {'title': 'Benchmark feed', 'description': None, 'link': 'https://news.example.com/'}
+
+
+def dated_items(netloc, day, items_number):
+    return [
+        (f'{netloc}-{day}-{i}', day, FeedItem(f'{netloc} {day} story {i}', parse_date(day),
+                                              f'https://{netloc}/{day}/{i}.html', 'Description of the story ' * 10,
+                                              None, None))
+        for i in range(items_number)
+    ]
+
+
+def fill(storage, feeds_number, days, items_number):
+    start = date(2022, 1, 1)
+    for feed_number in range(feeds_number):
+        netloc = f'feed{feed_number}.example.com'
+        items = []
+        for day_number in range(days):
+            items += dated_items(netloc, (start + timedelta(days=day_number)).strftime('%Y%m%d'), items_number)
+        storage.save_feed(netloc, FEED_INFO, items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cache storage backends benchmark')
+    parser.add_argument('--feeds', type=int, default=20, help='number of cached feeds')
+    parser.add_argument('--items', type=int, default=10, help='number of items of every feed per day')
+    parser.add_argument('--days', type=int, nargs='+', default=[10, 100, 300], help='cached days')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    print(f'{"backend":>8} {"items":>8} {"open+read, ms":>14} {"save, ms":>9}')
+    for backend in args.backends:
+        storage_class, file_name = BACKENDS[backend]
+        for days in args.days:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                path = Path(cache_dir) / file_name
+                with storage_class(path) as storage:
+                    fill(storage, args.feeds, days, args.items)
+                start = time.perf_counter()
+                with storage_class(path) as storage:
+                    storage.load_feeds('20220101', 'feed0.example.com')
+                read = time.perf_counter() - start
+                start = time.perf_counter()
+                with storage_class(path) as storage:
+                    storage.save_feed('feed0.example.com', FEED_INFO, dated_items('feed0.example.com', '20300101',
+                                                                                  args.items))
+                save = time.perf_counter() - start
+            print(f'{backend:>8} {args.feeds * days * args.items:>8} {read * 1000:>14.2f} {save * 1000:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
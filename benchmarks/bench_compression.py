@@ -0,0 +1,136 @@
+"""
+Benchmark of the compression: bytes on wire and parse time of the feeds fetched from the local fixture server
+without compression and with gzip and deflate content encodings, and bytes on disk, save time and read latency
+of the cache storages with and without gzip compressed shards.
+Localhost has no network latency, so the parse time shows the decompression cost only, the time saved on a real
+network is proportional to the bytes on wire.
+Run from the repository root: python benchmarks/bench_compression.py [--items 1000 10000] [--feeds 20 --days 30]
+"""
+import argparse
+import contextlib
+from datetime import date, datetime, timedelta, timezone
+import os
+from pathlib import Path
+import random
+import tempfile
+import time
+
+from fixtures import FixtureServer, generate_rss
+
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage
+from feed_cacher.feed_cacher import collect_cached_range
+from rss_parser.feed_model import FeedItem
+from rss_parser.rss_parser import parse_rss_feed
+
+# Storage name: storage class, cache file or folder name, and keyword arguments of the storage
+STORAGES = {
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3', {}),
+    'json': (JsonCacheStorage, 'feeds_cache.json', {}),
+    'sharded': (ShardedCacheStorage, 'FeedShards', {}),
+    'sharded gzip': (ShardedCacheStorage, 'FeedShards', {'compression': 'gzip'}),
+}
+FEED_INFO = {'title': 'Benchmark feed', 'description': None, 'link': 'https://news.example.com/'}
+START = date(2022, 1, 1)
+
+
+def best_time(func, repeat):
+    """
+    :return: best wall time of "repeat" calls of the function, in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def disk_size(path):
+    """
+    :return: total size of the file or of the files in the folder, in bytes
+    """
+    if path.is_file():
+        return path.stat().st_size
+    return sum(os.path.getsize(Path(folder) / name) for folder, _, names in os.walk(path) for name in names)
+
+
+def run_transport(sizes, repeat):
+    print(f'{"items":>8} {"encoding":>9} {"on wire, KB":>12} {"ratio":>6} {"parse, s":>9}')
+    for items_number in sizes:
+        body = generate_rss(items_number)
+        for encodings in ((), ('gzip',), ('deflate',)):
+            with FixtureServer(encodings) as server:
+                url = server.add('/feed.xml', body)
+                parse_rss_feed(url, None)
+                bytes_sent = server.bytes_sent
+                elapsed = best_time(lambda: parse_rss_feed(url, None), repeat)
+            print(f'{items_number:>8} {(encodings or ("identity",))[0]:>9} {bytes_sent / 1024:>12.1f} '
+                  f'{len(body) / bytes_sent:>6.1f} {elapsed:>9.3f}')
+
+
+def generate_items(feeds_number, days, items_number):
+    """
+    :return: dictionary with the netloc as a key and array of the feed's tuples with item's hash, date in "YYYYMMDD"
+    format and FeedItem object as a value. Descriptions are random words of a limited vocabulary, so they compress
+    like a real text and not like a repeated one
+    """
+    random.seed(0)
+    words = [''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=random.randint(2, 9))) for _ in range(5000)]
+    feeds = {}
+    for feed_number in range(feeds_number):
+        netloc = f'feed{feed_number}.example.com'
+        items = feeds[netloc] = []
+        for day_number in range(days):
+            day_start = datetime.combine(START + timedelta(days=day_number), datetime.min.time(), timezone.utc)
+            day = day_start.strftime('%Y%m%d')
+            for i in range(items_number):
+                items.append((f'{netloc}-{day}-{i}', day, FeedItem(
+                    ' '.join(random.choices(words, k=8)), day_start + timedelta(minutes=(i * 997) % 1440),
+                    f'https://{netloc}/{day}/{i}.html', ' '.join(random.choices(words, k=50)),
+                    f'https://img.example.com/{netloc}/{day}/{i}.jpg', None
+                )))
+    return feeds
+
+
+def run_cache(feeds_number, days, items_number, saves, repeat):
+    feeds = generate_items(feeds_number, days, items_number)
+    last_day = (START + timedelta(days=days - 1)).strftime('%Y%m%d')
+    first_day = (START + timedelta(days=max(days - 7, 0))).strftime('%Y%m%d')
+    print(f'{feeds_number * days * items_number} cached items, {saves} saves per feed')
+    print(f'{"storage":>13} {"on disk, MB":>12} {"save, s":>8} {"day, ms":>8} {"7 days, ms":>11}')
+    for name, (storage_class, file_name, kwargs) in STORAGES.items():
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = Path(cache_dir) / file_name
+            start = time.perf_counter()
+            with storage_class(path, **kwargs) as storage:
+                for netloc, dated_items in feeds.items():
+                    batch = -(-len(dated_items) // saves)
+                    for i in range(0, len(dated_items), batch):
+                        storage.save_feed(netloc, FEED_INFO, dated_items[i:i + batch])
+            save_time = time.perf_counter() - start
+            size = disk_size(path)
+            # Storages are opened again, so the reads don't use the documents loaded by the saves
+            with storage_class(path, **kwargs) as storage:
+                day_time = best_time(lambda: [list(feed.items) for feed in storage.iter_feeds(last_day)], repeat)
+            with storage_class(path, **kwargs) as storage, contextlib.redirect_stdout(None):
+                range_time = best_time(lambda: collect_cached_range(first_day, last_day, [], None, storage), repeat)
+            print(f'{name:>13} {size / 1024 / 1024:>12.2f} {save_time:>8.2f} {day_time * 1000:>8.1f} '
+                  f'{range_time * 1000:>11.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transport and cache compression benchmark')
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 10000], help='sizes of the fixture feeds')
+    parser.add_argument('--feeds', type=int, default=20, help='number of cached feeds')
+    parser.add_argument('--days', type=int, default=30, help='cached days')
+    parser.add_argument('--day-items', type=int, default=50, help='number of items of every feed per day')
+    parser.add_argument('--saves', type=int, default=10, help='number of saves every feed is cached by')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs of every read, the best one counts')
+    args = parser.parse_args()
+
+    run_transport(args.items, args.repeat)
+    run_cache(args.feeds, args.days, args.day_items, args.saves, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark of polling unchanged feeds: full download and parsing against conditional GET with stored validators.
+Run from the repository root: python benchmarks/bench_conditional_get.py [--feeds 50] [--items 500]
+"""
+import argparse
+import time
+
+from fixtures import FixtureServer, generate_rss
+
+from rss_parser.rss_parser import parse_rss_feed
+
+
+def poll(urls, validators):
+    """
+    Poll every feed once
+    :param urls: array of feed urls
+    :param validators: dictionary with url as a key and its HTTP validators as a value. None - unconditional polls
+    :return: number of feeds which were downloaded and parsed
+    """
+    parsed = 0
+    for url in urls:
+        feed = parse_rss_feed(url, None, 10, validators.setdefault(url, {}) if validators is not None else None)
+        parsed += feed is not None
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Conditional GET benchmark')
+    parser.add_argument('--feeds', type=int, default=50, help='number of feeds')
+    parser.add_argument('--items', type=int, default=500, help='number of items in every feed')
+    args = parser.parse_args()
+
+    with FixtureServer() as server:
+        body = generate_rss(args.items)
+        urls = [server.add(f'/feeds/{i}.xml', body) for i in range(args.feeds)]
+
+        start = time.perf_counter()
+        poll(urls, None)
+        full_time, full_bytes = time.perf_counter() - start, server.bytes_sent
+
+        validators = {}
+        poll(urls, validators)
+        server.bytes_sent = 0
+        start = time.perf_counter()
+        parsed = poll(urls, validators)
+        conditional_time, conditional_bytes = time.perf_counter() - start, server.bytes_sent
+
+    print(f'{args.feeds} unchanged feeds x {args.items} items')
+    print(f'full poll:        {full_time:.2f}s, {full_bytes} bytes')
+    print(f'conditional poll: {conditional_time:.2f}s, {conditional_bytes} bytes, {parsed} feeds parsed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the PDF conversion of 1, 10 and 100 feeds: the whole html converted by one xhtml2pdf call, as the previous
+versions did, against render_pdf() converting the chunks of every feed and day in the pool of processes, cold and with
+all the chunks converted by the previous run. The template is a minimal stand-in of the program's one.
+Run from the repository root: python benchmarks/bench_convert.py [--feeds 1 10 100] [--items 20]
+"""
+import argparse
+import gc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+import time
+
+from fixtures import stand_in_template
+
+from format_converter.converter import render_pdf
+from rss_parser.feed_model import Feed, FeedItem
+from settings.settings import PDF_WORKERS
+
+START = datetime(2022, 4, 30, tzinfo=timezone.utc)
+
+
+def generate_feeds(feeds_number, items_number):
+    """
+    :return: array of Feed objects with items published on 3 days
+    """
+    return [
+        Feed(f'Feed {feed_number}', 'Generated feed', f'https://feed{feed_number}.example.com/', [
+            FeedItem(f'Feed {feed_number} story {i}', START - timedelta(hours=i * 72 // items_number),
+                     f'https://feed{feed_number}.example.com/{i}.html', 'Description of the story. ' * 20, None, None)
+            for i in range(items_number)
+        ], None, [])
+        for feed_number in range(feeds_number)
+    ]
+
+
+def convert_whole(feeds, target_path, template):
+    from xhtml2pdf import pisa
+
+    with open(target_path, 'w+b') as target:
+        pisa.CreatePDF(template.render(feeds=feeds), dest=target, encoding='utf-8')
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    # Import time is not a part of the measured conversions
+    from xhtml2pdf import pisa  # noqa: F401
+
+    parser = argparse.ArgumentParser(description='PDF conversion benchmark')
+    parser.add_argument('--feeds', type=int, nargs='+', default=[1, 10, 100], help='numbers of converted feeds')
+    parser.add_argument('--items', type=int, default=20, help='number of items of every feed')
+    parser.add_argument('--workers', type=int, default=PDF_WORKERS, help='number of converting processes')
+    args = parser.parse_args()
+
+    template = stand_in_template()
+    print(f'{args.items} items per feed, {args.workers} workers')
+    print(f'{"feeds":>6} {"whole, s":>9} {"chunks cold, s":>15} {"chunks warm, s":>15}')
+    for feeds_number in args.feeds:
+        feeds = generate_feeds(feeds_number, args.items)
+        with tempfile.TemporaryDirectory() as target_dir:
+            target_dir = Path(target_dir)
+            chunks_path = target_dir / 'chunks'
+            # Temporary files left by xhtml2pdf in the reference cycles would be removed by the forked workers too
+            gc.collect()
+            cold_time = timed(render_pdf, feeds, target_dir / 'cold.pdf', template, chunks_path, args.workers)
+            warm_time = timed(render_pdf, feeds, target_dir / 'warm.pdf', template, chunks_path, args.workers)
+            whole_time = timed(convert_whole, feeds, target_dir / 'whole.pdf', template)
+        print(f'{feeds_number:>6} {whole_time:>9.2f} {cold_time:>15.2f} {warm_time:>15.2f}')
+
+
+if __name__ == '__main__':
+    main()
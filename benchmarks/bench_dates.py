@@ -0,0 +1,72 @@
+"""
+Micro-benchmark of feed items' dates parsing: dateutil against the fast memoized parse_date().
+Date strings are taken from real-world feeds.
+Run from the repository root: python benchmarks/bench_dates.py [--repeat 20000]
+"""
+import argparse
+import time
+import warnings
+
+import fixtures  # noqa: F401, adds program sources to the path
+
+from dateutil.parser import parse
+
+from rss_parser.date_parser import parse_date
+
+REAL_WORLD_DATES = (
+    'Sat, 30 Apr 2022 19:42:08 GMT',
+    'Sat, 30 Apr 2022 19:42:08 +0000',
+    'Sat, 30 Apr 2022 15:42:08 -0400',
+    'Sat, 30 Apr 2022 15:42:08 EDT',
+    '30 Apr 2022 19:42:08 +0300',
+    'Sat, 30 Apr 2022 19:42 GMT',
+    'Sat,30 Apr 2022 19:42:08 GMT',
+    'Sat, 30 Apr 2022 19:42:08 Z',
+    '2022-04-30T19:42:08Z',
+    '2022-04-30T19:42:08.123+03:00',
+    '2022-04-30T19:42:08',
+    '2022-04-30 19:42:08',
+    'April 30, 2022 19:42',
+    'Saturday, April 30, 2022 - 19:42',
+)
+
+
+def timed(func, dates, repeat):
+    """
+    :return: microseconds per parsed date
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for date in dates:
+            func(date)
+    return (time.perf_counter() - start) / (repeat * len(dates)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dates parsing benchmark')
+    parser.add_argument('--repeat', type=int, default=20000, help='number of passes over the date strings')
+    args = parser.parse_args()
+    # dateutil warns about every timezone name it doesn't know, e.g. "EDT"
+    warnings.simplefilter('ignore')
+
+    mismatches = []
+    for date in REAL_WORLD_DATES:
+        expected, parsed = parse(date), parse_date(date)
+        if expected.tzinfo and parsed != expected:
+            mismatches.append((date, expected, parsed))
+
+    dateutil_time = timed(parse, REAL_WORLD_DATES, max(args.repeat // 100, 1))
+    fast_time = timed(parse_date.__wrapped__, REAL_WORLD_DATES, max(args.repeat // 100, 1))
+    parse_date.cache_clear()
+    cached_time = timed(parse_date, REAL_WORLD_DATES, args.repeat)
+
+    print(f'{len(REAL_WORLD_DATES)} real-world date formats')
+    print(f'dateutil:              {dateutil_time:6.2f} us per date')
+    print(f'parse_date, no memo:   {fast_time:6.2f} us per date')
+    print(f'parse_date, memoized:  {cached_time:6.2f} us per date')
+    for date, expected, parsed in mismatches:
+        print(f'mismatch: "{date}": dateutil {expected}, parse_date {parsed}')
+
+
+if __name__ == '__main__':
+    main()
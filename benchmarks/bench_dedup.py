@@ -0,0 +1,115 @@
+"""
+Benchmark of the near-duplicate detection on a synthetic corpus: stories syndicated by several feeds with edited titles
+and descriptions, and different stories with the same titles. Quality of MinHash with LSH banding is compared with
+deduplication by the title's hash of the previous versions, and the time per item is measured as the index grows.
+Run from the repository root: python benchmarks/bench_dedup.py [--stories 20000] [--copies 3] [--edits 4]
+"""
+import argparse
+from pathlib import Path
+import random
+import tempfile
+import time
+from urllib.parse import urlparse
+
+import fixtures  # noqa: F401 adds the sources to sys.path
+
+from feed_cacher.dedup import NearDuplicateIndex, legacy_item_hash
+from rss_parser.feed_model import FeedItem
+
+TITLES = ('Live updates', 'Morning briefing', 'Weather forecast', 'Market wrap', 'Opinion')
+
+
+def generate_corpus(stories_number, copies, edits, words):
+    """
+    :return: array of tuples with the story number and FeedItem object. Copies of a story have the same number, every
+    copy has its title and "edits" words of its description replaced, and some stories share the generic titles
+    """
+    random.seed(0)
+    corpus = []
+    for story in range(stories_number):
+        title = random.choice(TITLES) if story % 10 == 0 else ' '.join(random.choices(words, k=8))
+        description = random.choices(words, k=60)
+        for copy in range(copies):
+            copy_title = title if copy == 0 or title in TITLES else f'{title} {random.choice(words)}'
+            copy_description = list(description)
+            for _ in range(edits if copy else 0):
+                copy_description[random.randrange(len(copy_description))] = random.choice(words)
+            corpus.append((story, FeedItem(copy_title, None, f'https://feed{copy}.example.com/{story}.html',
+                                           ' '.join(copy_description), None, None)))
+    random.shuffle(corpus)
+    return corpus
+
+
+def run_index(corpus, min_similarity, batch_size):
+    """
+    :return: tuple of numbers of found and false near-duplicates and array of lookup times per item of every batch
+    """
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = NearDuplicateIndex(Path(index_dir) / 'items_fingerprints.sqlite3', min_similarity)
+        seen_stories = set()
+        found = false = 0
+        lookups = []
+        for start in range(0, len(corpus), batch_size):
+            batch = corpus[start:start + batch_size]
+            lookup_start = time.perf_counter()
+            # Every feed of the batch is cached on its own, as cache_feed() does
+            feeds = {}
+            for i, (_, item) in enumerate(batch, start):
+                feeds.setdefault(urlparse(item.link).netloc, []).append((str(i), None, item))
+            duplicates = []
+            for netloc, dated_items in feeds.items():
+                duplicates += index.split_duplicates(netloc, dated_items)[1]
+                index.commit()
+            lookups.append((time.perf_counter() - lookup_start) / len(batch))
+            duplicate_ids = {int(item_id) for item_id, _, _ in duplicates}
+            for i, (story, _) in enumerate(batch, start):
+                if i in duplicate_ids:
+                    if story in seen_stories:
+                        found += 1
+                    else:
+                        false += 1
+                seen_stories.add(story)
+        index.close()
+    return found, false, lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate detection benchmark')
+    parser.add_argument('--stories', type=int, default=20000, help='number of different stories')
+    parser.add_argument('--copies', type=int, default=3, help='number of feeds syndicating every story')
+    parser.add_argument('--edits', type=int, default=4, help='number of words of the description edited in a copy')
+    parser.add_argument('--words', type=int, default=20000, help='size of the generated vocabulary')
+    parser.add_argument('--batch', type=int, default=100, help='number of new items cached at once')
+    parser.add_argument('--similarity', type=float, nargs='+', default=[0.6, 0.7, 0.8],
+                        help='minimum shares of common words of the near-duplicates')
+    args = parser.parse_args()
+
+    random.seed(0)
+    words = [''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=random.randint(3, 10)))
+             for _ in range(args.words)]
+    corpus = generate_corpus(args.stories, args.copies, args.edits, words)
+    duplicates_number = len(corpus) - args.stories
+
+    title_stories = {}
+    title_found = title_false = 0
+    for story, item in corpus:
+        title_hash = legacy_item_hash(item)
+        if title_hash not in title_stories:
+            title_stories[title_hash] = story
+        elif title_stories[title_hash] == story:
+            title_found += 1
+        else:
+            title_false += 1
+
+    print(f'{len(corpus)} items, {duplicates_number} near-duplicates')
+    print(f'{"method":>20} {"found":>7} {"recall":>7} {"false":>7} {"first 10%, us":>14} {"last 10%, us":>13}')
+    print(f'{"title hash":>20} {title_found:>7} {title_found / duplicates_number:>7.1%} {title_false:>7}')
+    for min_similarity in args.similarity:
+        found, false, lookups = run_index(corpus, min_similarity, args.batch)
+        tenth = max(len(lookups) // 10, 1)
+        print(f'{f"minhash + lsh {min_similarity}":>20} {found:>7} {found / duplicates_number:>7.1%} {false:>7} '
+              f'{sum(lookups[:tenth]) / tenth * 1e6:>14.0f} {sum(lookups[-tenth:]) / tenth * 1e6:>13.0f}')
+
+
+if __name__ == '__main__':
+    main()
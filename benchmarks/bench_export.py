@@ -0,0 +1,99 @@
+"""
+Benchmark of the export of the cached items for analytics: reading the whole json cache at once, as the analytics
+jobs did, against the export of the storages in chunks, in full and of one new day after the previous export.
+Every run is done in a fresh process to measure its peak memory. Parquet and Arrow are measured if "pyarrow"
+is installed. Linux / macOS only.
+Run from the repository root: python benchmarks/bench_export.py [--feeds 20] [--days 100] [--items 100]
+"""
+import argparse
+from datetime import date, datetime, timedelta, timezone
+import json
+from pathlib import Path
+import tempfile
+
+from fixtures import measure
+
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage
+from feed_exporter.feed_exporter import EXPORT_WRITERS, export_cached_items, is_available
+from rss_parser.feed_model import FeedItem
+
+BACKENDS = {
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+}
+FEED_INFO = {'title': 'Benchmark feed', 'description': None, 'link': 'https://news.example.com/'}
+START = date(2022, 1, 1)
+
+
+def fill(storage, feeds_number, first_day, days, items_number):
+    for feed_number in range(feeds_number):
+        netloc = f'feed{feed_number}.example.com'
+        items = []
+        for day_number in range(first_day, first_day + days):
+            day_start = datetime.combine(START + timedelta(days=day_number), datetime.min.time(), timezone.utc)
+            day = day_start.strftime('%Y%m%d')
+            for i in range(items_number):
+                items.append((f'{netloc}-{day}-{i}', day, FeedItem(
+                    f'{netloc} {day} story {i}', day_start + timedelta(minutes=(i * 997 + feed_number) % 1440),
+                    f'https://{netloc}/{day}/{i}.html', 'Description of the story ' * 5, None, None
+                )))
+        storage.save_feed(netloc, FEED_INFO, items)
+
+
+def read_json_cache(path):
+    """
+    The whole json cache is loaded and its items are counted
+    """
+    with open(path, encoding='utf-8') as fr:
+        cache = json.load(fr)
+    return sum(len(items) for feed in cache.values() for items in feed['dates'].values())
+
+
+def export(storage_class, path, export_format, full, export_path):
+    with storage_class(path) as storage:
+        return export_cached_items(export_format, full, storage, export_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cache export benchmark')
+    parser.add_argument('--feeds', type=int, default=20, help='number of cached feeds')
+    parser.add_argument('--days', type=int, default=100, help='cached days')
+    parser.add_argument('--items', type=int, default=100, help='number of items of every feed per day')
+    parser.add_argument('--backends', nargs='+', default=['sqlite', 'sharded'], choices=list(BACKENDS))
+    parser.add_argument('--formats', nargs='+', default=list(EXPORT_WRITERS), choices=list(EXPORT_WRITERS))
+    args = parser.parse_args()
+
+    formats = [export_format for export_format in args.formats if is_available(export_format)]
+    print(f'{args.feeds * args.days * args.items} cached items, one new day of {args.feeds * args.items} items')
+    print(f'{"backend":>8} {"format":>8} {"export":>8} {"time, s":>8} {"peak, MB":>9} {"file, MB":>9}')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        json_path = Path(cache_dir) / 'json' / BACKENDS['json'][1]
+        json_path.parent.mkdir()
+        with JsonCacheStorage(json_path) as storage:
+            fill(storage, args.feeds, 0, args.days, args.items)
+        elapsed, peak = measure(read_json_cache, json_path)
+        print(f'{"json":>8} {"-":>8} {"json.load":>8} {elapsed:>8.2f} {peak:>9.1f} '
+              f'{json_path.stat().st_size / 1024 / 1024:>9.1f}')
+        for backend in args.backends:
+            storage_class, file_name = BACKENDS[backend]
+            path = Path(cache_dir) / backend / file_name
+            path.parent.mkdir(exist_ok=True)
+            with storage_class(path) as storage:
+                fill(storage, args.feeds, 0, args.days, args.items)
+            for export_format in formats:
+                export_path = Path(cache_dir) / backend / export_format
+                elapsed, peak = measure(export, storage_class, path, export_format, True, export_path)
+                file_size = sum(file.stat().st_size for file in export_path.glob('items_*'))
+                print(f'{backend:>8} {export_format:>8} {"full":>8} {elapsed:>8.2f} {peak:>9.1f} '
+                      f'{file_size / 1024 / 1024:>9.1f}')
+            with storage_class(path) as storage:
+                fill(storage, args.feeds, args.days, 1, args.items)
+            for export_format in formats:
+                export_path = Path(cache_dir) / backend / export_format
+                elapsed, peak = measure(export, storage_class, path, export_format, False, export_path)
+                print(f'{backend:>8} {export_format:>8} {"new day":>8} {elapsed:>8.2f} {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
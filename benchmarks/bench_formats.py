@@ -0,0 +1,53 @@
+"""
+Benchmark of the parse throughput per feed format: RSS 2.0, RSS 1.0 (RDF) and Atom documents of the same items,
+format sniffed from the first bytes of the document and items extracted by the format's extractor.
+Every case runs in a fresh process to measure its peak memory, which includes the generated document.
+Linux / macOS only.
+Run from the repository root: python benchmarks/bench_formats.py [--items 10000 50000]
+"""
+import argparse
+import io
+import time
+
+from fixtures import FEED_GENERATORS, measure
+
+from rss_parser.feed_formats import sniff_stream
+from rss_parser.rss_parser import parse_stream_feed
+
+
+def setup_body(feed_format, items_number):
+    """
+    :return: arguments of parse_sniffed(): the fixture document generated in the measured process, so the memory of
+    the documents doesn't stay in the main one, and no limit
+    """
+    return FEED_GENERATORS[feed_format](items_number), None
+
+
+def parse_sniffed(body, limit):
+    stream, feed_format = sniff_stream(io.BytesIO(body))
+    parse_stream_feed(stream, limit, feed_format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed formats benchmark')
+    parser.add_argument('--items', type=int, nargs='+', default=[10000, 50000], help='sizes of the fixture feeds')
+    parser.add_argument('--sniffs', type=int, default=10000, help='number of format sniffs to time')
+    args = parser.parse_args()
+
+    print(f'{"items":>8} {"format":>6} {"MB":>7} {"time, s":>9} {"items/s":>9} {"MB/s":>7} {"peak, MB":>9} '
+          f'{"sniff, us":>10}')
+    for items_number in args.items:
+        for name, generate in FEED_GENERATORS.items():
+            size = len(generate(items_number)) / 1024 / 1024
+            elapsed, peak = measure(parse_sniffed, name, items_number, setup=setup_body)
+            prefix = generate(10)
+            start = time.perf_counter()
+            for _ in range(args.sniffs):
+                sniff_stream(io.BytesIO(prefix))
+            sniff = (time.perf_counter() - start) / args.sniffs
+            print(f'{items_number:>8} {name:>6} {size:>7.1f} {elapsed:>9.2f} {items_number / elapsed:>9.0f} '
+                  f'{size / elapsed:>7.1f} {peak:>9.1f} {sniff * 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
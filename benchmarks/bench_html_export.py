@@ -0,0 +1,67 @@
+"""
+Benchmark of the HTML export of many items: the whole document rendered into one string and written, as the previous
+versions did, against the document written while it is rendered, in one file and split into linked pages.
+Items are generated while they are rendered, as they are read from the cache by the program, and every export runs
+in a fresh process to measure its peak memory. The template is a minimal stand-in of the program's one.
+Linux / macOS only.
+Run from the repository root: python benchmarks/bench_html_export.py [--items 10000 100000] [--page-items 1000]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+
+from fixtures import measure, stand_in_template
+
+from format_converter.converter import html_pages, page_file_name, page_links, write_html
+from rss_parser.feed_model import Feed, FeedItem
+
+FEEDS = 10
+START = datetime(2022, 4, 30, tzinfo=timezone.utc)
+
+
+def generate_feeds(items_number):
+    """
+    Generator of the feeds whose items are generated while they are consumed
+    """
+    for feed_number in range(FEEDS):
+        items = (FeedItem(f'Feed {feed_number} story {i}', START - timedelta(minutes=i),
+                          f'https://feed{feed_number}.example.com/{i}.html', 'Description of the story. ' * 40,
+                          None, None)
+                 for i in range(items_number // FEEDS))
+        yield Feed(f'Feed {feed_number}', 'Generated feed', f'https://feed{feed_number}.example.com/', items, None, [])
+
+
+def export_render(items_number, target_dir, page_items):
+    with open(Path(target_dir) / 'render.html', 'w', encoding='utf-8') as file:
+        file.write(stand_in_template().render(feeds=generate_feeds(items_number)))
+
+
+def export_stream(items_number, target_dir, page_items):
+    write_html(stand_in_template(), generate_feeds(items_number), Path(target_dir) / 'stream.html')
+
+
+def export_pages(items_number, target_dir, page_items):
+    template = stand_in_template()
+    for page_number, (page, is_last) in enumerate(html_pages(generate_feeds(items_number), page_items), 1):
+        write_html(template, page, Path(target_dir) / page_file_name('pages.html', page_number),
+                   page_links('pages.html', page_number, is_last))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML export benchmark')
+    parser.add_argument('--items', type=int, nargs='+', default=[10000, 100000], help='numbers of exported items')
+    parser.add_argument('--page-items', type=int, default=1000, help='number of items of every page')
+    args = parser.parse_args()
+
+    print(f'{"items":>8} {"export":>8} {"time, s":>8} {"peak, MB":>9} {"size, MB":>9}')
+    for items_number in args.items:
+        for export_name, export in (('render', export_render), ('stream', export_stream), ('pages', export_pages)):
+            with tempfile.TemporaryDirectory() as target_dir:
+                elapsed, peak = measure(export, items_number, target_dir, args.page_items)
+                size = sum(path.stat().st_size for path in Path(target_dir).iterdir()) / 1024 / 1024
+            print(f'{items_number:>8} {export_name:>8} {elapsed:>8.2f} {peak:>9.1f} {size:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
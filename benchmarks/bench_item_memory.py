@@ -0,0 +1,54 @@
+"""
+Benchmark of the memory footprint of feed items loaded from the cache: dictionaries of the previous versions against
+slotted FeedItem records. Strings of the items are shared by both, so the footprint is the one of the records
+themselves and of their dates.
+Run from the repository root: python benchmarks/bench_item_memory.py [--items 100000]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+import tracemalloc
+
+import fixtures  # noqa: F401 adds the sources to sys.path
+
+from rss_parser.feed_model import FeedItem
+
+ITEM_FIELDS = ('title', 'date', 'link', 'description', 'img')
+
+
+def cached_rows(items_number):
+    """
+    :return: array of tuples with items' values as they are read from the cache
+    """
+    start = datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc)
+    return [(f'Story {i}', str(start - timedelta(minutes=17 * i)), f'https://news.example.com/{i}.html',
+             f'Description of the story {i}', 'Empty' if i % 2 else f'https://img.example.com/{i}.jpg')
+            for i in range(items_number)]
+
+
+def footprint(build, rows):
+    """
+    :return: bytes allocated per item by "build" function
+    """
+    tracemalloc.start()
+    items = build(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed items memory benchmark')
+    parser.add_argument('--items', type=int, default=100000, help='number of items')
+    args = parser.parse_args()
+
+    rows = cached_rows(args.items)
+    dict_size = footprint(lambda rows: [dict(zip(ITEM_FIELDS, row)) for row in rows], rows)
+    item_size = footprint(lambda rows: [FeedItem.from_row(row) for row in rows], rows)
+
+    print(f'{args.items} items')
+    print(f'dict:     {dict_size:7.1f} bytes per item')
+    print(f'FeedItem: {item_size:7.1f} bytes per item, including the parsed date')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark of fetching many feeds: serial parse_rss_feed() loop against concurrent fetch_feeds().
+Every feed is served by the local fixture server with the emulated network latency.
+Run from the repository root: python benchmarks/bench_multi_feed.py [--feeds 100] [--delay 0.2]
+"""
+import argparse
+import time
+
+from fixtures import FixtureServer, generate_rss
+
+from feed_fetcher.feed_fetcher import fetch_feeds
+from rss_parser.rss_parser import parse_rss_feed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-feed fetching benchmark')
+    parser.add_argument('--feeds', type=int, default=100, help='number of feeds')
+    parser.add_argument('--items', type=int, default=50, help='number of items in every feed')
+    parser.add_argument('--delay', type=float, default=0.2, help='emulated server latency in seconds')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--per-host', type=int, default=16)
+    args = parser.parse_args()
+
+    with FixtureServer() as server:
+        body = generate_rss(args.items)
+        urls = [server.add(f'/feeds/{i}.xml', body) + f'?delay={args.delay}' for i in range(args.feeds)]
+
+        start = time.perf_counter()
+        for url in urls:
+            parse_rss_feed(url, None, 10)
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = list(fetch_feeds(urls, None, args.workers, args.per_host, 10))
+        concurrent = time.perf_counter() - start
+
+    failed = sum(1 for result in results if result.error)
+    print(f'{args.feeds} feeds x {args.items} items, {args.delay}s latency')
+    print(f'serial:     {serial:.2f}s')
+    print(f'concurrent: {concurrent:.2f}s ({args.workers} workers, {args.per_host} per host), failed: {failed}')
+    print(f'speedup:    {serial / concurrent:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
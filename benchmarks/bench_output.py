@@ -0,0 +1,75 @@
+"""
+Benchmark of printing cached news of one day: the whole output built in memory and printed at once, against
+the streaming writers printing items while they are read from the SQLite cache.
+Every case runs in a fresh process to measure its peak memory. Linux / macOS only.
+Run from the repository root: python benchmarks/bench_output.py [--items 20000 100000]
+"""
+import argparse
+import contextlib
+import json
+import os
+from pathlib import Path
+import tempfile
+
+from fixtures import measure
+
+from feed_cacher.cache_storage import SqliteCacheStorage
+from rss_parser.date_parser import parse_date
+from rss_parser.feed_model import Feed, FeedItem
+from rss_parser.feed_writer import write_feed
+
+DAY = '20220430'
+
+
+def fill(path, items_number):
+    items = [(f'item-{i}', DAY, FeedItem(f'Story {i}', parse_date(f'2022-04-30T{i % 24:02}:00:00Z'),
+                                          f'https://news.example.com/{i}.html', 'Description of the story ' * 10,
+                                          None, None))
+             for i in range(items_number)]
+    with SqliteCacheStorage(path) as storage:
+        storage.save_feed('news.example.com', {'title': 'Benchmark feed', 'description': None,
+                                               'link': 'https://news.example.com/'}, items)
+
+
+def print_whole(path, output_format):
+    with SqliteCacheStorage(path) as storage, open(os.devnull, 'w') as devnull:
+        for feed in storage.load_feeds(DAY):
+            if output_format == 'json':
+                print(json.dumps(feed.to_dict(), indent=2), file=devnull)
+            else:
+                text = ''
+                for i, item in enumerate(feed.items):
+                    text += f'Item {i + 1}:\n'
+                    for key, value in item.to_dict().items():
+                        text += f'\t{key.title()}: {value}\n'
+                print(text, file=devnull)
+
+
+def print_streaming(path, output_format):
+    with SqliteCacheStorage(path) as storage, open(os.devnull, 'w') as devnull:
+        for feed in storage.iter_feeds(DAY):
+            write_feed(feed, output_format, devnull)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Output writers benchmark')
+    parser.add_argument('--items', type=int, nargs='+', default=[20000, 100000], help='numbers of cached items')
+    args = parser.parse_args()
+
+    print(f'{"items":>8} {"format":>6} {"mode":>10} {"time, s":>9} {"peak, MB":>9}')
+    for items_number in args.items:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'feeds_cache.sqlite3'
+            with contextlib.redirect_stdout(None):
+                fill(path, items_number)
+            for output_format in ('text', 'json', 'jsonl'):
+                cases = [('streaming', print_streaming)]
+                if output_format != 'jsonl':
+                    cases.insert(0, ('whole', print_whole))
+                for mode, func in cases:
+                    elapsed, peak = measure(func, path, output_format)
+                    print(f'{items_number:>8} {output_format:>6} {mode:>10} {elapsed:>9.2f} {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
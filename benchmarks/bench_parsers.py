@@ -0,0 +1,37 @@
+"""
+Benchmark of feed parser backends: incremental lxml "stream" parser against BeautifulSoup "soup" parser.
+Every case runs in a fresh process to measure its peak memory. Linux / macOS only.
+Run from the repository root: python benchmarks/bench_parsers.py [--items 10000 50000]
+"""
+import argparse
+import io
+
+from fixtures import generate_rss, measure
+
+from rss_parser.rss_parser import parse_soup_feed, parse_stream_feed
+
+
+def parse_stream(body, limit):
+    parse_stream_feed(io.BytesIO(body), limit)
+
+
+def parse_soup(body, limit):
+    parse_soup_feed(body, limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed parsers benchmark')
+    parser.add_argument('--items', type=int, nargs='+', default=[10000, 50000], help='sizes of the fixture feeds')
+    args = parser.parse_args()
+
+    print(f'{"items":>8} {"limit":>6} {"backend":>8} {"time, s":>9} {"peak, MB":>9}')
+    for items_number in args.items:
+        body = generate_rss(items_number)
+        for limit in (None, 5):
+            for name, func in (('stream', parse_stream), ('soup', parse_soup)):
+                elapsed, peak = measure(func, body, limit)
+                print(f'{items_number:>8} {str(limit):>6} {name:>8} {elapsed:>9.2f} {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
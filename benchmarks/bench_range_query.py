@@ -0,0 +1,91 @@
+"""
+Benchmark of "last N days across all sources, newest first, limit M" query of the cache: every day of the range loaded
+with load_feeds() and sorted at once, against collect_cached_range() merging items of the sources read already sorted.
+The synthetic cache has a few million items. Every query runs in a fresh process to measure its peak memory.
+Linux / macOS only.
+Run from the repository root: python benchmarks/bench_range_query.py [--feeds 50] [--days 365] [--items 100]
+"""
+import argparse
+import contextlib
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
+from pathlib import Path
+import tempfile
+import time
+
+from fixtures import measure
+
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage, item_sort_key
+from feed_cacher.feed_cacher import collect_cached_range
+from rss_parser.feed_model import FeedItem
+
+BACKENDS = {
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+}
+FEED_INFO = {'title': 'Benchmark feed', 'description': None, 'link': 'https://news.example.com/'}
+START = date(2022, 1, 1)
+
+
+def fill(storage, feeds_number, days, items_number):
+    for feed_number in range(feeds_number):
+        netloc = f'feed{feed_number}.example.com'
+        items = []
+        for day_number in range(days):
+            day_start = datetime.combine(START + timedelta(days=day_number), datetime.min.time(), timezone.utc)
+            day = day_start.strftime('%Y%m%d')
+            for i in range(items_number):
+                items.append((f'{netloc}-{day}-{i}', day, FeedItem(
+                    f'{netloc} {day} story {i}', day_start + timedelta(minutes=(i * 997 + feed_number) % 1440),
+                    f'https://{netloc}/{day}/{i}.html', 'Description of the story ' * 5, None, None
+                )))
+        storage.save_feed(netloc, FEED_INFO, items)
+
+
+def query_by_days(storage_class, path, first_day, days, limit):
+    """
+    Every day of the range is loaded for all the feeds, all the items are sorted and the newest are taken
+    """
+    with storage_class(path) as storage:
+        items = []
+        for day_number in range(days):
+            day = (first_day + timedelta(days=day_number)).strftime('%Y%m%d')
+            items += chain.from_iterable(feed.items for feed in storage.load_feeds(day))
+        return sorted(items, key=item_sort_key, reverse=True)[:limit]
+
+
+def query_range(storage_class, path, first_day, days, limit):
+    with storage_class(path) as storage, contextlib.redirect_stdout(None):
+        return collect_cached_range(first_day.strftime('%Y%m%d'),
+                                    (first_day + timedelta(days=days - 1)).strftime('%Y%m%d'), [], limit, storage)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cache date range query benchmark')
+    parser.add_argument('--feeds', type=int, default=50, help='number of cached feeds')
+    parser.add_argument('--days', type=int, default=365, help='cached days')
+    parser.add_argument('--items', type=int, default=100, help='number of items of every feed per day')
+    parser.add_argument('--range', type=int, default=7, help='number of the last days queried')
+    parser.add_argument('--limit', type=int, default=50, help='number of the newest items queried')
+    parser.add_argument('--backends', nargs='+', default=['sqlite', 'sharded'], choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    first_day = START + timedelta(days=args.days - args.range)
+    print(f'{args.feeds * args.days * args.items} cached items, last {args.range} days, limit {args.limit}')
+    print(f'{"backend":>8} {"fill, s":>8} {"query":>8} {"time, s":>8} {"peak, MB":>9}')
+    for backend in args.backends:
+        storage_class, file_name = BACKENDS[backend]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = Path(cache_dir) / file_name
+            start = time.perf_counter()
+            with storage_class(path) as storage:
+                fill(storage, args.feeds, args.days, args.items)
+            fill_time = time.perf_counter() - start
+            for query_name, query in (('by days', query_by_days), ('range', query_range)):
+                elapsed, peak = measure(query, storage_class, path, first_day, args.range, args.limit)
+                print(f'{backend:>8} {fill_time:>8.1f} {query_name:>8} {elapsed:>8.2f} {peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
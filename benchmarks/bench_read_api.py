@@ -0,0 +1,191 @@
+"""
+Benchmark of the concurrent queries of the cache: a new process of "rss_reader --days ... --json" for every query
+against the requests to one read API server. Every client runs its queries one after another, the clients run
+at the same time. Queries of the API are measured on the first request of every query, on the repeated ones
+answered from the responses cache, and on the repeated ones with "If-None-Match" answered "304 Not Modified".
+The server runs in a child process, so the clients don't share its interpreter. Linux / macOS only.
+Run from the repository root: python benchmarks/bench_read_api.py [--clients 1 8] [--requests 200]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import multiprocessing
+import os
+from pathlib import Path
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from fixtures import SRC_PATH, stand_in_template
+
+FEED_INFO = {'title': 'Benchmark feed', 'description': None, 'link': 'https://news.example.com/'}
+
+
+def fill(backend, feeds_number, days, items_number):
+    """
+    Function to fill the cache storage of the settings with the items of the last days
+    """
+    from feed_cacher.cache_storage import open_cache_storage
+    from rss_parser.feed_model import FeedItem
+
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    with open_cache_storage(backend) as storage:
+        for feed_number in range(feeds_number):
+            netloc = f'feed{feed_number}.example.com'
+            items = []
+            for day_number in range(days):
+                day_start = today - timedelta(days=day_number)
+                day = day_start.strftime('%Y%m%d')
+                for i in range(items_number):
+                    items.append((f'{netloc}-{day}-{i}', day, FeedItem(
+                        f'{netloc} {day} story {i}', day_start + timedelta(minutes=(i * 997 + feed_number) % 1440),
+                        f'https://{netloc}/{day}/{i}.html', 'Description of the story ' * 5, None, None
+                    )))
+            storage.save_feed(netloc, FEED_INFO, items)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def run_server(backend, port, workers):
+    """
+    Function to run the read API server in a child process. Missing HTML template is replaced with the stand-in
+    """
+    from format_converter import converter
+    from read_api.read_api import serve
+
+    try:
+        converter.setup_jinja()
+    except Exception:
+        converter.setup_jinja = stand_in_template
+    sys.stdout = open(os.devnull, 'w')
+    serve('127.0.0.1', port, backend, workers=workers)
+
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            with urlopen(url):
+                return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def query_cli(backend, query):
+    subprocess.run([sys.executable, str(SRC_PATH / 'rss_reader.py'), '--cache-backend', backend, *query],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def query_api(url, etags):
+    """
+    :param url: url of the request
+    :param etags: dictionary with the url as a key and the ETag of its response as a value. Sent in "If-None-Match"
+    if the url has one, and updated with the response's one
+    :return: size of the response body in bytes
+    """
+    headers = {'If-None-Match': etags[url]} if url in etags else {}
+    try:
+        with urlopen(Request(url, headers=headers)) as response:
+            body = response.read()
+            etags[url] = response.headers['ETag']
+            return len(body)
+    except HTTPError as e:
+        if e.code != 304:
+            raise
+        return 0
+
+
+def run_clients(clients, tasks):
+    """
+    Function to run the tasks by the clients at the same time
+    :param clients: number of clients
+    :param tasks: array of the callables, every client runs its share one after another
+    :return: tuple of the wall time in seconds and the sorted latencies of the tasks in milliseconds
+    """
+    def client(client_tasks):
+        latencies = []
+        for task in client_tasks:
+            start = time.perf_counter()
+            task()
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        latencies = sorted(latency for client_latencies in executor.map(client, [tasks[i::clients]
+                                                                                 for i in range(clients)])
+                           for latency in client_latencies)
+    return time.perf_counter() - start, latencies
+
+
+def report(mode, clients, wall_time, latencies):
+    print(f'{mode:>16} {clients:>8} {len(latencies) / wall_time:>10.1f} {latencies[len(latencies) // 2]:>8.2f} '
+          f'{latencies[int(len(latencies) * 0.95)]:>8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read API benchmark')
+    parser.add_argument('--backend', choices=['sqlite', 'sharded', 'json'], default='sqlite')
+    parser.add_argument('--feeds', type=int, default=20, help='number of cached feeds')
+    parser.add_argument('--days', type=int, default=30, help='cached days')
+    parser.add_argument('--items', type=int, default=50, help='number of items of every feed per day')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8], help='numbers of concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='number of API requests of every run')
+    parser.add_argument('--cli-requests', type=int, default=40, help='number of program runs of every run')
+    parser.add_argument('--limit', type=int, default=20, help='number of the newest items of every query')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / 'Desktop').mkdir()
+        os.environ['HOME'] = home
+        fill(args.backend, args.feeds, args.days, args.items)
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = multiprocessing.get_context('fork').Process(target=run_server,
+                                                             args=(args.backend, port, max(args.clients)))
+        server.start()
+        try:
+            wait_for(f'{base_url}/feeds')
+            # Queries differ by the feed and the number of the last days, so the first requests are not cached
+            queries = [(f'https://feed{number % args.feeds}.example.com/rss', number // args.feeds % 7 + 1)
+                       for number in range(args.requests)]
+            print(f'{args.feeds * args.days * args.items} cached items, "{args.backend}" backend, '
+                  f'limit {args.limit}')
+            print(f'{"mode":>16} {"clients":>8} {"req/s":>10} {"p50, ms":>8} {"p95, ms":>8}')
+            for clients in args.clients:
+                tasks = [lambda url=url, days=days: query_cli(args.backend, [url, '--days', str(days), '--json',
+                                                                            '--limit', str(args.limit)])
+                         for url, days in queries[:args.cli_requests]]
+                report('rss_reader', clients, *run_clients(clients, tasks))
+                for route in ('items', 'html'):
+                    # Every run asks different queries, so its first requests are not answered from the cache
+                    urls = [f'{base_url}/{route}?url={url}&days={days}&limit={args.limit}&run={clients}'
+                            for url, days in queries]
+                    etags = {}
+                    tasks = [lambda url=url: query_api(url, {}) for url in urls]
+                    report(f'api {route}', clients, *run_clients(clients, tasks))
+                    tasks = [lambda url=url: query_api(url, {}) for url in urls]
+                    report(f'api {route} cached', clients, *run_clients(clients, tasks))
+                    for url in urls:
+                        query_api(url, etags)
+                    tasks = [lambda url=url: query_api(url, etags) for url in urls]
+                    report(f'api {route} 304', clients, *run_clients(clients, tasks))
+                tasks = [lambda: query_api(f'{base_url}/latest?limit={args.limit}', {})] * args.requests
+                report('api latest', clients, *run_clients(clients, tasks))
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == '__main__':
+    main()
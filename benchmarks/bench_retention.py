@@ -0,0 +1,138 @@
+"""
+Benchmark of the cache retention: feeds are polled once a simulated day for "--days" days, every poll sees the feed's
+last "--window" items, "--day-items" of them new, and the cache is compacted after every day with "--max-age"
+retention.
+Storage size, number of the remembered hashes, save and lookup time and peak memory of the lookup stay flat with
+the retention, and grow with the days without it. Items evicted by the retention are not cached again while their
+feed still has them, "recached" column counts the ones which are.
+The days are simulated by replacing the current day of the cache modules.
+Run from the repository root: python benchmarks/bench_retention.py [--backends sqlite sharded] [--days 60]
+"""
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+
+import fixtures  # noqa: F401 adds the sources to sys.path
+
+from feed_cacher import cache_storage, dedup, feed_cacher, image_store
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage
+from feed_cacher.dedup import NearDuplicateIndex
+from feed_cacher.feed_cacher import compact_cache
+from feed_cacher.image_store import ImageStore
+from rss_parser.feed_model import FeedItem
+
+# Storage name: storage class and cache file or folder name
+STORAGES = {
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+}
+FEED_INFO = {'title': 'Benchmark feed', 'description': None, 'link': 'https://news.example.com/'}
+START = date(2022, 1, 1)
+
+
+def set_today(today):
+    """
+    Function to simulate the current day of the cache modules
+    :param today: date object
+    """
+    def utc_day(days_ago=0):
+        return (today - timedelta(days=days_ago)).strftime('%Y%m%d')
+
+    for module in (cache_storage, dedup, feed_cacher):
+        module.utc_day = utc_day
+
+
+def feed_window(netloc, day_number, window, day_items):
+    """
+    :return: array of tuples with item's hash, date in "YYYYMMDD" format and FeedItem object of the last "window"
+    items the feed has on the day, it publishes "day_items" items a day
+    """
+    dated_items = []
+    for number in range((day_number + 1) * day_items - window, (day_number + 1) * day_items):
+        published = datetime.combine(START, datetime.min.time(), timezone.utc) \
+            + timedelta(days=number // day_items, minutes=number % day_items)
+        item = FeedItem(f'Story {number} of {netloc}', published, f'https://{netloc}/{number}.html',
+                        'Description of the story ' * 10, None, None)
+        dated_items.append((f'{netloc}-{number}', item.day, item))
+    return dated_items
+
+
+def run_storage(name, feeds_number, days, window, day_items, max_age, report_every):
+    storage_class, file_name = STORAGES[name]
+    for retention in (None, max_age):
+        print(f'{name}, {"max age " + str(max_age) + " days" if retention else "no retention"}')
+        print(f'{"day":>5} {"items":>8} {"hashes":>8} {"size, MB":>9} {"lookup, ms":>11} {"save, ms":>9} '
+              f'{"lookup peak, KB":>16} {"compact, ms":>12} {"recached":>9}')
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_dir = Path(cache_dir)
+            dedup._duplicate_index = NearDuplicateIndex(cache_dir / 'items_fingerprints.sqlite3')
+            image_store._image_store = ImageStore(cache_dir / 'CachedFeedImages')
+            with storage_class(cache_dir / file_name) as storage:
+                for day_number in range(days):
+                    set_today(START + timedelta(days=day_number))
+                    lookup_time = save_time = 0
+                    lookup_peak = 0
+                    recached = 0
+                    for feed_number in range(feeds_number):
+                        netloc = f'feed{feed_number}.example.com'
+                        dated_items = feed_window(netloc, day_number, window, day_items)
+                        hashes = [item_hash for item_hash, _, _ in dated_items]
+                        if feed_number == 0:
+                            tracemalloc.start()
+                        start = time.perf_counter()
+                        cached = storage.find_cached_hashes(netloc, hashes)
+                        if cached:
+                            storage.touch_hashes(netloc, cached)
+                        lookup_time += time.perf_counter() - start
+                        if feed_number == 0:
+                            lookup_peak = tracemalloc.get_traced_memory()[1]
+                            tracemalloc.stop()
+                        new_items = [dated_item for dated_item in dated_items if dated_item[0] not in cached]
+                        # Items published before the day were seen by the previous polls
+                        recached += sum(1 for item_hash in hashes[:window - day_items] if item_hash not in cached) \
+                            if day_number * day_items >= window else 0
+                        start = time.perf_counter()
+                        storage.save_feed(netloc, FEED_INFO, new_items)
+                        save_time += time.perf_counter() - start
+                    compact_time = 0
+                    if retention:
+                        start = time.perf_counter()
+                        compact_cache(storage, max_age=retention)
+                        compact_time = time.perf_counter() - start
+                    if (day_number + 1) % report_every == 0 or day_number + 1 == days:
+                        items_number = sum(sum(storage.day_counts(netloc).values())
+                                           for netloc in storage.feed_netlocs())
+                        hashes_number = len(storage.find_cached_hashes(
+                            'feed0.example.com', [f'feed0.example.com-{number}'
+                                                  for number in range((day_number + 1) * day_items)]))
+                        print(f'{day_number + 1:>5} {items_number:>8} {hashes_number:>8} '
+                              f'{storage.size() / 1024 / 1024:>9.2f} {lookup_time * 1000:>11.1f} '
+                              f'{save_time * 1000:>9.1f} {lookup_peak / 1024:>16.1f} {compact_time * 1000:>12.1f} '
+                              f'{recached:>9}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cache retention benchmark')
+    parser.add_argument('--backends', nargs='+', default=list(STORAGES), choices=list(STORAGES),
+                        help='cache storages to run')
+    parser.add_argument('--feeds', type=int, default=10, help='number of polled feeds')
+    parser.add_argument('--days', type=int, default=60, help='number of simulated days')
+    parser.add_argument('--window', type=int, default=400, help='number of the last items every feed has')
+    parser.add_argument('--day-items', type=int, default=50, help='number of items every feed publishes a day')
+    parser.add_argument('--max-age', type=int, default=3, help='days the items are kept with the retention')
+    parser.add_argument('--seen-days', type=int, default=14,
+                        help='days the hashes of the items are remembered after they are seen last time')
+    parser.add_argument('--report-every', type=int, default=10, help='print the stats every REPORT_EVERY days')
+    args = parser.parse_args()
+
+    cache_storage.SEEN_HASHES_DAYS = feed_cacher.SEEN_HASHES_DAYS = args.seen_days
+    for name in args.backends:
+        run_storage(name, args.feeds, args.days, args.window, args.day_items, args.max_age, args.report_every)
+
+
+if __name__ == '__main__':
+    main()
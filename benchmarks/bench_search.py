@@ -0,0 +1,95 @@
+"""
+Benchmark of the full-text search of the cached items: SQLite FTS5 index against LIKE scan of the same database
+and against the scan of the sharded cache, which has no search index.
+Run from the repository root: python benchmarks/bench_search.py [--feeds 20] [--days 100] [--items 100]
+"""
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import random
+import tempfile
+import time
+
+import fixtures  # noqa: F401 adds the sources to sys.path
+
+from feed_cacher.cache_storage import ShardedCacheStorage, SqliteCacheStorage
+from rss_parser.feed_model import FeedItem
+
+FEED_INFO = {'title': 'Benchmark feed', 'description': None, 'link': 'https://news.example.com/'}
+START = date(2022, 1, 1)
+QUERIES = ('election', 'market crash', 'climat*', 'quantum computer breakthrough')
+
+
+def vocabulary(words_number):
+    """
+    :return: array of generated words, query words are among them and occur at the different rates
+    """
+    random.seed(0)
+    words = [''.join(random.choices('abcdefghijklmnopqrstuvwxyz', k=random.randint(3, 10)))
+             for _ in range(words_number)]
+    return words + ['election'] * 20 + ['market', 'crash', 'climate', 'climatic'] * 5 + ['quantum', 'computer',
+                                                                                          'breakthrough']
+
+
+def fill(storage, feeds_number, days, items_number, words):
+    for feed_number in range(feeds_number):
+        netloc = f'feed{feed_number}.example.com'
+        items = []
+        for day_number in range(days):
+            day_start = datetime.combine(START + timedelta(days=day_number), datetime.min.time(), timezone.utc)
+            day = day_start.strftime('%Y%m%d')
+            for i in range(items_number):
+                items.append((f'{netloc}-{day}-{i}', day, FeedItem(
+                    ' '.join(random.choices(words, k=8)), day_start + timedelta(minutes=i),
+                    f'https://{netloc}/{day}/{i}.html', ' '.join(random.choices(words, k=40)), None, None
+                )))
+        storage.save_feed(netloc, FEED_INFO, items)
+
+
+def like_search(storage, query, limit):
+    """
+    Every word of the query is looked for by LIKE in the title and the description of every item
+    """
+    words = query.replace('*', '').split()
+    conditions = ' AND '.join('(title LIKE ? OR description LIKE ?)' for _ in words)
+    return storage.connection.execute(
+        f'SELECT netloc, title FROM items WHERE {conditions} ORDER BY timestamp DESC LIMIT ?',
+        [*(f'%{word}%' for word in words for _ in range(2)), limit]
+    ).fetchall()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    results = func(*args)
+    return (time.perf_counter() - start) * 1000, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search benchmark')
+    parser.add_argument('--feeds', type=int, default=20, help='number of cached feeds')
+    parser.add_argument('--days', type=int, default=100, help='cached days')
+    parser.add_argument('--items', type=int, default=100, help='number of items of every feed per day')
+    parser.add_argument('--words', type=int, default=20000, help='size of the generated vocabulary')
+    parser.add_argument('--limit', type=int, default=20, help='number of results')
+    args = parser.parse_args()
+
+    words = vocabulary(args.words)
+    print(f'{args.feeds * args.days * args.items} cached items, limit {args.limit}')
+    print(f'{"query":>30} {"fts5, ms":>9} {"like, ms":>9} {"scan, ms":>9} {"found":>6}')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        sqlite_path = Path(cache_dir) / 'feeds_cache.sqlite3'
+        shards_path = Path(cache_dir) / 'FeedShards'
+        with SqliteCacheStorage(sqlite_path) as sqlite_storage, ShardedCacheStorage(shards_path) as sharded_storage:
+            random.seed(1)
+            fill(sqlite_storage, args.feeds, args.days, args.items, words)
+            random.seed(1)
+            fill(sharded_storage, args.feeds, args.days, args.items, words)
+            for query in QUERIES:
+                fts_time, found = timed(sqlite_storage.search, query, None, None, None, args.limit)
+                like_time, _ = timed(like_search, sqlite_storage, query, args.limit)
+                scan_time, _ = timed(sharded_storage.search, query, None, None, None, args.limit)
+                print(f'{query:>30} {fts_time:>9.1f} {like_time:>9.1f} {scan_time:>9.1f} {found:>6}')
+
+
+if __name__ == '__main__':
+    main()
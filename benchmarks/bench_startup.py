@@ -0,0 +1,94 @@
+"""
+Benchmark of the program startup: import time measured with "python -X importtime" and wall time of short runs
+which don't fetch anything. Exits with code 1 if the startup budget is exceeded or a heavy dependency is imported
+by a code path which doesn't need it.
+Run from the repository root: python benchmarks/bench_startup.py [--runs 5] [--budget 150]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fixtures import SRC_PATH
+
+IMPORT_TIME_PATTERN = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| *(\S+)')
+# Dependencies needed only for fetching, caching images or converting feeds
+HEAVY_MODULES = ('bs4', 'dateutil', 'jinja2', 'lxml', 'PIL', 'pyarrow', 'xhtml2pdf')
+SCENARIOS = {
+    'version': ['--version'],
+    'cached news': ['--date', '20220430'],
+}
+
+
+def parse_import_time(output):
+    """
+    Function to parse "python -X importtime" output
+    :param output: stderr of the process
+    :return: dictionary with module name as a key and its cumulative import time in ms as a value
+    """
+    return {match.group(3): int(match.group(2)) / 1000
+            for match in map(IMPORT_TIME_PATTERN.match, output.splitlines()) if match}
+
+
+def run_program(args, env):
+    """
+    Function to run the program once with import time tracing
+    :param args: array of the program arguments
+    :param env: environment of the process
+    :return: tuple with wall time in ms and dictionary with imported modules' import times, see parse_import_time()
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', str(SRC_PATH / 'rss_reader.py'), *args],
+                            cwd=SRC_PATH, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return (time.perf_counter() - start) * 1000, parse_import_time(result.stderr)
+
+
+def import_program(env):
+    """
+    Function to import the program's main module in a new interpreter
+    :param env: environment of the process
+    :return: cumulative import time of the program's main module in ms
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import rss_reader'], cwd=SRC_PATH, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return parse_import_time(result.stderr)['rss_reader']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs of every scenario')
+    parser.add_argument('--budget', type=float, default=150,
+                        help='maximum median import time of the program modules, ms')
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / 'Desktop').mkdir()
+        env = {**os.environ, 'HOME': home}
+        import_time = statistics.median(import_program(env) for _ in range(args.runs))
+        print(f'{"import":<12} {import_time:7.1f} ms importing the program modules')
+        if import_time > args.budget:
+            print(f'  over the budget of {args.budget} ms')
+            failed = True
+        for scenario, program_args in SCENARIOS.items():
+            wall_times = []
+            heavy_modules = set()
+            for _ in range(args.runs):
+                wall_time, imports = run_program(program_args, env)
+                wall_times.append(wall_time)
+                heavy_modules.update(module.split('.')[0] for module in imports
+                                     if module.split('.')[0] in HEAVY_MODULES)
+            print(f'{scenario:<12} {statistics.median(wall_times):7.1f} ms wall')
+            if heavy_modules:
+                print(f'  heavy modules imported: {", ".join(sorted(heavy_modules))}')
+                failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark suite of the main stages of the program with stored baselines: parse_rss_feed() of the feeds served by the
+local fixture server, cache_feed() and collect_cached_feeds() of SQLite cache, HTML and PDF export, for the feeds of
+10 to 100k items with and without media:content images, with odd date formats, and RDF and Atom feeds.
+Every case runs in a fresh process, its best time and peak memory of "--repeat" runs are compared with the baseline,
+and the suite exits with code 1 if any case got slower or bigger than "--tolerance" times the baseline.
+Baselines depend on the machine, save them with "--save" before changing the code.
+The templates of the exports are a minimal stand-in of the program's one. Linux / macOS only.
+Run from the repository root: python benchmarks/bench_suite.py [--cases parse cache] [--max-items 10000] [--save]
+"""
+import argparse
+import json
+import multiprocessing
+from pathlib import Path
+import platform
+import sys
+import tempfile
+
+from fixtures import FixtureServer, ODD_DATE_FORMATS, generate_feed, measure, stand_in_template
+
+from feed_cacher import dedup
+from feed_cacher.cache_storage import SqliteCacheStorage
+from feed_cacher.dedup import NearDuplicateIndex
+from feed_cacher.feed_cacher import cache_feed, collect_cached_feeds
+from format_converter.converter import render_pdf, write_html
+from rss_parser.rss_parser import parse_rss_feed
+
+BASELINES_PATH = Path(__file__).parent / 'baselines.json'
+SIZES = (10, 1000, 10000, 100000)
+PDF_SIZES = (10, 100, 1000)
+# Fixture feeds by variant. "one day" feed has all its items published on the same day
+VARIANTS = {
+    'media': {},
+    'plain': {'with_media': False},
+    'odd dates': {'with_media': False, 'date_formats': ODD_DATE_FORMATS},
+    'one day': {'with_media': False, 'interval': 0},
+    'rdf': {'feed_format': 'rdf'},
+    'atom': {'feed_format': 'atom'},
+}
+DAY = '20220430'
+# Cases faster than this number of seconds are not compared by time, their time is mostly noise
+MIN_COMPARED_SECONDS = 0.01
+
+
+def run_parse(url, work_dir):
+    parse_rss_feed(url, None)
+
+
+def setup_cache(url, work_dir):
+    """
+    :return: arguments of cache_feed(): feed parsed from the url and new cache storage in the work dir
+    """
+    # Signatures of the fixture items are not mixed with the ones of the user's cache
+    dedup._duplicate_index = NearDuplicateIndex(Path(work_dir) / 'items_fingerprints.sqlite3')
+    return url, parse_rss_feed(url, None), SqliteCacheStorage(Path(work_dir) / 'feeds_cache.sqlite3')
+
+
+def run_cache(url, feed, storage):
+    cache_feed(url, feed, storage)
+
+
+def setup_collect(url, work_dir):
+    """
+    :return: arguments of collect_cached_feeds(): cache storage with the feed cached
+    """
+    url, feed, storage = setup_cache(url, work_dir)
+    cache_feed(url, feed, storage)
+    return (storage,)
+
+
+def run_collect(storage):
+    collect_cached_feeds(DAY, None, None, storage)
+
+
+def setup_export(url, work_dir):
+    """
+    :return: arguments of the export functions: array with the feed parsed from the url, stand-in template and
+    the work dir
+    """
+    return [parse_rss_feed(url, None)], stand_in_template(), Path(work_dir)
+
+
+def setup_pdf(url, work_dir):
+    # Import time is not a part of the measured conversion
+    from xhtml2pdf import pisa  # noqa: F401
+
+    return setup_export(url, work_dir)
+
+
+def run_html(feeds, template, work_dir):
+    write_html(template, feeds, work_dir / 'feed.html')
+
+
+def run_pdf(feeds, template, work_dir):
+    render_pdf(feeds, work_dir / 'feed.pdf', template, work_dir / 'chunks')
+
+
+# Case name: setup function, measured function, variants of the fixture feeds and their sizes
+CASES = {
+    'parse': (None, run_parse, ('media', 'plain', 'odd dates', 'rdf', 'atom'), SIZES),
+    'cache': (setup_cache, run_cache, ('one day',), SIZES),
+    'collect': (setup_collect, run_collect, ('one day',), SIZES),
+    'html': (setup_export, run_html, ('media',), SIZES),
+    'pdf': (setup_pdf, run_pdf, ('plain',), PDF_SIZES),
+}
+
+
+def serve_fixtures(connection):
+    """
+    Function to run the fixture server in a separate process, so the memory of the generated feeds is not inherited
+    by the measured processes forked from the main one. Feeds are generated on request
+    :param connection: connection receiving tuples with the variant and the size of the feed and sending back its url
+    """
+    with FixtureServer() as server:
+        for variant, size in iter(connection.recv, None):
+            path = f'/{variant.replace(" ", "-")}/{size}.xml'
+            if path not in server.documents:
+                server.add(path, generate_feed(size, **VARIANTS[variant]))
+            connection.send(server.url(path))
+
+
+def run_case(server, case, variant, size, repeat):
+    """
+    :param server: connection to the fixture server process, see serve_fixtures()
+    :return: dictionary with the best time in seconds and the best peak memory in MB of "repeat" runs of the case
+    """
+    setup, func, _, _ = CASES[case]
+    server.send((variant, size))
+    url = server.recv()
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as work_dir:
+            runs.append(measure(func, url, work_dir, setup=setup))
+    return {'seconds': round(min(elapsed for elapsed, _ in runs), 4),
+            'peak_mb': round(min(peak for _, peak in runs), 1)}
+
+
+def is_regression(result, baseline, tolerance):
+    """
+    :return: True if the case is slower or takes more memory than "tolerance" times the baseline
+    """
+    slower = result['seconds'] > MIN_COMPARED_SECONDS and result['seconds'] > baseline['seconds'] * tolerance
+    return slower or result['peak_mb'] > baseline['peak_mb'] * tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite with stored baselines')
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES), help='cases to run')
+    parser.add_argument('--max-items', type=int, default=max(SIZES), help='skip the feeds with more items')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of every case, the best one counts')
+    parser.add_argument('--tolerance', type=float, default=1.3,
+                        help='allowed ratio of the time and of the peak memory to the baseline')
+    parser.add_argument('--baselines', type=Path, default=BASELINES_PATH, help='path to the baselines json file')
+    parser.add_argument('--save', action='store_true', help='save the results as the new baselines')
+    args = parser.parse_args()
+
+    stored = json.loads(args.baselines.read_text()) if args.baselines.exists() else {'results': {}}
+    baselines = stored['results']
+    if baselines and stored.get('python') != platform.python_version():
+        print(f'Baselines are saved with Python {stored.get("python")} on {stored.get("machine")}', file=sys.stderr)
+    results = {}
+    regressions = []
+    print(f'{"case":>8} {"variant":>10} {"items":>7} {"time, s":>8} {"items/s":>9} {"peak, MB":>9} '
+          f'{"time, x":>8} {"peak, x":>8}')
+    server, server_end = multiprocessing.Pipe()
+    server_process = multiprocessing.get_context('fork').Process(target=serve_fixtures, args=(server_end,))
+    server_process.start()
+    try:
+        for case in args.cases:
+            _, _, variants, sizes = CASES[case]
+            for variant in variants:
+                for size in (size for size in sizes if size <= args.max_items):
+                    key = f'{case} {variant} {size}'
+                    result = results[key] = run_case(server, case, variant, size, args.repeat)
+                    baseline = baselines.get(key)
+                    ratios = f'{result["seconds"] / max(baseline["seconds"], 1e-4):>8.2f} ' \
+                             f'{result["peak_mb"] / baseline["peak_mb"]:>8.2f}' if baseline else f'{"-":>8} {"-":>8}'
+                    if baseline and is_regression(result, baseline, args.tolerance):
+                        regressions.append(key)
+                        ratios += ' REGRESSION'
+                    print(f'{case:>8} {variant:>10} {size:>7} {result["seconds"]:>8.3f} '
+                          f'{size / max(result["seconds"], 1e-4):>9.0f} {result["peak_mb"]:>9.1f} {ratios}')
+    finally:
+        server.send(None)
+        server_process.join()
+    if args.save:
+        stored = {'python': platform.python_version(), 'machine': f'{platform.system()} {platform.machine()}',
+                  'results': {**baselines, **results}}
+        args.baselines.write_text(json.dumps(stored, indent=2) + '\n')
+        print(f'Baselines are saved to {args.baselines}')
+    elif regressions:
+        print(f'{len(regressions)} regressions: {", ".join(regressions)}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark of polling feeds several times: cron-style runs of the program against one watch mode process.
+Both modes poll conditionally, so after the first round unchanged feeds answer "304 Not Modified".
+Run from the repository root: python benchmarks/bench_watch.py [--feeds 20] [--items 200] [--rounds 5]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fixtures import FixtureServer, SRC_PATH, generate_rss
+
+
+def children_cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def poll_cron(feeds_file, rounds):
+    """
+    Poll feeds with a new process of the program for every round
+    :param feeds_file: path to the file with feed urls
+    :param rounds: number of polling rounds
+    """
+    for _ in range(rounds):
+        subprocess.run([sys.executable, str(SRC_PATH / 'rss_reader.py'), '--feeds-file', str(feeds_file),
+                        '--conditional'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def poll_watch(urls, rounds):
+    """
+    Poll feeds with one watcher for all the rounds
+    :param urls: array of feed urls
+    :param rounds: number of polling rounds
+    """
+    from feed_cacher.cache_storage import open_cache_storage
+    from feed_watcher.feed_watcher import FeedWatcher
+
+    with open_cache_storage() as storage:
+        watcher = FeedWatcher(urls, storage)
+        for _ in range(rounds):
+            watcher.poll(urls)
+
+
+def run(func, *args):
+    """
+    Function to run the function in a child process
+    :return: tuple with wall time and CPU time of the child process in seconds
+    """
+    cpu_time, start = children_cpu_time(), time.perf_counter()
+    process = multiprocessing.get_context('fork').Process(target=func, args=args)
+    process.start()
+    process.join()
+    return time.perf_counter() - start, children_cpu_time() - cpu_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch mode benchmark')
+    parser.add_argument('--feeds', type=int, default=20, help='number of feeds')
+    parser.add_argument('--items', type=int, default=200, help='number of items in every feed')
+    parser.add_argument('--rounds', type=int, default=5, help='number of polling rounds')
+    args = parser.parse_args()
+
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        urls = [server.add(f'/feeds/{i}.xml', generate_rss(args.items, f'Feed {i}', with_media=False))
+                for i in range(args.feeds)]
+        feeds_file = Path(temp_dir) / 'feeds.txt'
+        feeds_file.write_text('\n'.join(urls))
+        results = {}
+        for mode, func, func_arg in (('cron', poll_cron, feeds_file), ('watch', poll_watch, urls)):
+            # Every mode starts with the empty cache and HTTP validators
+            home = Path(temp_dir) / mode
+            (home / 'Desktop').mkdir(parents=True)
+            os.environ['HOME'] = str(home)
+            results[mode] = run(func, func_arg, args.rounds)
+
+    print(f'{args.rounds} polls of {args.feeds} feeds x {args.items} items')
+    for mode, (wall_time, cpu_time) in results.items():
+        print(f'{mode:<6} {wall_time:.2f}s wall, {cpu_time:.2f}s CPU')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""Generated RSS, RDF and Atom fixtures and a local stand-in HTTP server for the benchmarks"""
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import gzip
+import hashlib
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import multiprocessing
+from pathlib import Path
+import sys
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+import zlib
+
+SRC_PATH = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(SRC_PATH))
+# Logs of the program are not a part of the measured work
+logging.disable(logging.CRITICAL)
+
+# Formats of <pubDate> met in the real-world feeds besides RFC 822, the slow ones are parsed by dateutil
+ODD_DATE_FORMATS = (
+    format_datetime,
+    lambda date: date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    lambda date: date.strftime('%d %b %Y %H:%M:%S +0000'),
+    lambda date: date.strftime('%B %d, %Y %H:%M'),
+    lambda date: date.strftime('%A, %B %d, %Y - %H:%M'),
+)
+# Minimal stand-in of the program's HTML template
+TEMPLATE = """<html><head><meta charset="utf-8"></head><body>
+{% for feed in feeds %}{% if not continued %}<h1>{{ feed.title }}</h1><p>{{ feed.description }}</p>{% endif %}
+{% for item in feed.items %}<h2><a href="{{ item.link }}">{{ item.title }}</a></h2><p>{{ item.date }}</p>
+<img src="{{ item | get_cached_image }}"><p>{{ item.description }}</p>
+{% endfor %}{% endfor %}</body></html>"""
+
+
+def generate_rss(items_number, title='Fixture feed', with_media=True, date_formats=(format_datetime,), interval=17):
+    """
+    Function to generate RSS 2.0 document with the given number of items
+    :param items_number: number of items in the feed
+    :param title: title of the feed
+    :param with_media: add media:content image to every item
+    :param date_formats: functions formatting the items' dates, used in turn
+    :param interval: number of minutes between the items' dates
+    :return: RSS document as bytes
+    """
+    start = datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc)
+    items = []
+    for i in range(items_number):
+        date = date_formats[i % len(date_formats)](start - timedelta(minutes=interval * i))
+        media = f'<media:content url="https://img.example.com/{i}.jpg" medium="image"/>' if with_media else ''
+        items.append(f"""<item>
+<title>{escape(title)} story {i}</title>
+<link>https://news.example.com/{i}.html</link>
+<description>{escape(f'<p>Description of the <b>story {i}</b> &amp; its details</p>')}</description>
+<pubDate>{date}</pubDate>
+<guid>https://news.example.com/{i}.html</guid>
+{media}
+</item>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/">
+<channel>
+<title>{escape(title)}</title>
+<link>https://news.example.com/</link>
+<description>Generated feed with {items_number} items</description>
+{''.join(items)}
+</channel>
+</rss>""".encode('utf-8')
+
+
+def generate_rdf(items_number, title='Fixture feed', with_media=True, interval=17):
+    """
+    Function to generate RSS 1.0 (RDF) document with the given number of items, dates are in <dc:date>
+    :param items_number: number of items in the feed
+    :param title: title of the feed
+    :param with_media: add media:content image to every item
+    :param interval: number of minutes between the items' dates
+    :return: RDF document as bytes
+    """
+    start = datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc)
+    items = []
+    for i in range(items_number):
+        date = (start - timedelta(minutes=interval * i)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        media = f'<media:content url="https://img.example.com/{i}.jpg" medium="image"/>' if with_media else ''
+        items.append(f"""<item rdf:about="https://news.example.com/{i}.html">
+<title>{escape(title)} story {i}</title>
+<link>https://news.example.com/{i}.html</link>
+<description>{escape(f'<p>Description of the <b>story {i}</b> &amp; its details</p>')}</description>
+<dc:date>{date}</dc:date>
+{media}
+</item>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+ xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:media="http://search.yahoo.com/mrss/">
+<channel rdf:about="https://news.example.com/">
+<title>{escape(title)}</title>
+<link>https://news.example.com/</link>
+<description>Generated feed with {items_number} items</description>
+</channel>
+{''.join(items)}
+</rdf:RDF>""".encode('utf-8')
+
+
+def generate_atom(items_number, title='Fixture feed', with_media=True, interval=17):
+    """
+    Function to generate Atom document with the given number of entries, summaries are html text constructs
+    :param items_number: number of entries in the feed
+    :param title: title of the feed
+    :param with_media: add image enclosure link to every entry
+    :param interval: number of minutes between the entries' dates
+    :return: Atom document as bytes
+    """
+    start = datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc)
+    entries = []
+    for i in range(items_number):
+        date = (start - timedelta(minutes=interval * i)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        media = f'<link rel="enclosure" type="image/jpeg" href="https://img.example.com/{i}.jpg"/>' \
+            if with_media else ''
+        entries.append(f"""<entry>
+<title>{escape(title)} story {i}</title>
+<link href="https://news.example.com/{i}.html"/>
+<id>https://news.example.com/{i}.html</id>
+<updated>{date}</updated>
+<summary type="html">{escape(f'<p>Description of the <b>story {i}</b> &amp; its details</p>')}</summary>
+{media}
+</entry>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<title>{escape(title)}</title>
+<subtitle>Generated feed with {items_number} items</subtitle>
+<link href="https://news.example.com/"/>
+<id>https://news.example.com/</id>
+<updated>{start.strftime('%Y-%m-%dT%H:%M:%SZ')}</updated>
+{''.join(entries)}
+</feed>""".encode('utf-8')
+
+
+# Fixture generators by the feed format
+FEED_GENERATORS = {
+    'rss': generate_rss,
+    'rdf': generate_rdf,
+    'atom': generate_atom,
+}
+
+
+def generate_feed(items_number, feed_format='rss', **kwargs):
+    """
+    :param items_number: number of items in the feed
+    :param feed_format: "rss", "rdf" or "atom", see FEED_GENERATORS
+    :param kwargs: arguments of the format's generator
+    :return: feed document as bytes
+    """
+    return FEED_GENERATORS[feed_format](items_number, **kwargs)
+
+
+def stand_in_template():
+    """
+    :return: Jinja template object of TEMPLATE with the program's filters
+    """
+    from jinja2 import DictLoader, Environment
+    from format_converter.converter import get_cached_image
+
+    environment = Environment(loader=DictLoader({'template.html': TEMPLATE}))
+    environment.filters['get_cached_image'] = get_cached_image
+    return environment.get_template('template.html')
+
+
+def _measure_in_child(connection, func, args, setup):
+    import resource
+    if setup is not None:
+        args = setup(*args)
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    connection.send((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+    connection.close()
+
+
+def measure(func, *args, setup=None):
+    """
+    Function to run the function in a fresh child process and measure its wall time and peak memory.
+    Peak memory includes memory allocated by C libraries, e.g. libxml2, which tracemalloc doesn't see
+    :param func: function to measure, should be importable by the child process
+    :param args: arguments of the function
+    :param setup: function preparing the arguments of the measured function in the child process from "args".
+    Its time is not measured, but its memory is a part of the peak memory
+    :return: tuple with wall time in seconds and peak resident memory of the child process in MB
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.get_context('fork').Process(target=_measure_in_child,
+                                                      args=(sender, func, args, setup))
+    process.start()
+    elapsed, max_rss = receiver.recv()
+    process.join()
+    return elapsed, max_rss / 1024
+
+
+class FixtureServer:
+    """
+    Local HTTP server serving registered fixture documents by path.
+    "?delay=SECONDS" query parameter emulates the network latency of a real host.
+    Documents are served with ETag and Last-Modified validators and conditional requests are answered with
+    "304 Not Modified" if the document is not changed.
+    Documents are compressed with the first of the server's encodings the request accepts
+    """
+    LAST_MODIFIED = 'Sat, 30 Apr 2022 19:42:08 GMT'
+    ENCODERS = {'gzip': gzip.compress, 'deflate': zlib.compress}
+
+    def __init__(self, encodings=()):
+        """
+        :param encodings: content encodings the documents are compressed with, see ENCODERS
+        """
+        self.documents = {}
+        self.encodings = encodings
+        self.encoded = {}
+        self.requests_count = 0
+        self.connections_count = 0
+        self.bytes_sent = 0
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                fixtures.connections_count += 1
+                super().setup()
+
+            def do_GET(self):
+                fixtures.requests_count += 1
+                parsed = urlparse(self.path)
+                delay = float(parse_qs(parsed.query).get('delay', ['0'])[0])
+                if delay:
+                    time.sleep(delay)
+                body = fixtures.documents.get(parsed.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                accepted = {value.split(';')[0].strip() for value in self.headers.get('Accept-Encoding', '').split(',')}
+                encoding = next((encoding for encoding in fixtures.encodings if encoding in accepted), None)
+                if encoding:
+                    key = (parsed.path, encoding)
+                    if key not in fixtures.encoded:
+                        fixtures.encoded[key] = FixtureServer.ENCODERS[encoding](body)
+                    body = fixtures.encoded[key]
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+                if encoding:
+                    self.send_header('Content-Encoding', encoding)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', FixtureServer.LAST_MODIFIED)
+                self.end_headers()
+                self.wfile.write(body)
+                fixtures.bytes_sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def add(self, path, body):
+        """
+        Register document to be served by path
+        :param path: url path of the document, e.g. "/feeds/1.xml"
+        :param body: document bytes
+        :return: full url of the document
+        """
+        self.documents[path] = body
+        return self.url(path)
+
+    def url(self, path):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}{path}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,10 +1,13 @@
 import argparse
+from datetime import datetime, timedelta, timezone
 import logging
 from pathlib import Path
 import re
 
 from exceptions.custom_exceptions import ArgumentError
-from  settings.settings import VERSION
+from  settings.settings import VERSION, FETCH_WORKERS, FETCH_PER_HOST, FETCH_TIMEOUT, PARSER_BACKEND, CACHE_BACKEND, \
+    CACHE_COMPRESSION, CACHE_FILE_PATH, CACHE_MAX_AGE, CACHE_MAX_FEED_ITEMS, CACHE_MAX_SIZE, WATCH_INTERVAL, \
+    SEARCH_LIMIT, DEDUP_SIMILARITY, API_HOST, API_PORT, API_WORKERS
 
 logger = logging.getLogger('RSSReader.arg_parser')
 
@@ -19,17 +22,90 @@ def create_arg_parser():
         prog="RSS Parser",
         description="Pure Python command-line RSS reader"
     )
-    parser.add_argument('URL', nargs='?', default=False, help='RSS URL')
+    parser.add_argument('URL', nargs='*', help='RSS URL. Several URLs are fetched concurrently')
     parser.add_argument('--version', '-V', action='version', version=f'{parser.prog}: {VERSION}',
                         help='print version info')
     parser.add_argument('--json', '-j', action='store_true', help='print result as JSON in stdout')
+    parser.add_argument('--jsonl', action='store_true',
+                        help='print result as JSON Lines in stdout: one JSON object per news item')
     parser.add_argument('--verbose', '-v', action='store_false', help='outputs verbose status messages')
     parser.add_argument('--limit', '-l', type=int, help='limit news topics if this parameter provided')
-    parser.add_argument('--date', '-d', help='get news from cache. Date format: YYYYMMDD')
+    parser.add_argument('--date', '-d',
+                        help='get news from cache. Date format: YYYYMMDD, or YYYYMMDD-YYYYMMDD for the range of '
+                             'dates, newest news first')
+    parser.add_argument('--days', type=int, help='get news of the last DAYS days (UTC) from cache, newest news first')
+    parser.add_argument('--search', '-s',
+                        help=f'find news in cache by the words of their title and description, best matches first. '
+                             f'"word*" matches words starting with "word". Can be narrowed by "date", "days" and URL. '
+                             f'Prints {SEARCH_LIMIT} news if "limit" is not provided')
     parser.add_argument('--to-html', action='store_true', help='convert fetched RSS feed to HTML format')
     parser.add_argument('--to-pdf', action='store_true', help='convert fetched RSS feed to PDF format')
+    parser.add_argument('--html-page-items', type=int,
+                        help='split HTML file into linked pages of HTML_PAGE_ITEMS news. Default - one page')
     parser.add_argument('--dest-file', '-f',
                         help='configure path to store cached and converted HTML and PDF files. Default - None')
+    parser.add_argument('--feeds-file', help='path to the text file with RSS URLs, one per line')
+    parser.add_argument('--workers', type=int, default=FETCH_WORKERS,
+                        help=f'maximum number of feeds fetched at the same time. Default - {FETCH_WORKERS}')
+    parser.add_argument('--per-host', type=int, default=FETCH_PER_HOST,
+                        help=f'maximum number of feeds fetched at the same time from one host. '
+                             f'Default - {FETCH_PER_HOST}')
+    parser.add_argument('--conditional', action='store_true',
+                        help='skip feeds that are not modified since the last poll (HTTP ETag / Last-Modified)')
+    parser.add_argument('--parser', choices=['stream', 'soup'], default=PARSER_BACKEND,
+                        help=f'feed parser: incremental lxml "stream" or BeautifulSoup "soup". '
+                             f'Default - {PARSER_BACKEND}')
+    parser.add_argument('--cache-backend', choices=['sqlite', 'sharded', 'json'], default=CACHE_BACKEND,
+                        help=f'feeds cache storage: indexed "sqlite" database, "sharded" folder of files per feed '
+                             f'and per day or one "json" document. Default - {CACHE_BACKEND}')
+    parser.add_argument('--cache-compression', choices=['gzip'], default=CACHE_COMPRESSION,
+                        help='compress the news saved to "sharded" cache storage. News saved before are read '
+                             'whether they are compressed or not')
+    parser.add_argument('--migrate-cache', action='store_true',
+                        help='copy feeds cached in json document into the storage of "--cache-backend"')
+    parser.add_argument('--compact', action='store_true',
+                        help='remove cached news exceeding "max-age", "max-feed-items" and "max-cache-size", forget '
+                             'news not seen for a long time, delete orphaned images and compact the cache storage. '
+                             'Done once a day in watch mode')
+    parser.add_argument('--max-age', type=int, default=CACHE_MAX_AGE,
+                        help='keep cached news of the last MAX_AGE days by their publication date. Default - no limit')
+    parser.add_argument('--max-feed-items', type=int, default=CACHE_MAX_FEED_ITEMS,
+                        help='keep MAX_FEED_ITEMS newest cached news per feed. Default - no limit')
+    parser.add_argument('--max-cache-size', type=float,
+                        default=CACHE_MAX_SIZE / 1024 / 1024 if CACHE_MAX_SIZE else None,
+                        help='keep the cache storage not larger than MAX_CACHE_SIZE MB by removing the oldest news. '
+                             'Default - no limit')
+    parser.add_argument('--dedup-similarity', type=float, default=DEDUP_SIMILARITY,
+                        help=f'minimum share of common words, from 0 to 1, for a new news to be considered '
+                             f'a near-duplicate of the cached one and not to be cached. Default - {DEDUP_SIMILARITY}')
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help='cache near-duplicates of the cached news too')
+    parser.add_argument('--watch', '--daemon', action='store_true',
+                        help='keep running and poll every feed on its own schedule until interrupted')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL / 60,
+                        help=f'minutes between polls of a feed in watch mode. Default - {WATCH_INTERVAL // 60}')
+    parser.add_argument('--export', action='store_true',
+                        help='export news cached after the previous export into a new file of the export folder for '
+                             'analytics, see README')
+    parser.add_argument('--export-format', choices=['parquet', 'arrow', 'csv', 'jsonl'],
+                        help='format of the exported file. "parquet" and "arrow" require "pyarrow" package. '
+                             'Default - parquet if "pyarrow" is installed, otherwise csv')
+    parser.add_argument('--full-export', action='store_true', help='export all the cached news, not only the new ones')
+    parser.add_argument('--serve', action='store_true',
+                        help='serve the cached news over local HTTP read API until interrupted, see README')
+    parser.add_argument('--host', default=API_HOST, help=f'address the read API listens on. Default - {API_HOST}')
+    parser.add_argument('--port', type=int, default=API_PORT,
+                        help=f'port the read API listens on. Default - {API_PORT}')
+    parser.add_argument('--api-workers', type=int, default=API_WORKERS,
+                        help=f'number of requests to the read API handled at the same time. Default - {API_WORKERS}')
+    parser.add_argument('--timeout', type=float, default=FETCH_TIMEOUT,
+                        help=f'number of seconds to wait for the server response. Default - {FETCH_TIMEOUT}')
+    parser.add_argument('--stats', action='store_true',
+                        help='print time of every stage of the run (fetch, parse, cache, images, render) and counters '
+                             'to stderr')
+    parser.add_argument('--stats-file', help='write time of every stage of the run and counters to the json file')
+    parser.add_argument('--profile',
+                        help='profile the run with cProfile and write the profile to the file, see "python -m pstats"')
     return parser.parse_args()
 
 
@@ -39,18 +115,102 @@ def check_args(args):
     :param args: Namespace object with the provided arguments
     :exception: Raises ArgumentError exception if "limit" argument is less than 1
     :exception: Raises ArgumentError exception if "URL" is not provided
-    :exception: Raises ArgumentError exception if "date" argument is not in the correct format
+    :exception: Raises ArgumentError exception if "date" argument is not in the correct format or the range of
+    dates ends before it starts
+    :exception: Raises ArgumentError exception if "days" argument is less than 1 or is provided with "date"
+    :exception: Raises ArgumentError exception if "feeds_file" does not exist
+    :exception: Raises ArgumentError exception if "migrate_cache" is provided with "json" cache backend
+    :exception: Raises ArgumentError exception if "cache_compression" is provided with not "sharded" cache backend
+    or json cache does not exist
+    :exception: Raises ArgumentError exception if "workers", "per_host", "timeout" or "interval" argument is not
+    positive
+    :exception: Raises ArgumentError exception if "watch" is provided without urls or with "date", "days" or "search"
+    :exception: Raises ArgumentError exception if "search" argument has no words
+    :exception: Raises ArgumentError exception if "dedup_similarity" argument is not greater than 0 and not greater
+    than 1
+    :exception: Raises ArgumentError exception if both "json" and "jsonl" are provided
+    :exception: Raises ArgumentError exception if "html_page_items" argument is less than 1
+    :exception: Raises ArgumentError exception if "max_age", "max_feed_items" or "max_cache_size" argument is not
+    positive
+    :exception: Raises ArgumentError exception if "export" is provided with urls, "date", "days", "search", "watch"
+    or "serve", or "export_format" requires a package which is not installed
+    :exception: Raises ArgumentError exception if "serve" is provided with urls, "date", "days", "search" or "watch"
+    :exception: Raises ArgumentError exception if "port" argument is not from 1 to 65535 or "api_workers" argument
+    is less than 1
     """
     logger.info('Checking Argument Parser arguments')
     if args.limit is not None and int(args.limit) < 1:
         logger.error('"limit" argument is less than 1. Should be greater than or equal to 1')
         raise ArgumentError('"limit" argument is less than 1')
-    if not args.URL and not args.date and not args.dest_file:
+    if not args.URL and not args.feeds_file and not args.date and not args.days and not args.search \
+            and not args.dest_file and not args.migrate_cache and not args.compact \
+            and not args.serve and not args.export:
         logger.error('The required argument "URL" is missing')
         raise ArgumentError('The required argument "URL" is missing')
-    if args.date and not re.compile(r'\d{8}').fullmatch(args.date):
+    if args.date and not re.compile(r'\d{8}(-\d{8})?').fullmatch(args.date):
         logger.error('The "date" argument is not in the correct format')
         raise ArgumentError('The "date" argument is not in the correct format')
+    if args.date and args.date[:8] > args.date[-8:]:
+        logger.error('The range of dates in "date" argument ends before it starts')
+        raise ArgumentError('The range of dates in "date" argument ends before it starts')
+    if args.days is not None and (args.days < 1 or args.date):
+        logger.error('"days" argument should be greater than 0 and can\'t be used with "date"')
+        raise ArgumentError('"days" argument should be greater than 0 and can\'t be used with "date"')
+    if args.feeds_file and not Path(args.feeds_file).is_file():
+        logger.error('The "feeds-file" argument is not a path to the existing file')
+        raise ArgumentError('The "feeds-file" argument is not a path to the existing file')
+    if args.migrate_cache and args.cache_backend == 'json':
+        logger.error('Feeds can be migrated only to "sqlite" or "sharded" cache backend')
+        raise ArgumentError('Feeds can be migrated only to "sqlite" or "sharded" cache backend')
+    if args.cache_compression and args.cache_backend != 'sharded':
+        logger.error('"cache-compression" argument is supported only by "sharded" cache backend')
+        raise ArgumentError('"cache-compression" argument is supported only by "sharded" cache backend')
+    if args.migrate_cache and not CACHE_FILE_PATH.exists():
+        logger.error(f'Nothing to migrate. {CACHE_FILE_PATH} does not exist')
+        raise ArgumentError(f'Nothing to migrate. {CACHE_FILE_PATH} does not exist')
+    if args.search is not None and not re.search(r'\w', args.search):
+        logger.error('The "search" argument has no words to search')
+        raise ArgumentError('The "search" argument has no words to search')
+    if args.json and args.jsonl:
+        logger.error('"json" and "jsonl" arguments can\'t be used together')
+        raise ArgumentError('"json" and "jsonl" arguments can\'t be used together')
+    if args.html_page_items is not None and args.html_page_items < 1:
+        logger.error('"html-page-items" argument is less than 1. Should be greater than or equal to 1')
+        raise ArgumentError('"html-page-items" argument is less than 1')
+    if any(value is not None and value <= 0 for value in (args.max_age, args.max_feed_items, args.max_cache_size)):
+        logger.error('"max-age", "max-feed-items" and "max-cache-size" arguments should be greater than 0')
+        raise ArgumentError('"max-age", "max-feed-items" and "max-cache-size" arguments should be greater than 0')
+    if args.workers < 1 or args.per_host < 1 or args.timeout <= 0 or args.interval <= 0:
+        logger.error('"workers", "per-host", "timeout" and "interval" arguments should be greater than 0')
+        raise ArgumentError('"workers", "per-host", "timeout" and "interval" arguments should be greater than 0')
+    if not 0 < args.dedup_similarity <= 1:
+        logger.error('"dedup-similarity" argument should be greater than 0 and not greater than 1')
+        raise ArgumentError('"dedup-similarity" argument should be greater than 0 and not greater than 1')
+    if args.watch and (args.date or args.days or args.search or not (args.URL or args.feeds_file)):
+        logger.error('"watch" argument requires "URL" or "feeds-file" and can\'t be used with "date", "days" or '
+                     '"search"')
+        raise ArgumentError('"watch" argument requires "URL" or "feeds-file" and can\'t be used with "date", "days" '
+                            'or "search"')
+    if args.export and (args.URL or args.feeds_file or args.date or args.days or args.search or args.watch
+                        or args.serve):
+        logger.error('"export" argument can\'t be used with "URL", "feeds-file", "date", "days", "search", "watch" '
+                     'or "serve"')
+        raise ArgumentError('"export" argument can\'t be used with "URL", "feeds-file", "date", "days", "search", '
+                            '"watch" or "serve"')
+    if args.export_format:
+        from feed_exporter.feed_exporter import is_available
+
+        if not is_available(args.export_format):
+            logger.error(f'"{args.export_format}" export format requires "pyarrow" package')
+            raise ArgumentError(f'"{args.export_format}" export format requires "pyarrow" package')
+    if args.serve and (args.URL or args.feeds_file or args.date or args.days or args.search or args.watch):
+        logger.error('"serve" argument can\'t be used with "URL", "feeds-file", "date", "days", "search" or "watch"')
+        raise ArgumentError('"serve" argument can\'t be used with "URL", "feeds-file", "date", "days", "search" '
+                            'or "watch"')
+    if not 0 < args.port < 65536 or args.api_workers < 1:
+        logger.error('"port" argument should be from 1 to 65535 and "api-workers" argument should be greater than 0')
+        raise ArgumentError('"port" argument should be from 1 to 65535 and "api-workers" argument should be greater '
+                            'than 0')
     if args.dest_file and not Path(args.dest_file).exists() and not args.dest_file == 'None':
         logger.error('Incorrect folder path. Try putting the path in quotes')
         raise ArgumentError()
@@ -58,3 +218,40 @@ def check_args(args):
         logger.error('Incorrect folder type')
         raise ArgumentError()
     logger.info('OK. Argument Parser arguments was checked')
+
+
+def get_output_format(args):
+    """
+    :param args: Namespace object with the provided arguments
+    :return: output format of the feeds: "jsonl", "json" or "text"
+    """
+    if args.jsonl:
+        return 'jsonl'
+    return 'json' if args.json else 'text'
+
+
+def get_date_range(args):
+    """
+    :param args: Namespace object with the provided arguments
+    :return: tuple of the first and the last date in "YYYYMMDD" format if the range of dates is requested by "date"
+    or "days" argument. None otherwise
+    """
+    if args.days:
+        today = datetime.now(timezone.utc)
+        return (today - timedelta(days=args.days - 1)).strftime('%Y%m%d'), today.strftime('%Y%m%d')
+    if args.date and '-' in args.date:
+        first_day, last_day = args.date.split('-')
+        return first_day, last_day
+    return None
+
+
+def get_retention(args):
+    """
+    :param args: Namespace object with the provided arguments
+    :return: dictionary with "max_age", "max_feed_items" and "max_size" in bytes arguments of compact_cache()
+    """
+    return {
+        'max_age': args.max_age,
+        'max_feed_items': args.max_feed_items,
+        'max_size': int(args.max_cache_size * 1024 * 1024) if args.max_cache_size else None,
+    }
@@ -1,3 +1,11 @@
 class ArgumentError(Exception):
     """Exception for errors during the check of arguments provided to Argument Parser"""
     pass
+
+
+class ImageDownloadError(Exception):
+    """Exception for unsuccessful HTTP responses during the images downloading"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
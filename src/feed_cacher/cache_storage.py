@@ -0,0 +1,1217 @@
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import gzip
+import hashlib
+from itertools import chain, islice
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from rss_parser.date_parser import parse_date
+from rss_parser.feed_model import EMPTY, Feed, FeedItem
+from settings.settings import CACHE_BACKEND, CACHE_COMPRESSION, CACHE_COMPRESSION_LEVEL, CACHE_FILE_PATH, \
+    CACHE_DB_PATH, CACHE_SHARDS_PATH, SEARCH_TITLE_WEIGHT, SEEN_HASHES_DAYS
+
+logger = logging.getLogger('RSSReader.cache_storage')
+
+FEED_FIELDS = Feed.INFO_FIELDS
+# The first bytes of every gzip member
+GZIP_MEMBER_HEADER = b'\x1f\x8b\x08'
+
+
+def item_sort_key(item):
+    """
+    :param item: FeedItem object
+    :return: key to sort items by their publication time
+    """
+    return item.timestamp or 0
+
+
+# Word of the search query, optionally followed by "*" to match words starting with it
+SEARCH_TERM_PATTERN = re.compile(r'(\w+)(\*?)')
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def utc_day(days_ago=0):
+    """
+    :param days_ago: number of days before today
+    :return: UTC day in "YYYYMMDD" format
+    """
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime('%Y%m%d')
+
+
+def newest_first(items):
+    """
+    :param items: array of FeedItem objects in the order they were cached
+    :return: array of indexes of the items, newest item first. Items published at the same time are ordered from
+    the last cached one
+    """
+    return sorted(reversed(range(len(items))), key=lambda i: item_sort_key(items[i]), reverse=True)
+
+
+def search_terms(query):
+    """
+    :param query: search query, words optionally followed by "*" to match words starting with them
+    :return: array of tuples with lowercase word and True if it is a prefix
+    """
+    return [(word.lower(), bool(star)) for word, star in SEARCH_TERM_PATTERN.findall(query)]
+
+
+def match_score(terms, item):
+    """
+    Score of the item for the search query: number of occurrences of the query's words in the item's title, weighted
+    by SEARCH_TITLE_WEIGHT, and in its description
+    :param terms: array of tuples from search_terms()
+    :param item: FeedItem object
+    :return: score of the item. 0 if any of the words is not found
+    """
+    title_words = WORD_PATTERN.findall((item.title or '').lower())
+    description_words = WORD_PATTERN.findall((item.description or '').lower())
+    score = 0
+    for term, prefix in terms:
+        title_hits = sum(word.startswith(term) if prefix else word == term for word in title_words)
+        description_hits = sum(word.startswith(term) if prefix else word == term for word in description_words)
+        if not title_hits and not description_hits:
+            return 0
+        score += title_hits * SEARCH_TITLE_WEIGHT + description_hits
+    return score
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Context manager holding exclusive lock of the file between processes. The lock is taken on the separate
+    "*.lock" file, so the locked file itself can be replaced while the lock is held
+    :param path: path to the file to lock
+    """
+    lock_path = path.with_name(path.name + '.lock')
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_json(path, default):
+    """
+    Function to read json document if it exists
+    :param path: path to the json document
+    :param default: value returned if document does not exist
+    :return: python object from json document
+    """
+    if not path.exists():
+        return default
+    with open(path, encoding='utf-8') as fr:
+        return json.load(fr)
+
+
+def write_file_atomic(path, data):
+    """
+    Function to write the file atomically: data is written into the temporary file next to the file, which then
+    replaces it. Readers see either the previous or the new file, never a truncated one
+    :param path: path to the file
+    :param data: bytes to write
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fw:
+            fw.write(data)
+            fw.flush()
+            os.fsync(fw.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_json_atomic(path, data, **kwargs):
+    """
+    Function to write json document atomically, see write_file_atomic()
+    :param path: path to the json document
+    :param data: python object to write
+    :param kwargs: keyword arguments of json.dumps()
+    """
+    write_file_atomic(path, json.dumps(data, **kwargs).encode('utf-8'))
+
+
+def files_version(paths):
+    """
+    :param paths: iterable of paths to the files or folders
+    :return: tuple of the modification time and the size of every existing path
+    """
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        version.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+class CacheStorage:
+    """
+    Base class of the feeds cache storage backends.
+    Feed items are stored by the feed's netloc and by the item's publication date in "YYYYMMDD" format
+    """
+    _days_index = None
+
+    def is_empty(self):
+        """
+        :return: True if nothing is cached yet
+        """
+        raise NotImplementedError
+
+    def find_cached_hashes(self, netloc, items_hashes):
+        """
+        :param netloc: netloc of the feed's url
+        :param items_hashes: collection of items' hashes to check
+        :return: set of the hashes from "items_hashes" which are already cached for the feed
+        """
+        raise NotImplementedError
+
+    def save_feed(self, netloc, feed_info, dated_items):
+        """
+        Store feed information and add new items to the feed's cache
+        :param netloc: netloc of the feed's url
+        :param feed_info: dictionary with feed's title, description and link
+        :param dated_items: array of tuples (item hash, date in "YYYYMMDD" format, FeedItem object)
+        """
+        raise NotImplementedError
+
+    def iter_feeds(self, date, netloc=None, limit=None):
+        """
+        Generator of the cached feeds which have items on the date, in the order feeds were cached.
+        Items of every feed are an iterator reading them from the storage one by one, so they should be consumed
+        before the next feed is taken and while the storage is open
+        :param date: date in "YYYYMMDD" format
+        :param netloc: netloc of the feed's url. None - all cached feeds
+        :param limit: maximum number of items of every feed. None - all items
+        """
+        raise NotImplementedError
+
+    def load_feeds(self, date, netloc=None, limit=None):
+        """
+        :param date: date in "YYYYMMDD" format
+        :param netloc: netloc of the feed's url. None - all cached feeds
+        :param limit: maximum number of items of every feed. None - all items
+        :return: array of Feed objects which have items on the date, in the order feeds were cached
+        """
+        feeds = []
+        for feed in self.iter_feeds(date, netloc, limit):
+            feed.items = list(feed.items)
+            feeds.append(feed)
+        return feeds
+
+    def feed_netlocs(self):
+        """
+        :return: array of the cached feeds' netlocs, in the order feeds were cached
+        """
+        raise NotImplementedError
+
+    def feed_info(self, netloc):
+        """
+        :param netloc: netloc of the feed's url
+        :return: dictionary with feed's title, description and link. None if the feed is not cached
+        """
+        raise NotImplementedError
+
+    def cached_days(self, netloc):
+        """
+        :param netloc: netloc of the feed's url
+        :return: array of the days in "YYYYMMDD" format the feed has cached items on
+        """
+        raise NotImplementedError
+
+    def day_items(self, netloc, day):
+        """
+        :param netloc: netloc of the feed's url
+        :param day: date in "YYYYMMDD" format
+        :return: iterable of FeedItem objects of the feed on the day
+        """
+        raise NotImplementedError
+
+    def days_index(self, netloc):
+        """
+        Sorted days of the feed, built once per storage object and dropped on save
+        :param netloc: netloc of the feed's url
+        :return: sorted array of the days in "YYYYMMDD" format the feed has cached items on
+        """
+        if self._days_index is None:
+            self._days_index = {}
+        if netloc not in self._days_index:
+            self._days_index[netloc] = sorted(self.cached_days(netloc))
+        return self._days_index[netloc]
+
+    def iter_range(self, netloc, first_day, last_day):
+        """
+        Generator of the feed's items published from "first_day" to "last_day" inclusive, newest first.
+        Items published at the same time are ordered from the last cached one.
+        Days of the range are found by binary search in the days index, and only their items are read
+        :param netloc: netloc of the feed's url
+        :param first_day: date in "YYYYMMDD" format
+        :param last_day: date in "YYYYMMDD" format
+        """
+        for day in reversed(self.range_days(netloc, first_day, last_day)):
+            yield from sorted(reversed(list(self.day_items(netloc, day))), key=item_sort_key, reverse=True)
+
+    def range_days(self, netloc, first_day=None, last_day=None):
+        """
+        :param netloc: netloc of the feed's url
+        :param first_day: date in "YYYYMMDD" format. None - all the days
+        :param last_day: date in "YYYYMMDD" format. None - all the days
+        :return: sorted array of the feed's days from "first_day" to "last_day" inclusive, found by binary search
+        in the days index
+        """
+        days = self.days_index(netloc)
+        if first_day is None or last_day is None:
+            return days
+        return days[bisect_left(days, first_day):bisect_right(days, last_day)]
+
+    def search(self, query, netlocs=None, first_day=None, last_day=None, limit=None):
+        """
+        Full-text search of the cached items by the words of their title and description. Every word of the query
+        should be found. Items are ranked by the number of the words found, words of the title weigh more,
+        items of the same rank are ordered newest first.
+        The base implementation scans the items of the days, the storages with the search index override it
+        :param query: search query, words optionally followed by "*" to match words starting with them
+        :param netlocs: array of netlocs of the feeds' urls. None - all cached feeds
+        :param first_day: date in "YYYYMMDD" format the items are published from. None - all the days
+        :param last_day: date in "YYYYMMDD" format the items are published to, inclusive. None - all the days
+        :param limit: maximum number of the items found. None - all of them
+        :return: array of tuples with the netloc of the feed and the FeedItem object found, best first
+        """
+        terms = search_terms(query)
+        found = []
+        for netloc in netlocs or self.feed_netlocs():
+            for day in self.range_days(netloc, first_day, last_day):
+                for item in self.day_items(netloc, day):
+                    score = match_score(terms, item)
+                    if score:
+                        found.append((score, item_sort_key(item), netloc, item))
+        found.sort(key=lambda result: result[:2], reverse=True)
+        return [(netloc, item) for _, _, netloc, item in found[:limit]]
+
+    def touch_hashes(self, netloc, items_hashes):
+        """
+        Remember the hashes of the feed's items found in the cache for SEEN_HASHES_DAYS more days, so the items which
+        are still published by the feed are not cached again after they are removed from the cache.
+        Hashes seen less than half of SEEN_HASHES_DAYS ago are not written again
+        :param netloc: netloc of the feed's url
+        :param items_hashes: collection of hashes returned by find_cached_hashes()
+        """
+        raise NotImplementedError
+
+    def forget_hashes(self, before_day):
+        """
+        Forget the hashes of the items seen last time before the day. Hashes of the items cached by the previous
+        versions, which have no day, are considered seen today
+        :param before_day: date in "YYYYMMDD" format
+        :return: number of hashes forgotten
+        """
+        raise NotImplementedError
+
+    def day_counts(self, netloc):
+        """
+        :param netloc: netloc of the feed's url
+        :return: dictionary with the day in "YYYYMMDD" format as a key and the number of the feed's items on the day
+        as a value
+        """
+        return {day: sum(1 for _ in self.day_items(netloc, day)) for day in self.cached_days(netloc)}
+
+    def remove_items(self, netloc, day, keep=0):
+        """
+        Remove the feed's items of the day, except "keep" newest of them. Hashes of the removed items stay seen,
+        see touch_hashes()
+        :param netloc: netloc of the feed's url
+        :param day: date in "YYYYMMDD" format
+        :param keep: number of the newest items of the day to keep
+        :return: number of items removed
+        """
+        raise NotImplementedError
+
+    def size(self):
+        """
+        :return: size of the storage on disk in bytes
+        """
+        raise NotImplementedError
+
+    def image_urls(self):
+        """
+        :return: set of the images' urls of all the cached items
+        """
+        return {item.img for netloc in self.feed_netlocs() for day in self.cached_days(netloc)
+                for item in self.day_items(netloc, day) if item.img}
+
+    def compact(self):
+        """
+        Rewrite the storage without the space left by the removed items
+        """
+
+    def added_watermark(self):
+        """
+        The base implementation counts the items of every day of every feed, new items are appended to their day
+        :return: json serializable watermark of the items cached so far, see iter_added()
+        """
+        return {netloc: self.day_counts(netloc) for netloc in self.feed_netlocs()}
+
+    def iter_added(self, after, until):
+        """
+        Generator of the items cached after one watermark and up to another one, read while they are consumed.
+        Items removed by the retention shift the next items of their day, so the items cached into a day which is
+        trimmed between two watermarks can be skipped. The oldest days are trimmed, new items rarely get there
+        :param after: watermark of the items read before, see added_watermark(). None - all the items
+        :param until: watermark of the items to read up to, see added_watermark()
+        :return: tuples with the netloc of the feed, date in "YYYYMMDD" format and FeedItem object
+        """
+        if not isinstance(after, dict):
+            after = {}
+        for netloc, day_counts in until.items():
+            read_counts = after.get(netloc, {})
+            for day, count in sorted(day_counts.items()):
+                start = min(read_counts.get(day, 0), count)
+                if start < count:
+                    for item in islice(self.day_items(netloc, day), start, count):
+                        yield netloc, day, item
+
+    def version(self):
+        """
+        :return: hashable token which changes when the cache is changed, e.g. by another process
+        """
+        raise NotImplementedError
+
+    def refresh(self):
+        """
+        Method to drop the data read from the cache before, so the changes made by other processes are read
+        """
+        self._days_index = None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JsonCacheStorage(CacheStorage):
+    """
+    Storage backend keeping the whole cache in one json document:
+    {netloc: {title, description, link, seen_hashes: {hash: day}, dates: {date: [items]}}}.
+    "seen_hashes" has the day every item was seen in the feed last time, documents of the previous versions have
+    "items_hashes" list instead, which is converted on the next write.
+    The document is loaded on the first access. On every write it is read again under the file lock, changes are
+    merged into it, and it is replaced atomically, so concurrent processes don't lose each other's items
+    """
+
+    def __init__(self, path=CACHE_FILE_PATH):
+        self.path = path
+        self._cache = None
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            logger.info('Opening cached feeds')
+            self._cache = read_json(self.path, {})
+            logger.info('OK. Cached feeds opened')
+        return self._cache
+
+    @staticmethod
+    def seen_hashes(cached_feed):
+        """
+        Method to convert "items_hashes" list of the previous versions into "seen_hashes", its hashes are considered
+        seen today
+        :param cached_feed: dictionary of the cached feed, it is changed in place
+        :return: dictionary with the item's hash as a key and the day it was seen last time as a value
+        """
+        seen_hashes = cached_feed.setdefault('seen_hashes', {})
+        today = utc_day()
+        for item_hash in cached_feed.pop('items_hashes', []):
+            seen_hashes.setdefault(item_hash, today)
+        return seen_hashes
+
+    @contextmanager
+    def locked_cache(self):
+        """
+        Context manager reading the document again under the file lock and writing it on exit
+        :return: cache dictionary
+        """
+        with file_lock(self.path):
+            self._cache = read_json(self.path, {})
+            yield self._cache
+            logger.info(f'Writing cached feeds into {self.path.name}')
+            write_json_atomic(self.path, self._cache, separators=(',', ':'))
+        self._days_index = None
+        logger.info('OK. Cached feeds are written')
+
+    def is_empty(self):
+        return len(self.cache) == 0
+
+    def find_cached_hashes(self, netloc, items_hashes):
+        cached_feed = self.cache.get(netloc, {})
+        return set(chain(cached_feed.get('seen_hashes', ()), cached_feed.get('items_hashes', ()))) \
+            .intersection(items_hashes)
+
+    def save_feed(self, netloc, feed_info, dated_items):
+        with self.locked_cache() as cache:
+            cached_feed = cache.setdefault(netloc, {})
+            seen_hashes = self.seen_hashes(cached_feed)
+            dates = cached_feed.get('dates', {})
+            today = utc_day()
+            for item_hash, date, item in dated_items:
+                if item_hash not in seen_hashes:
+                    dates.setdefault(date, []).append(item.to_cache_dict())
+                    seen_hashes[item_hash] = today
+            cached_feed.update(feed_info)
+            cached_feed['dates'] = dates
+
+    def touch_hashes(self, netloc, items_hashes):
+        stale_day = utc_day(SEEN_HASHES_DAYS // 2)
+        seen_hashes = self.cache.get(netloc, {}).get('seen_hashes', {})
+        if not any(seen_hashes.get(item_hash, stale_day) < stale_day for item_hash in items_hashes):
+            return
+        with self.locked_cache() as cache:
+            seen_hashes = self.seen_hashes(cache.setdefault(netloc, {}))
+            today = utc_day()
+            for item_hash in items_hashes:
+                if item_hash in seen_hashes:
+                    seen_hashes[item_hash] = today
+
+    def forget_hashes(self, before_day):
+        forgotten = 0
+        with self.locked_cache() as cache:
+            for cached_feed in cache.values():
+                seen_hashes = self.seen_hashes(cached_feed)
+                cached_feed['seen_hashes'] = {item_hash: day for item_hash, day in seen_hashes.items()
+                                              if day >= before_day}
+                forgotten += len(seen_hashes) - len(cached_feed['seen_hashes'])
+        return forgotten
+
+    def day_counts(self, netloc):
+        return {day: len(items) for day, items in self.cache.get(netloc, {}).get('dates', {}).items()}
+
+    def remove_items(self, netloc, day, keep=0):
+        with self.locked_cache() as cache:
+            dates = cache.get(netloc, {}).get('dates', {})
+            items = dates.get(day, [])
+            kept = set(newest_first([FeedItem.from_dict(item) for item in items])[:keep])
+            if kept:
+                dates[day] = [item for i, item in enumerate(items) if i in kept]
+            else:
+                dates.pop(day, None)
+        return len(items) - len(kept)
+
+    def size(self):
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def version(self):
+        return files_version([self.path])
+
+    def refresh(self):
+        super().refresh()
+        self._cache = None
+
+    def iter_feeds(self, date, netloc=None, limit=None):
+        for cached_netloc, cached_feed in self.cache.items():
+            if netloc and cached_netloc != netloc:
+                continue
+            if date in cached_feed['dates']:
+                items = map(FeedItem.from_dict, cached_feed['dates'][date][:limit])
+                yield Feed.from_dict(cached_feed, items)
+            else:
+                logger.warning(f'Not found items for "{cached_netloc}" on provided date')
+
+    def feed_netlocs(self):
+        return list(self.cache)
+
+    def feed_info(self, netloc):
+        cached_feed = self.cache.get(netloc)
+        return {key: cached_feed.get(key) for key in FEED_FIELDS} if cached_feed else None
+
+    def cached_days(self, netloc):
+        return list(self.cache.get(netloc, {}).get('dates', {}))
+
+    def day_items(self, netloc, day):
+        return map(FeedItem.from_dict, self.cache[netloc]['dates'][day])
+
+
+class SqliteCacheStorage(CacheStorage):
+    """
+    Storage backend keeping the cache in SQLite database in WAL mode.
+    New items are inserted incrementally and items of a date or of a date range are read through the indexes.
+    Every save is one transaction, concurrent writers wait for each other up to "timeout" seconds.
+    Hashes of the removed items are moved to "seen_hashes" table with the day they were seen last time
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS feeds (
+        netloc TEXT PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        link TEXT
+    );
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        netloc TEXT NOT NULL REFERENCES feeds (netloc),
+        item_hash TEXT NOT NULL,
+        date TEXT NOT NULL,
+        title TEXT,
+        pub_date TEXT,
+        link TEXT,
+        description TEXT,
+        img TEXT,
+        timestamp REAL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS items_netloc_hash ON items (netloc, item_hash);
+    CREATE INDEX IF NOT EXISTS items_date_netloc ON items (date, netloc);
+    CREATE INDEX IF NOT EXISTS items_hash ON items (item_hash);
+    CREATE TABLE IF NOT EXISTS seen_hashes (
+        netloc TEXT NOT NULL,
+        item_hash TEXT NOT NULL,
+        day TEXT NOT NULL,
+        PRIMARY KEY (netloc, item_hash)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS seen_hashes_day ON seen_hashes (day);
+    """
+    # Full-text search index of the items' title and description. It is an external content FTS5 table, which
+    # doesn't copy the items, kept up to date by the triggers
+    SEARCH_SCHEMA = (
+        "CREATE VIRTUAL TABLE items_fts USING fts5 (title, description, content='items', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN "
+        "INSERT INTO items_fts (rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN "
+        "INSERT INTO items_fts (items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER items_fts_update AFTER UPDATE OF title, description ON items BEGIN "
+        "INSERT INTO items_fts (items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO items_fts (rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "INSERT INTO items_fts (items_fts) VALUES ('rebuild')",
+    )
+    # Maximum number of host parameters in one SQLite statement of old SQLite versions
+    MAX_VARIABLES = 999
+
+    def __init__(self, path=CACHE_DB_PATH):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        created = not self.path.exists()
+        self.connection = sqlite3.connect(str(self.path), timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(self.SCHEMA)
+        if not self.has_timestamps():
+            self.add_timestamps()
+        # Items of the feed's days are read sorted by time. The index of the previous versions by (netloc, timestamp)
+        # is replaced with it
+        self.connection.execute('CREATE INDEX IF NOT EXISTS items_netloc_date_timestamp '
+                                'ON items (netloc, date, timestamp)')
+        self.connection.execute('DROP INDEX IF EXISTS items_netloc_timestamp')
+        self.has_search_index = self.has_table('items_fts') or self.add_search_index()
+        json_path = self.path.with_name(CACHE_FILE_PATH.name)
+        if created and json_path.exists():
+            logger.info(f'Found the cache in the previous format {json_path.name}')
+            migrate_json_cache(json_path, self)
+
+    def has_timestamps(self):
+        """
+        :return: True if the items table has "timestamp" column. Databases of the previous versions don't have it
+        """
+        return any(row[1] == 'timestamp' for row in self.connection.execute('PRAGMA table_info(items)'))
+
+    def add_timestamps(self):
+        """
+        Method to add "timestamp" column to the items table of the previous versions and fill it from the items'
+        publication dates. Done once under the write lock, so concurrent processes don't add it twice
+        """
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            if self.has_timestamps():
+                return
+            logger.info(f'Adding publication timestamps to the items of {self.path.name}')
+            self.connection.execute('ALTER TABLE items ADD COLUMN timestamp REAL')
+            rows = self.connection.execute('SELECT id, pub_date FROM items WHERE pub_date IS NOT NULL').fetchall()
+            self.connection.executemany(
+                'UPDATE items SET timestamp = ? WHERE id = ?',
+                ((FeedItem(None, parse_date(pub_date), None, None, None, None).timestamp, item_id)
+                 for item_id, pub_date in rows)
+            )
+        logger.info(f'OK. Timestamps of {len(rows)} items are added')
+
+    def has_table(self, name):
+        """
+        :param name: name of the table
+        :return: True if the table exists in the database
+        """
+        return self.connection.execute('SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?',
+                                       ('table', name)).fetchone() is not None
+
+    def add_search_index(self):
+        """
+        Method to create the full-text search index and to index the items cached before it.
+        SQLite built without FTS5 extension can't have it, then the search scans the items
+        :return: True if the index is created
+        """
+        try:
+            with self.connection:
+                self.connection.execute('BEGIN IMMEDIATE')
+                if not self.has_table('items_fts'):
+                    logger.info(f'Creating full-text search index of the items of {self.path.name}')
+                    for statement in self.SEARCH_SCHEMA:
+                        self.connection.execute(statement)
+                    logger.info('OK. Full-text search index is created')
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f'Full-text search index is not available: {e}')
+            return False
+
+    def is_empty(self):
+        return self.connection.execute('SELECT 1 FROM feeds LIMIT 1').fetchone() is None
+
+    def find_cached_hashes(self, netloc, items_hashes):
+        items_hashes = list(items_hashes)
+        cached = set()
+        for table in ('items', 'seen_hashes'):
+            for i in range(0, len(items_hashes), self.MAX_VARIABLES - 1):
+                chunk = items_hashes[i:i + self.MAX_VARIABLES - 1]
+                rows = self.connection.execute(
+                    f'SELECT item_hash FROM {table} WHERE netloc = ? AND item_hash IN ({", ".join("?" * len(chunk))})',
+                    [netloc, *chunk]
+                )
+                cached.update(row[0] for row in rows)
+            items_hashes = [item_hash for item_hash in items_hashes if item_hash not in cached]
+        return cached
+
+    def save_feed(self, netloc, feed_info, dated_items):
+        logger.info(f'Writing {len(dated_items)} new items of "{netloc}" into {self.path.name}')
+        with self.connection:
+            self.connection.execute(
+                'INSERT INTO feeds (netloc, title, description, link) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (netloc) DO UPDATE SET '
+                'title = excluded.title, description = excluded.description, link = excluded.link',
+                (netloc, *(feed_info.get(key) for key in FEED_FIELDS))
+            )
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO items '
+                '(netloc, item_hash, date, title, pub_date, link, description, img, timestamp) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((netloc, item_hash, date, *item.to_row(), item.timestamp)
+                 for item_hash, date, item in dated_items)
+            )
+        self._days_index = None
+        logger.info('OK. Cached feeds are written')
+
+    def iter_feeds(self, date, netloc=None, limit=None):
+        query = 'SELECT netloc, title, description, link FROM feeds'
+        cached_feeds = self.connection.execute(query + ' WHERE netloc = ?', (netloc,)) if netloc \
+            else self.connection.execute(query + ' ORDER BY rowid')
+        for cached_netloc, *feed_info in cached_feeds.fetchall():
+            rows = self.connection.execute(
+                'SELECT title, pub_date, link, description, img, timestamp FROM items '
+                'WHERE date = ? AND netloc = ? ORDER BY id LIMIT ?',
+                (date, cached_netloc, -1 if limit is None else limit)
+            )
+            first_row = rows.fetchone()
+            if first_row:
+                items = map(FeedItem.from_row, chain([first_row], rows))
+                yield Feed.from_dict(dict(zip(FEED_FIELDS, feed_info)), items)
+            else:
+                logger.warning(f'Not found items for "{cached_netloc}" on provided date')
+
+    def feed_netlocs(self):
+        return [row[0] for row in self.connection.execute('SELECT netloc FROM feeds ORDER BY rowid')]
+
+    def feed_info(self, netloc):
+        row = self.connection.execute('SELECT title, description, link FROM feeds WHERE netloc = ?',
+                                      (netloc,)).fetchone()
+        return dict(zip(FEED_FIELDS, row)) if row else None
+
+    def iter_range(self, netloc, first_day, last_day):
+        """
+        Items of the range are read already sorted through (netloc, date, timestamp) index. Items are selected by
+        the day they are cached by, like the other backends do, so the items without timestamp, e.g. the ones
+        migrated from the json cache with unknown date format, are found too, see CacheStorage.iter_range()
+        """
+        rows = self.connection.execute(
+            'SELECT title, pub_date, link, description, img, timestamp FROM items '
+            'WHERE netloc = ? AND date >= ? AND date <= ? ORDER BY date DESC, timestamp DESC, id DESC',
+            (netloc, first_day, last_day)
+        )
+        return map(FeedItem.from_row, rows)
+
+    def search(self, query, netlocs=None, first_day=None, last_day=None, limit=None):
+        """
+        Items are found through the full-text search index and ranked by BM25, see CacheStorage.search()
+        """
+        if not self.has_search_index:
+            return super().search(query, netlocs, first_day, last_day, limit)
+        match = ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in search_terms(query))
+        conditions = ['items_fts MATCH ?']
+        parameters = [match]
+        if netlocs:
+            conditions.append(f'items.netloc IN ({", ".join("?" * len(netlocs))})')
+            parameters += netlocs
+        if first_day is not None and last_day is not None:
+            conditions.append('items.date >= ? AND items.date <= ?')
+            parameters += [first_day, last_day]
+        rows = self.connection.execute(
+            'SELECT items.netloc, items.title, items.pub_date, items.link, items.description, items.img, '
+            f'items.timestamp FROM items_fts JOIN items ON items.id = items_fts.rowid WHERE {" AND ".join(conditions)} '
+            f'ORDER BY bm25(items_fts, ?, 1.0), items.timestamp DESC LIMIT ?',
+            [*parameters, SEARCH_TITLE_WEIGHT, -1 if limit is None else limit]
+        )
+        return [(netloc, FeedItem.from_row(row)) for netloc, *row in rows]
+
+    def cached_days(self, netloc):
+        return [row[0] for row in self.connection.execute('SELECT DISTINCT date FROM items WHERE netloc = ?',
+                                                          (netloc,))]
+
+    def day_items(self, netloc, day):
+        return map(FeedItem.from_row, self.connection.execute(
+            'SELECT title, pub_date, link, description, img, timestamp FROM items WHERE date = ? AND netloc = ? '
+            'ORDER BY id',
+            (day, netloc)
+        ))
+
+    def touch_hashes(self, netloc, items_hashes):
+        """
+        Hashes of the items which are still in the cache are not in "seen_hashes" table, so they are not updated
+        """
+        today = utc_day()
+        stale_day = utc_day(SEEN_HASHES_DAYS // 2)
+        with self.connection:
+            self.connection.executemany(
+                'UPDATE seen_hashes SET day = ? WHERE netloc = ? AND item_hash = ? AND day < ?',
+                ((today, netloc, item_hash, stale_day) for item_hash in items_hashes)
+            )
+
+    def forget_hashes(self, before_day):
+        with self.connection:
+            return self.connection.execute('DELETE FROM seen_hashes WHERE day < ?', (before_day,)).rowcount
+
+    def day_counts(self, netloc):
+        return dict(self.connection.execute('SELECT date, COUNT(*) FROM items WHERE netloc = ? GROUP BY date',
+                                            (netloc,)))
+
+    def remove_items(self, netloc, day, keep=0):
+        with self.connection:
+            rows = self.connection.execute(
+                'SELECT id, item_hash FROM items WHERE netloc = ? AND date = ? '
+                'ORDER BY timestamp DESC, id DESC LIMIT -1 OFFSET ?',
+                (netloc, day, keep)
+            ).fetchall()
+            today = utc_day()
+            self.connection.executemany('INSERT OR REPLACE INTO seen_hashes (netloc, item_hash, day) VALUES (?, ?, ?)',
+                                        ((netloc, item_hash, today) for _, item_hash in rows))
+            self.connection.executemany('DELETE FROM items WHERE id = ?', ((item_id,) for item_id, _ in rows))
+        self._days_index = None
+        return len(rows)
+
+    def size(self):
+        """
+        Pages in use of the database, without the free pages left by the removed items and without the write-ahead
+        log, both are released by compact()
+        """
+        page_count, = self.connection.execute('PRAGMA page_count').fetchone()
+        freelist_count, = self.connection.execute('PRAGMA freelist_count').fetchone()
+        page_size, = self.connection.execute('PRAGMA page_size').fetchone()
+        return (page_count - freelist_count) * page_size
+
+    def image_urls(self):
+        return {row[0] for row in self.connection.execute('SELECT DISTINCT img FROM items WHERE img IS NOT NULL')}
+
+    def added_watermark(self):
+        """
+        Ids of the items are never reused, the watermark is the last id given
+        """
+        row = self.connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'items'").fetchone()
+        return row[0] if row else 0
+
+    def iter_added(self, after, until):
+        """
+        Watermark greater than the last id given is of another database created with the same path,
+        then all the items are read
+        """
+        if not isinstance(after, int) or after > until:
+            after = 0
+        rows = self.connection.execute(
+            'SELECT netloc, date, title, pub_date, link, description, img, timestamp FROM items '
+            'WHERE id > ? AND id <= ? ORDER BY id',
+            (after, until)
+        )
+        return ((netloc, day, FeedItem.from_row(row)) for netloc, day, *row in rows)
+
+    def version(self):
+        """
+        Committed transactions change the write-ahead log, checkpoints and compaction change the database
+        """
+        return files_version(self.path.with_name(self.path.name + suffix) for suffix in ('', '-wal'))
+
+    def compact(self):
+        """
+        Full-text search index is merged into one segment, the database is rebuilt without free pages,
+        and the write-ahead log is truncated
+        """
+        if self.has_search_index:
+            with self.connection:
+                self.connection.execute("INSERT INTO items_fts (items_fts) VALUES ('optimize')")
+        self.connection.execute('VACUUM')
+        self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        self.connection.close()
+
+
+class ShardedCacheStorage(CacheStorage):
+    """
+    Storage backend keeping the cache in the folder of small files sharded by feed and by day:
+    <netloc>/manifest.json - feed information, the time the feed was cached first and the dates it has items on,
+    <netloc>/items_hashes.txt - hashes of the feed's cached items with the day they were seen last time, one per line,
+    <netloc>/<YYYYMMDD>.jsonl - items of one day, one json document per line,
+    <netloc>/<YYYYMMDD>.jsonl.gz - items of one day saved with gzip compression, one gzip member per save.
+    Saving appends only to the shards of the changed days and a query of one day reads only its shards,
+    so both don't depend on the total cache size. Shards of both kinds are read whatever compression is used
+    for saving. Removing items and compaction rewrite the day into one shard of the current compression
+    """
+    MANIFEST_NAME = 'manifest.json'
+    HASHES_NAME = 'items_hashes.txt'
+    # Suffixes of the day shards by the compression
+    SHARD_SUFFIXES = {None: '.jsonl', 'gzip': '.jsonl.gz'}
+
+    def __init__(self, path=CACHE_SHARDS_PATH, compression=CACHE_COMPRESSION):
+        """
+        :param path: path to the cache folder
+        :param compression: compression of the day shards written, one of SHARD_SUFFIXES keys
+        """
+        self.path = path
+        self.compression = compression
+        created = not self.path.exists()
+        self.path.mkdir(parents=True, exist_ok=True)
+        json_path = self.path.with_name(CACHE_FILE_PATH.name)
+        if created and json_path.exists():
+            logger.info(f'Found the cache in the previous format {json_path.name}')
+            migrate_json_cache(json_path, self)
+
+    def feed_path(self, netloc):
+        """
+        :param netloc: netloc of the feed's url
+        :return: path to the feed's folder. Port separator is replaced, as it is not allowed in Windows paths
+        """
+        return self.path / netloc.replace(':', '_')
+
+    def shard_paths(self, feed_path, day):
+        """
+        :param feed_path: path to the feed's folder
+        :param day: date in "YYYYMMDD" format
+        :return: array of paths to the existing shards of the day, plain one first
+        """
+        shard_paths = (feed_path / f'{day}{suffix}' for suffix in self.SHARD_SUFFIXES.values())
+        return [shard_path for shard_path in shard_paths if shard_path.exists()]
+
+    @staticmethod
+    def read_lines(path):
+        """
+        Generator of the complete lines of the appendable file. Line which is being appended by another process
+        at the moment has no line break yet, so it is skipped
+        :param path: path to the file
+        """
+        if path.exists():
+            with open(path, encoding='utf-8') as fr:
+                for line in fr:
+                    if line.endswith('\n'):
+                        yield line[:-1]
+
+    @staticmethod
+    def read_compressed_lines(path):
+        """
+        Generator of the lines of the gzip compressed shard, read and decompressed at once, as the shards of one day
+        are small. Every save appends one gzip member, the member which is being appended by another process
+        at the moment is not complete yet, so it is skipped
+        :param path: path to the shard
+        """
+        if not path.exists():
+            return
+        data = path.read_bytes()
+        while data:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                text = decompressor.decompress(data)
+            except zlib.error as e:
+                logger.warning(f'Skipped broken part of {path.name}. Error Msg: {e}')
+                return
+            if not decompressor.eof:
+                return
+            yield from text.decode('utf-8').splitlines()
+            data = decompressor.unused_data
+
+    def read_day(self, feed_path, day):
+        """
+        :param feed_path: path to the feed's folder
+        :param day: date in "YYYYMMDD" format
+        :return: iterator of json lines of the day's items from all the shards of the day
+        """
+        return chain.from_iterable(self.read_compressed_lines(shard_path) if shard_path.suffix == '.gz'
+                                   else self.read_lines(shard_path) for shard_path in self.shard_paths(feed_path, day))
+
+    def append_shard(self, feed_path, day, lines):
+        """
+        Method to append items to the day's shard of the current compression. Compressed lines are appended as
+        one gzip member, which is written at once
+        :param feed_path: path to the feed's folder
+        :param day: date in "YYYYMMDD" format
+        :param lines: array of json lines of the items
+        """
+        shard_path = feed_path / f'{day}{self.SHARD_SUFFIXES[self.compression]}'
+        if self.compression == 'gzip':
+            with open(shard_path, 'ab') as fa:
+                fa.write(gzip.compress(''.join(lines).encode('utf-8'), compresslevel=CACHE_COMPRESSION_LEVEL))
+        else:
+            with open(shard_path, 'a', encoding='utf-8') as fa:
+                fa.writelines(lines)
+
+    def write_shard(self, feed_path, day, lines):
+        """
+        Method to replace the day's shards with one shard of the current compression, written atomically
+        :param feed_path: path to the feed's folder
+        :param day: date in "YYYYMMDD" format
+        :param lines: array of json lines of the items
+        """
+        shard_path = feed_path / f'{day}{self.SHARD_SUFFIXES[self.compression]}'
+        data = ''.join(lines).encode('utf-8')
+        if self.compression == 'gzip':
+            data = gzip.compress(data, compresslevel=CACHE_COMPRESSION_LEVEL)
+        write_file_atomic(shard_path, data)
+        for other_path in self.shard_paths(feed_path, day):
+            if other_path != shard_path:
+                other_path.unlink()
+
+    def read_hashes(self, netloc):
+        """
+        :param netloc: netloc of the feed's url
+        :return: dictionary with the item's hash as a key and the day it was seen last time as a value. Hashes of
+        the previous versions have no day, they are considered seen today
+        """
+        today = utc_day()
+        hashes = {}
+        for line in self.read_lines(self.feed_path(netloc) / self.HASHES_NAME):
+            item_hash, _, day = line.partition(' ')
+            day = day or today
+            if day > hashes.get(item_hash, ''):
+                hashes[item_hash] = day
+        return hashes
+
+    def is_empty(self):
+        return not any(self.path.glob(f'*/{self.MANIFEST_NAME}'))
+
+    def find_cached_hashes(self, netloc, items_hashes):
+        return set(self.read_hashes(netloc)).intersection(items_hashes)
+
+    def touch_hashes(self, netloc, items_hashes):
+        """
+        Hashes seen again are appended with today's day, the latest day of the hash counts
+        """
+        stale_day = utc_day(SEEN_HASHES_DAYS // 2)
+        hashes = self.read_hashes(netloc)
+        stale = [item_hash for item_hash in items_hashes if hashes.get(item_hash, stale_day) < stale_day]
+        if stale:
+            feed_path = self.feed_path(netloc)
+            with file_lock(feed_path / self.MANIFEST_NAME):
+                with open(feed_path / self.HASHES_NAME, 'a', encoding='utf-8') as fa:
+                    fa.writelines(f'{item_hash} {utc_day()}\n' for item_hash in stale)
+
+    def forget_hashes(self, before_day):
+        """
+        Hashes files are rewritten with one line per hash
+        """
+        forgotten = 0
+        for manifest_path in sorted(self.path.glob(f'*/{self.MANIFEST_NAME}')):
+            netloc = read_json(manifest_path, {}).get('netloc', manifest_path.parent.name)
+            with file_lock(manifest_path):
+                hashes = self.read_hashes(netloc)
+                lines = [f'{item_hash} {day}\n' for item_hash, day in hashes.items() if day >= before_day]
+                write_file_atomic(manifest_path.with_name(self.HASHES_NAME), ''.join(lines).encode('utf-8'))
+            forgotten += len(hashes) - len(lines)
+        return forgotten
+
+    def day_counts(self, netloc):
+        """
+        Lines of the items are counted without parsing them
+        """
+        feed_path = self.feed_path(netloc)
+        return {day: sum(1 for _ in self.read_day(feed_path, day)) for day in self.cached_days(netloc)}
+
+    def remove_items(self, netloc, day, keep=0):
+        feed_path = self.feed_path(netloc)
+        manifest_path = feed_path / self.MANIFEST_NAME
+        with file_lock(manifest_path):
+            lines = list(self.read_day(feed_path, day))
+            kept = set(newest_first([FeedItem.from_dict(json.loads(line)) for line in lines])[:keep])
+            if kept:
+                self.write_shard(feed_path, day, [line + '\n' for i, line in enumerate(lines) if i in kept])
+            else:
+                manifest = read_json(manifest_path, {'netloc': netloc, 'created': time.time(), 'dates': []})
+                manifest['dates'] = [date for date in manifest['dates'] if date != day]
+                write_json_atomic(manifest_path, manifest, ensure_ascii=False)
+                for shard_path in self.shard_paths(feed_path, day):
+                    shard_path.unlink()
+        self._days_index = None
+        return len(lines) - len(kept)
+
+    def size(self):
+        return sum(os.path.getsize(os.path.join(folder, name))
+                   for folder, _, names in os.walk(self.path) for name in names)
+
+    def version(self):
+        """
+        Every save replaces the feed's manifest, which changes the feed's folder
+        """
+        return files_version([self.path, *sorted(self.path.iterdir())])
+
+    def compact(self):
+        """
+        Days with several shards, with shards of another compression, or with gzip shards of several members,
+        are rewritten into one shard of the current compression
+        """
+        suffix = self.SHARD_SUFFIXES[self.compression]
+        for manifest_path in sorted(self.path.glob(f'*/{self.MANIFEST_NAME}')):
+            feed_path = manifest_path.parent
+            with file_lock(manifest_path):
+                for day in read_json(manifest_path, {}).get('dates', []):
+                    shard_paths = self.shard_paths(feed_path, day)
+                    # Gzip member header can occur inside the compressed data too, then the shard is rewritten
+                    # without need, which is harmless
+                    if len(shard_paths) > 1 or any(not shard_path.name.endswith(suffix) for shard_path in shard_paths) \
+                            or (suffix.endswith('.gz') and shard_paths
+                                and shard_paths[0].read_bytes().count(GZIP_MEMBER_HEADER) > 1):
+                        self.write_shard(feed_path, day, [line + '\n' for line in self.read_day(feed_path, day)])
+
+    def save_feed(self, netloc, feed_info, dated_items):
+        feed_path = self.feed_path(netloc)
+        manifest_path = feed_path / self.MANIFEST_NAME
+        with file_lock(manifest_path):
+            known_hashes = self.find_cached_hashes(netloc, [item_hash for item_hash, _, _ in dated_items])
+            shards = {}
+            new_hashes = []
+            today = utc_day()
+            for item_hash, date, item in dated_items:
+                if item_hash not in known_hashes:
+                    shards.setdefault(date, []).append(json.dumps(item.to_cache_dict(), ensure_ascii=False) + '\n')
+                    new_hashes.append(f'{item_hash} {today}\n')
+                    known_hashes.add(item_hash)
+            logger.info(f'Writing {len(new_hashes)} new items of "{netloc}" into {len(shards)} shards')
+            for date, lines in shards.items():
+                self.append_shard(feed_path, date, lines)
+            with open(feed_path / self.HASHES_NAME, 'a', encoding='utf-8') as fa:
+                fa.writelines(new_hashes)
+            manifest = read_json(manifest_path, {'netloc': netloc, 'created': time.time(), 'dates': []})
+            manifest.update({key: feed_info.get(key) for key in FEED_FIELDS})
+            manifest['dates'] = sorted(set(manifest['dates']).union(shards))
+            write_json_atomic(manifest_path, manifest, ensure_ascii=False)
+        self._days_index = None
+        logger.info('OK. Cached feeds are written')
+
+    def manifests(self):
+        """
+        :return: array of tuples with the feed's folder and its manifest, in the order feeds were cached.
+        Feeds cached by the previous versions have no "created" time, they go first in the order of their folders
+        """
+        manifests = [(manifest_path.parent, read_json(manifest_path, {}))
+                     for manifest_path in self.path.glob(f'*/{self.MANIFEST_NAME}')]
+        return sorted(manifests, key=lambda manifest: (manifest[1].get('created', 0), manifest[0].name))
+
+    def iter_feeds(self, date, netloc=None, limit=None):
+        feed_path = self.feed_path(netloc) if netloc else None
+        manifests = [(feed_path, read_json(feed_path / self.MANIFEST_NAME, {}))] if netloc else self.manifests()
+        for feed_path, manifest in manifests:
+            if not self.shard_paths(feed_path, date):
+                logger.warning(f'Not found items for "{feed_path.name}" on provided date')
+                continue
+            items = (FeedItem.from_dict(json.loads(line)) for line in islice(self.read_day(feed_path, date), limit))
+            yield Feed.from_dict(manifest, items)
+
+    def feed_netlocs(self):
+        return [manifest.get('netloc', feed_path.name) for feed_path, manifest in self.manifests()]
+
+    def feed_info(self, netloc):
+        manifest = read_json(self.feed_path(netloc) / self.MANIFEST_NAME, None)
+        return {key: manifest.get(key) for key in FEED_FIELDS} if manifest else None
+
+    def cached_days(self, netloc):
+        return read_json(self.feed_path(netloc) / self.MANIFEST_NAME, {}).get('dates', [])
+
+    def day_items(self, netloc, day):
+        return (FeedItem.from_dict(json.loads(line)) for line in self.read_day(self.feed_path(netloc), day))
+
+
+CACHE_BACKENDS = {
+    'json': JsonCacheStorage,
+    'sqlite': SqliteCacheStorage,
+    'sharded': ShardedCacheStorage,
+}
+
+
+def open_cache_storage(backend=CACHE_BACKEND, compression=CACHE_COMPRESSION):
+    """
+    Function to open feeds cache storage
+    :param backend: name of the storage backend, one of CACHE_BACKENDS keys
+    :param compression: compression of the items saved, see ShardedCacheStorage. None - no compression.
+    Only "sharded" storage supports it
+    :return: CacheStorage object
+    """
+    logger.info(f'Opening "{backend}" cache storage')
+    if compression:
+        return CACHE_BACKENDS[backend](compression=compression)
+    return CACHE_BACKENDS[backend]()
+
+
+def migrate_json_cache(json_path, storage):
+    """
+    Function to copy all the feeds cached in json document of the previous format into another storage.
+    Items are hashed by their title as the previous versions did, missing title is hashed as "Empty"
+    :param json_path: path to the json document with cached feeds
+    :param storage: CacheStorage object to copy feeds to
+    :return: number of copied items
+    """
+    logger.info(f'Migrating cached feeds from {json_path.name}')
+    with open(json_path) as fr:
+        feeds_cache = json.load(fr)
+    items_number = 0
+    for netloc, cached_feed in feeds_cache.items():
+        feed_info = {key: cached_feed.get(key) for key in FEED_FIELDS}
+        dated_items = [
+            (hashlib.md5(bytes(item.get('title') or EMPTY, 'UTF-8')).hexdigest(), date, FeedItem.from_dict(item))
+            for date, items in cached_feed.get('dates', {}).items()
+            for item in items
+        ]
+        storage.save_feed(netloc, feed_info, dated_items)
+        items_number += len(dated_items)
+    logger.info(f'OK. {items_number} cached items of {len(feeds_cache)} feeds are migrated')
+    return items_number
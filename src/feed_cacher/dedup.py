@@ -0,0 +1,235 @@
+"""Identity of the feed items and detection of the near-duplicates, e.g. the same story syndicated by several feeds"""
+from functools import lru_cache
+import hashlib
+import logging
+import re
+import sqlite3
+import struct
+
+from feed_cacher.cache_storage import utc_day
+from rss_parser.feed_model import EMPTY
+from settings.settings import CACHE_FINGERPRINTS_PATH, DEDUP_SIMILARITY
+
+logger = logging.getLogger('RSSReader.dedup')
+
+WORD_PATTERN = re.compile(r'\w+')
+# MinHash signature of 32 hashes is split into 8 bands of 4 hashes. Items sharing any band are the candidates, their
+# similarity is estimated by the share of equal hashes of the signatures. Items with 70% of common words share a band
+# with probability of 89%, with 80% - of 98.5%, and with 30% - of 6%
+HASHES = 32
+BANDS = 8
+ROWS = HASHES // BANDS
+# Two blake2b digests of a word give 32 hashes of 32 bits
+_SIGNATURE = struct.Struct(f'<{HASHES}I')
+# Items with less words don't have a reliable signature, so they are never considered near-duplicates
+MIN_WORDS = 8
+# Number of words whose hashes are remembered. Common words occur in most of the items
+WORD_HASHES_CACHE_SIZE = 65536
+
+
+def item_hash(item):
+    """
+    :param item: FeedItem object
+    :return: hash of the item's stable identity: its guid, link, or title if it has neither
+    """
+    return hashlib.md5(bytes(item.guid or item.link or item.title or EMPTY, 'UTF-8')).hexdigest()
+
+
+def legacy_item_hash(item):
+    """
+    :param item: FeedItem object
+    :return: hash of the item's title, the items were cached by it in the previous versions.
+    Missing title is hashed as the placeholder of the previous versions
+    """
+    return hashlib.md5(bytes(item.title or EMPTY, 'UTF-8')).hexdigest()
+
+
+def item_words(item):
+    """
+    :param item: FeedItem object
+    :return: set of lowercase words of the item's title and description
+    """
+    return set(WORD_PATTERN.findall(f'{item.title or ""} {item.description or ""}'.lower()))
+
+
+@lru_cache(maxsize=WORD_HASHES_CACHE_SIZE)
+def word_hashes(word):
+    """
+    :param word: string
+    :return: tuple of HASHES hashes of the word
+    """
+    data = word.encode('utf-8')
+    return _SIGNATURE.unpack(hashlib.blake2b(data, person=b'0').digest() + hashlib.blake2b(data, person=b'1').digest())
+
+
+def minhash(words):
+    """
+    Function to compute MinHash signature of the set of words: minimums of the words' hashes for every of HASHES hash
+    functions. Share of equal hashes of two signatures estimates the share of common words of two sets (Jaccard index)
+    :param words: set of strings
+    :return: tuple of HASHES integers. None if there are too few words
+    """
+    if len(words) < MIN_WORDS:
+        return None
+    return tuple(map(min, *map(word_hashes, words)))
+
+
+def signature_bands(signature):
+    """
+    :param signature: MinHash signature
+    :return: tuple of BANDS keys of the signature's bands as signed 64-bit integers, as SQLite stores them
+    """
+    return tuple(
+        int.from_bytes(hashlib.blake2b(struct.pack(f'<{ROWS}I', *signature[band * ROWS:(band + 1) * ROWS]),
+                                       digest_size=8).digest(), 'little', signed=True)
+        for band in range(BANDS)
+    )
+
+
+def similarity(first, second):
+    """
+    :return: estimated share of common words of the items with two MinHash signatures, from 0 to 1
+    """
+    return sum(map(int.__eq__, first, second)) / HASHES
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures of the cached items, kept in SQLite database next to the cache with an index per band,
+    so the items of other feeds similar to a new one are found without scanning millions of cached items
+    (LSH banding).
+    The signatures don't depend on the cache storage backend. Every signature has the day it was stored,
+    signatures of the previous versions get it on the first forget()
+    """
+    SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS signatures (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        netloc TEXT NOT NULL,
+        item_hash TEXT NOT NULL,
+        signature BLOB NOT NULL,
+        day TEXT,
+        {', '.join(f'band{band} INTEGER NOT NULL' for band in range(BANDS))}
+    );
+    {' '.join(f'CREATE INDEX IF NOT EXISTS signatures_band{band} ON signatures (band{band});' for band in range(BANDS))}
+    """
+
+    def __init__(self, path=CACHE_FINGERPRINTS_PATH, min_similarity=DEDUP_SIMILARITY):
+        """
+        :param path: path to the database
+        :param min_similarity: minimum share of common words, from 0 to 1, for a new item to be considered
+        a near-duplicate of the cached one. None - items are never considered near-duplicates, but their signatures
+        are still kept
+        """
+        self.path = path
+        self.min_similarity = min_similarity
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(self.SCHEMA)
+        if not any(row[1] == 'day' for row in self.connection.execute('PRAGMA table_info(signatures)')):
+            self.add_days()
+        self.pending = []
+
+    def add_days(self):
+        """
+        Method to add "day" column to the signatures table of the previous versions. Done under the write lock,
+        so concurrent processes don't add it twice
+        """
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            if not any(row[1] == 'day' for row in self.connection.execute('PRAGMA table_info(signatures)')):
+                self.connection.execute('ALTER TABLE signatures ADD COLUMN day TEXT')
+
+    def find_similar(self, netloc, signature, bands):
+        """
+        :param netloc: netloc of the item's feed, its own items are not compared with it
+        :param signature: MinHash signature of the item
+        :param bands: keys of the signature's bands
+        :return: signature of the item of another feed cached before, at least "min_similarity" similar to the given
+        one. None if there is no such item
+        """
+        rows = self.connection.execute(
+            f'SELECT signature FROM signatures WHERE netloc != ? AND '
+            f'({" OR ".join(f"band{band} = ?" for band in range(BANDS))})',
+            (netloc, *bands)
+        )
+        for stored, in rows:
+            candidate = _SIGNATURE.unpack(stored)
+            if similarity(candidate, signature) >= self.min_similarity:
+                return candidate
+        return None
+
+    def split_duplicates(self, netloc, dated_items):
+        """
+        Method to separate new items of the feed which are near-duplicates of the items of other feeds cached before,
+        e.g. the same story syndicated by several feeds. Items of one feed are told apart by their guid or link,
+        so they are never near-duplicates of each other. Signatures of the other items are kept until commit()
+        :param netloc: netloc of the feed's url
+        :param dated_items: array of tuples with item's hash, date in "YYYYMMDD" format and FeedItem object
+        :return: tuple of array of the items which are not near-duplicates and array of the near-duplicates
+        """
+        unique = []
+        duplicates = []
+        for dated_item in dated_items:
+            signature = minhash(item_words(dated_item[2]))
+            if signature is None:
+                unique.append(dated_item)
+                continue
+            bands = signature_bands(signature)
+            if self.min_similarity is not None and self.find_similar(netloc, signature, bands) is not None:
+                logger.info('"%s" is a near-duplicate of the cached item', dated_item[2].title)
+                duplicates.append(dated_item)
+                continue
+            unique.append(dated_item)
+            self.pending.append((netloc, dated_item[0], _SIGNATURE.pack(*signature), utc_day(), *bands))
+        return unique, duplicates
+
+    def commit(self):
+        """
+        Method to store signatures of the items which are cached
+        """
+        with self.connection:
+            self.connection.executemany(
+                f'INSERT INTO signatures (netloc, item_hash, signature, day, '
+                f'{", ".join(f"band{band}" for band in range(BANDS))}) VALUES (?, ?, ?, ?, {", ".join("?" * BANDS)})',
+                self.pending
+            )
+        self.pending = []
+
+    def rollback(self):
+        """
+        Method to forget signatures of the items which are not cached
+        """
+        self.pending = []
+
+    def forget(self, before_day):
+        """
+        Method to forget signatures stored before the day and to rebuild the database without them.
+        Signatures of the previous versions, which have no day, are considered stored today
+        :param before_day: date in "YYYYMMDD" format
+        :return: number of signatures forgotten
+        """
+        with self.connection:
+            self.connection.execute('UPDATE signatures SET day = ? WHERE day IS NULL', (utc_day(),))
+            forgotten = self.connection.execute('DELETE FROM signatures WHERE day < ?', (before_day,)).rowcount
+        if forgotten:
+            self.connection.execute('VACUUM')
+            self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return forgotten
+
+    def close(self):
+        self.connection.close()
+
+
+_duplicate_index = None
+
+
+def get_duplicate_index():
+    """
+    :return: NearDuplicateIndex shared by the whole program run
+    """
+    global _duplicate_index
+    if _duplicate_index is None:
+        _duplicate_index = NearDuplicateIndex()
+    return _duplicate_index
@@ -1,111 +1,125 @@
-import hashlib
-import json
+from heapq import merge
+from itertools import chain, islice, repeat
 import logging
 import sys
 from pathlib import Path
-import threading
 from urllib.parse import urlparse
-from urllib.request import urlretrieve
-from urllib.error import HTTPError, URLError, ContentTooShortError
-
-from dateutil.parser import parse, ParserError
 
+from feed_cacher.cache_storage import file_lock, item_sort_key, open_cache_storage, read_json, utc_day, \
+    write_json_atomic
+from feed_cacher.dedup import get_duplicate_index, item_hash, legacy_item_hash
+from perf_stats.perf_stats import perf_stats
+from rss_parser.feed_model import Feed
 from rss_parser.rss_parser import print_feed
-from settings.settings import SHRUG_EMOJI, CACHE_DIR_PATH, CACHE_FILE_PATH, CACHE_IMGS_PATH
+from settings.settings import SHRUG_EMOJI, CACHE_VALIDATORS_PATH, SEEN_HASHES_DAYS
 
 logger = logging.getLogger('RSSReader.feed_cacher')
 
 
-def open_cached_feed():
+def load_http_validators():
     """
-    Function to open cached json file with news if exists, and convert it to python dictionary. Else create new
-    dictionary
-    :return: dictionary with existing news if so. Else empty
+    Function to open stored HTTP validators (ETag and Last-Modified) of the feeds' previous responses
+    :return: dictionary with feed url as a key and dictionary with its validators as a value
     """
-    logger.info('Opening cached views')
-    news_cache = {}
-    if CACHE_FILE_PATH.exists():
-        with open(CACHE_FILE_PATH) as fr:
-            news_cache = json.load(fr)
-    logger.info('OK. Cached views opened')
-    return news_cache
+    logger.info('Opening HTTP validators')
+    validators = read_json(CACHE_VALIDATORS_PATH, {})
+    logger.info('OK. HTTP validators opened')
+    return validators
 
 
-def cache_image(item, item_hash):
+def store_http_validators(validators):
     """
-    Function to collect all item's images and store them in on folder.
-    Image's name are hashed title of an item
-    :param item_hash: item's title hash
-    :param item: RSS feed item dictionary
-    :return: stores images in one folder
+    Function to store HTTP validators of the feeds' responses next to the feeds cache.
+    Validators are merged with the ones stored by concurrent processes meanwhile
+    :param validators: dictionary with feed url as a key and dictionary with its validators as a value
+    :return: writes HTTP validators to file
     """
-    if item['img'] != 'Empty':
-        if not CACHE_DIR_PATH.exists():
-            logger.info('Creating directory for cached news')
-            CACHE_DIR_PATH.mkdir()
-            CACHE_IMGS_PATH.mkdir()
-            logger.info('OK. Directory created')
-        try:
-            urlretrieve(item['img'], CACHE_IMGS_PATH / f'{item_hash}.jpg')
-        except (URLError, HTTPError, ContentTooShortError):
-            logger.error(f'Something went wrong with image downloading. Image\'s url: \"{item["img"]}\"')
-            raise
-    else: 
-        logger.warning(f'No image for \"{item["title"]}\"')
+    logger.info(f'Writing HTTP validators into {CACHE_VALIDATORS_PATH.name}')
+    with file_lock(CACHE_VALIDATORS_PATH):
+        stored_validators = read_json(CACHE_VALIDATORS_PATH, {})
+        stored_validators.update({url: value for url, value in validators.items() if value})
+        write_json_atomic(CACHE_VALIDATORS_PATH, stored_validators, indent=2, sort_keys=False)
+    logger.info('OK. HTTP validators are stored')
+
+
+def is_feed_limited(feed, limit):
+    """
+    Function to find whether the feed could be cut short by the limit. HTTP validators of such feed are not stored,
+    otherwise the next run without the limit would be answered "304 Not Modified" and miss the items beyond it
+    :param feed: Feed object
+    :param limit: integer number of feed items to limit. None - no limit
+    :return: True if the feed has as many items as the limit
+    """
+    return limit is not None and len(feed.items) >= limit
 
 
-def cache_feed(url, feed):
+def cache_feed(url, feed, storage=None):
     """
-    Function to cache RSS feed in local machine in json format
+    Function to cache RSS feed in local machine. Items are told apart by their guid or link. New items which are
+    near-duplicates of the cached ones, e.g. the same story of another feed, are not cached and their images are not
+    downloaded
     :param url: url of RSS feed
-    :param feed: dictionary created after parsing RSS feed
-    :return: writes cached rss feed to file
+    :param feed: Feed object created after parsing RSS feed
+    :param storage: CacheStorage object to cache feed to. None - storage from the settings
+    :return: number of new items cached. Writes cached rss feed to the storage
     """
-    feeds_cache = open_cached_feed()
+    if storage is None:
+        with open_cache_storage() as storage:
+            return cache_feed(url, feed, storage)
+    from feed_cacher.image_loader import get_image_loader
+
     netloc = urlparse(url).netloc
-    logger.info(f'Caching feed into {CACHE_FILE_PATH.name}')
+    logger.info(f'Caching feed of "{netloc}"')
     logger.info('Putting data into dictionary with correct format for caching')
     try:
-        feeds_cache[netloc] = feeds_cache.get(netloc, {})
-
-        items_hashes = set(feeds_cache[netloc].get('items_hashes', set()))
-        dates = feeds_cache[netloc].get('dates', {})
-        image_threads = []
-        logger.info('Caching items\' images')
-        for item in feed['items']:
-            item_hash = hashlib.md5(bytes(item['title'], 'UTF-8')).hexdigest()
-            logger.info(f'Checking if feed item \"{item["title"]}\" is already cached')
-            if item_hash not in items_hashes:
-                logger.info(f'Making preparation of item \"{item["title"]}\" to be cached')
-                t = threading.Thread(target=cache_image, args=(item, item_hash))
-                t.start()
-                image_threads.append(t)
-                try:
-                    logger.info('Getting date from feed item')
-                    date = parse(item['date']).strftime('%Y%m%d')
-                except (ParserError, TypeError):
+        items = {}
+        for item in feed.items:
+            items.setdefault(item_hash(item), item)
+        # Items cached by the previous versions are found by the hashes of their titles
+        legacy_hashes = {legacy_item_hash(item): hash_ for hash_, item in items.items()}
+        with perf_stats.timer('cache lookup'):
+            cached_hashes = storage.find_cached_hashes(netloc, [*items, *legacy_hashes])
+        if cached_hashes:
+            storage.touch_hashes(netloc, cached_hashes)
+        cached_hashes.update([legacy_hashes[hash_] for hash_ in cached_hashes if hash_ in legacy_hashes])
+        dated_items = []
+        # Per item messages are formatted only if logging is enabled
+        for hash_, item in items.items():
+            logger.info('Checking if feed item "%s" is already cached', item.title)
+            if hash_ not in cached_hashes:
+                logger.info('Making preparation of item "%s" to be cached', item.title)
+                if item.date is None:
                     logger.error('Something wrong with feed item\'s date')
-                    date = 'None'
-                logger.info('Separating feed item by date')
-                dates[date] = dates.get(date, [])
-                dates[date].append(item)
-                logger.info('Adding feed item to cache dictionary')
-                items_hashes.add(item_hash)
+                dated_items.append((hash_, item.day, item))
             else:
-                logger.info(f'\"{item["title"]}\" is already cached')
-        if len(image_threads) != 0:
-            logger.info('Waiting for images to download')
-            for image_thread in image_threads:
-                image_thread.join()
-            logger.info('OK. Images downloaded')
-        feeds_cache[netloc].update({key: value for key, value in feed.items() if key != 'items'})
-        feeds_cache[netloc]['items_hashes'] = list(items_hashes)
-        feeds_cache[netloc]['dates'] = dates
-        logger.info('OK. Dictionary for feed caching is created')
-        logger.info('Writing dictionary into file')
-        with open(CACHE_FILE_PATH, 'w') as fw:
-            json.dump(feeds_cache, fw, indent=2, sort_keys=False)
-        logger.info('OK. File with Cached feed is created')
+                logger.info('"%s" is already cached', item.title)
+        logger.info('Looking for near-duplicates of the cached items')
+        duplicate_index = get_duplicate_index()
+        with perf_stats.timer('dedup'):
+            dated_items, duplicates = duplicate_index.split_duplicates(netloc, dated_items)
+        if duplicates:
+            logger.info(f'{len(duplicates)} near-duplicates of the cached items are skipped')
+        perf_stats.count('items cached before', len(items) - len(dated_items) - len(duplicates))
+        perf_stats.count('near-duplicates', len(duplicates))
+        image_urls = []
+        for _, _, item in dated_items:
+            if item.img:
+                image_urls.append(item.img)
+            else:
+                logger.warning('No image for "%s"', item.title)
+        logger.info('Caching items\' images')
+        get_image_loader().download(image_urls)
+        logger.info('OK. Items for feed caching are prepared')
+        try:
+            with perf_stats.timer('cache save'):
+                storage.save_feed(netloc, feed.info(), dated_items)
+        except Exception:
+            duplicate_index.rollback()
+            raise
+        duplicate_index.commit()
+        perf_stats.count('items cached', len(dated_items))
+        logger.info('OK. Feed is cached')
+        return len(dated_items)
     except Exception as e:
         exc_type, exc_obj, exc_tb = sys.exc_info()
         file_name = '/'.join(Path(__file__).parts[-2:])
@@ -114,40 +128,119 @@ def cache_feed(url, feed):
         raise
 
 
-def collect_cached_feeds(date, url, limit):
+def evict_cached_items(storage, max_age=None, max_feed_items=None, max_size=None):
+    """
+    Function to remove the cached items exceeding the retention limits. Hashes of the removed items stay seen,
+    so the items still published by their feeds are not cached again
+    :param storage: CacheStorage object
+    :param max_age: number of days the items are kept for by their publication day. None - no limit.
+    Items without publication date are not removed by age
+    :param max_feed_items: maximum number of the newest items kept per feed. None - no limit
+    :param max_size: maximum size of the storage on disk in bytes, the oldest items of all the feeds are removed.
+    The number of items to remove is estimated by the average size of an item. None - no limit
+    :return: number of items removed
+    """
+    removed = 0
+    # Items without publication date are the oldest ones for the limits by number and by size
+    counts = {netloc: storage.day_counts(netloc) for netloc in storage.feed_netlocs()}
+    if max_age is not None:
+        first_day = utc_day(max_age - 1)
+        for netloc, day_counts in counts.items():
+            for day in [day for day in day_counts if day != 'None' and day < first_day]:
+                removed += storage.remove_items(netloc, day)
+                del day_counts[day]
+    if max_feed_items is not None:
+        for netloc, day_counts in counts.items():
+            kept = 0
+            for day in sorted(day_counts, key=lambda day: '' if day == 'None' else day, reverse=True):
+                if kept + day_counts[day] > max_feed_items:
+                    removed += storage.remove_items(netloc, day, max(max_feed_items - kept, 0))
+                    day_counts[day] = max(max_feed_items - kept, 0)
+                kept += day_counts[day]
+    items_number = sum(sum(day_counts.values()) for day_counts in counts.values())
+    size = storage.size()
+    if max_size is not None and size > max_size and items_number:
+        excess = -(-(size - max_size) * items_number // size)
+        logger.info(f'Cache storage takes {size} bytes, removing about {excess} oldest items')
+        dated_counts = sorted(('' if day == 'None' else day, netloc, day, count)
+                              for netloc, day_counts in counts.items() for day, count in day_counts.items() if count)
+        for _, netloc, day, count in dated_counts:
+            if excess <= 0:
+                break
+            removed += storage.remove_items(netloc, day, max(count - excess, 0))
+            excess -= count
+    logger.info(f'OK. {removed} cached items are removed')
+    return removed
+
+
+def compact_cache(storage=None, max_age=None, max_feed_items=None, max_size=None):
+    """
+    Function to apply the retention limits to the cache, see evict_cached_items(), to forget the hashes and
+    the near-duplicate signatures of the items not seen for SEEN_HASHES_DAYS, to compact the storage and to delete
+    the images none of the cached items refers to
+    :param storage: CacheStorage object to compact. None - storage from the settings
+    :return: dictionary with the numbers of the removed items, hashes, signatures and images, and the storage size
+    before and after the compaction in bytes
     """
-    Function to read cached RSS feed from json file
+    if storage is None:
+        with open_cache_storage() as storage:
+            return compact_cache(storage, max_age, max_feed_items, max_size)
+    from feed_cacher.image_store import get_image_store
+
+    logger.info('Compacting the cache')
+    try:
+        stats = {'size before': storage.size()}
+        with perf_stats.timer('cache eviction'):
+            stats['items removed'] = evict_cached_items(storage, max_age, max_feed_items, max_size)
+        with perf_stats.timer('cache compaction'):
+            stats['hashes forgotten'] = storage.forget_hashes(utc_day(SEEN_HASHES_DAYS))
+            storage.compact()
+            stats['signatures forgotten'] = get_duplicate_index().forget(utc_day(SEEN_HASHES_DAYS))
+            stats['images removed'], stats['images bytes removed'] = \
+                get_image_store().remove_orphans(storage.image_urls())
+        stats['size after'] = storage.size()
+        logger.info('OK. Cache is compacted')
+        return stats
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        file_name = '/'.join(Path(__file__).parts[-2:])
+        logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                     f'Function: compact_cache')
+        raise
+
+
+def compaction_summary(stats):
+    """
+    :param stats: dictionary returned by compact_cache()
+    :return: one line summary of the compaction
+    """
+    return (f'{stats["items removed"]} cached items removed, {stats["hashes forgotten"]} seen hashes and '
+            f'{stats["signatures forgotten"]} signatures forgotten, {stats["images removed"]} orphaned images '
+            f'({stats["images bytes removed"] / 1024 / 1024:.1f} MB) deleted. Cache storage: '
+            f'{stats["size before"] / 1024 / 1024:.1f} MB -> {stats["size after"] / 1024 / 1024:.1f} MB')
+
+
+def collect_cached_feeds(date, url, limit, storage=None):
+    """
+    Function to read cached RSS feed from the cache storage
     :param date: date from which the data should be displayed
     :param url: url of the source from which the data was cached
     :param limit: the number of items to be printed
-    :return: dictionary with rss feeds from different sources
+    :param storage: CacheStorage object to read feeds from. None - storage from the settings
+    :return: array of Feed objects from different sources
     """
+    if storage is None:
+        with open_cache_storage() as storage:
+            return collect_cached_feeds(date, url, limit, storage)
     logger.info("Collection cashed feeds")
-    feeds_cache = open_cached_feed()
-    if len(feeds_cache) == 0:
+    if storage.is_empty():
         logger.info('Feed cache is not created yet')
         print(f'No output? Check the logs then {SHRUG_EMOJI}')
         return
     try:
-        feeds = []
-        logger.info('Filtering cached feeds by source')
-        filtered_feeds = filter(lambda x: x[0] == urlparse(url).netloc if url else x[0], feeds_cache.items())
-        logger.info('OK. Cached feeds are filtered')
-        for netloc, cached_feed in filtered_feeds:
-            if date in cached_feed['dates']:
-                logger.info('Filtering cached feed items by date')
-                filtered_feed_items = filter(lambda x: x[0] == date, cached_feed['dates'].items())
-                logger.info('OK. Cached feed items are filtered')
-                item_date, items = list(filtered_feed_items)[0]
-                feed = {
-                    'title': cached_feed['title'],
-                    'description': cached_feed['description'],
-                    'link': cached_feed['link'],
-                    'items': items[:limit]
-                }
-                feeds.append(feed)
-            else:
-                logger.warning(f'Not found items for "{netloc}" on provided date')
+        logger.info('Filtering cached feeds by source and date')
+        with perf_stats.timer('cache load'):
+            feeds = storage.load_feeds(date, urlparse(url).netloc if url else None, limit)
         if feeds:
             logger.info('OK. Cached feed are collected')
             return feeds
@@ -162,17 +255,230 @@ def collect_cached_feeds(date, url, limit):
         raise
 
 
-def print_cached_feeds(feeds, as_json):
+def group_feeds(storage, source_items):
+    """
+    Function to group items of several sources into feeds, keeping the order of the items
+    :param storage: CacheStorage object to read feeds' information from
+    :param source_items: iterable of tuples with the netloc of the feed and FeedItem object
+    :return: array of Feed objects in the order of their first items
+    """
+    feeds = {}
+    for netloc, item in source_items:
+        if netloc not in feeds:
+            feeds[netloc] = Feed.from_dict(storage.feed_info(netloc) or {}, [])
+        feeds[netloc].items.append(item)
+    return list(feeds.values())
+
+
+def collect_cached_range(first_day, last_day, urls, limit, storage=None):
+    """
+    Function to read cached RSS feeds of several sources published in the date range, newest items first.
+    Items of every source are read already sorted and merged lazily, so only "limit" newest items of all
+    the sources are read instead of every matching one
+    :param first_day: date in "YYYYMMDD" format the range starts with
+    :param last_day: date in "YYYYMMDD" format the range ends with, inclusive
+    :param urls: urls of the sources from which the data was cached. Empty - all cached feeds
+    :param limit: the number of items of all the sources to be printed
+    :param storage: CacheStorage object to read feeds from. None - storage from the settings
+    :return: array of Feed objects ordered by their newest item. None if nothing is found
+    """
+    if storage is None:
+        with open_cache_storage() as storage:
+            return collect_cached_range(first_day, last_day, urls, limit, storage)
+    logger.info(f'Collecting cached feeds from {first_day} to {last_day}')
+    if storage.is_empty():
+        logger.info('Feed cache is not created yet')
+        print(f'No output? Check the logs then {SHRUG_EMOJI}')
+        return None
+    try:
+        with perf_stats.timer('cache load'):
+            feeds = merge_cached_range(first_day, last_day, urls, limit, storage)
+        if feeds:
+            logger.info(f'OK. {sum(len(feed.items) for feed in feeds)} cached items are collected')
+            return feeds
+        print(f'No items? Check the logs then {SHRUG_EMOJI}')
+        return None
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        file_name = '/'.join(Path(__file__).parts[-2:])
+        logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                     f'Function: collect_cached_range')
+        raise
+
+
+def merge_cached_range(first_day, last_day, urls, limit, storage):
+    """
+    Function to read "limit" newest items of several sources published in the date range, see collect_cached_range()
+    :param first_day: date in "YYYYMMDD" format the range starts with
+    :param last_day: date in "YYYYMMDD" format the range ends with, inclusive
+    :param urls: urls of the sources from which the data was cached. Empty - all cached feeds
+    :param limit: the number of items of all the sources. None - all the items
+    :param storage: CacheStorage object to read feeds from
+    :return: array of Feed objects ordered by their newest item
+    """
+    netlocs = [urlparse(url).netloc for url in urls] if urls else storage.feed_netlocs()
+    sources = [zip(repeat(netloc), storage.iter_range(netloc, first_day, last_day)) for netloc in netlocs]
+    return group_feeds(storage, islice(merge(*sources, key=lambda source_item: item_sort_key(source_item[1]),
+                                             reverse=True), limit))
+
+
+def latest_cached_items(urls, limit, storage):
+    """
+    Function to read the newest items of every source, whatever day they are published on. Items without publication
+    date are not read
+    :param urls: urls of the sources from which the data was cached. Empty - all cached feeds
+    :param limit: the number of items of every source
+    :param storage: CacheStorage object to read feeds from
+    :return: array of Feed objects ordered by their newest item
+    """
+    netlocs = [urlparse(url).netloc for url in urls] if urls else storage.feed_netlocs()
+    feeds = []
+    for netloc in netlocs:
+        days = [day for day in storage.days_index(netloc) if day != 'None']
+        if days:
+            items = list(islice(storage.iter_range(netloc, days[0], days[-1]), limit))
+            feeds.append(Feed.from_dict(storage.feed_info(netloc) or {}, items))
+    feeds.sort(key=lambda feed: item_sort_key(feed.items[0]) if feed.items else 0, reverse=True)
+    return feeds
+
+
+def iter_cached_range(first_day, last_day, urls, storage):
+    """
+    Generator of cached RSS feeds of several sources published in the date range, the same as
+    collect_cached_range() returns without a limit. Items of every feed are read from the storage while they are
+    consumed, so they should be consumed while the storage is open
+    :param first_day: date in "YYYYMMDD" format the range starts with
+    :param last_day: date in "YYYYMMDD" format the range ends with, inclusive
+    :param urls: urls of the sources from which the data was cached. Empty - all cached feeds
+    :param storage: CacheStorage object to read feeds from
+    """
+    netlocs = [urlparse(url).netloc for url in urls] if urls else storage.feed_netlocs()
+    sources = []
+    for netloc in netlocs:
+        items = storage.iter_range(netloc, first_day, last_day)
+        first_item = next(items, None)
+        if first_item is not None:
+            sources.append((netloc, first_item, items))
+    # Feeds are ordered by their newest item, the first one
+    sources.sort(key=lambda source: item_sort_key(source[1]), reverse=True)
+    for netloc, first_item, items in sources:
+        yield Feed.from_dict(storage.feed_info(netloc) or {}, chain([first_item], items))
+
+
+def iter_cached_feeds(date, urls, limit, storage):
+    """
+    Generator of cached RSS feeds of several sources on the date. Items of every feed are read from the storage while
+    they are consumed, see CacheStorage.iter_feeds()
+    :param date: date from which the data should be displayed
+    :param urls: urls of the sources from which the data was cached. Empty - all cached feeds
+    :param limit: the number of items of every source
+    :param storage: CacheStorage object to read feeds from
+    """
+    for url in urls or [None]:
+        yield from storage.iter_feeds(date, urlparse(url).netloc if url else None, limit)
+
+
+def search_cached_feeds(query, first_day, last_day, urls, limit, storage=None):
+    """
+    Function to find cached RSS feeds' items by the words of their title and description
+    :param query: search query, see CacheStorage.search()
+    :param first_day: date in "YYYYMMDD" format the items are published from. None - all the days
+    :param last_day: date in "YYYYMMDD" format the items are published to, inclusive. None - all the days
+    :param urls: urls of the sources from which the data was cached. Empty - all cached feeds
+    :param limit: the number of items of all the sources to be printed
+    :param storage: CacheStorage object to search feeds in. None - storage from the settings
+    :return: array of Feed objects ordered by their best item, items best first. None if nothing is found
+    """
+    if storage is None:
+        with open_cache_storage() as storage:
+            return search_cached_feeds(query, first_day, last_day, urls, limit, storage)
+    logger.info(f'Searching cached feeds for "{query}"')
+    if storage.is_empty():
+        logger.info('Feed cache is not created yet')
+        print(f'No output? Check the logs then {SHRUG_EMOJI}')
+        return None
+    try:
+        netlocs = [urlparse(url).netloc for url in urls] if urls else None
+        with perf_stats.timer('cache search'):
+            feeds = group_feeds(storage, storage.search(query, netlocs, first_day, last_day, limit))
+        if feeds:
+            logger.info(f'OK. {sum(len(feed.items) for feed in feeds)} cached items are found')
+            return feeds
+        print(f'No items? Check the logs then {SHRUG_EMOJI}')
+        return None
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        file_name = '/'.join(Path(__file__).parts[-2:])
+        logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                     f'Function: search_cached_feeds')
+        raise
+
+
+def print_cached_feeds(feeds, output_format='text'):
     """
     Function to output cached feed to stdout
-    :param feeds: array with feed dictionaries
-    :param as_json: boolean parameter to define output as json or not
+    :param feeds: array or iterator of Feed objects
+    :param output_format: "text", "json" or "jsonl", see print_feed()
+    :return: number of printed feeds
     """
+    feeds_number = 0
     if feeds:
         for feed in feeds:
-            logger.info(f'Printing cashed feed for "{feed["title"]}"')
-            print_feed(feed, as_json)
+            logger.info(f'Printing cashed feed for "{feed.title}"')
+            print_feed(feed, output_format)
+            feeds_number += 1
         logger.info(f'OK. Cached RSS feed is printed')
+    return feeds_number
+
+
+def stream_cached_feeds(date, url, limit, output_format='text', storage=None):
+    """
+    Function to print cached RSS feeds item by item while they are read from the cache storage, so memory usage
+    doesn't depend on the number of printed items
+    :param date: date from which the data should be displayed
+    :param url: url of the source from which the data was cached. None - all cached feeds
+    :param limit: the number of items to be printed
+    :param output_format: "text", "json" or "jsonl", see print_feed()
+    :param storage: CacheStorage object to read feeds from. None - storage from the settings
+    :return: number of printed feeds
+    """
+    if storage is None:
+        with open_cache_storage() as storage:
+            return stream_cached_feeds(date, url, limit, output_format, storage)
+    logger.info("Streaming cashed feeds")
+    if storage.is_empty():
+        logger.info('Feed cache is not created yet')
+        print(f'No output? Check the logs then {SHRUG_EMOJI}')
+        return 0
+    feeds_number = print_cached_feeds(iter_cached_feeds(date, [url] if url else [], limit, storage), output_format)
+    if not feeds_number:
+        print(f'No items? Check the logs then {SHRUG_EMOJI}')
+    return feeds_number
+
+
+def stream_cached_range(first_day, last_day, urls, output_format='text', storage=None):
+    """
+    Function to print all the cached RSS feeds' items published in the date range while they are read from
+    the cache storage, see iter_cached_range()
+    :param first_day: date in "YYYYMMDD" format the range starts with
+    :param last_day: date in "YYYYMMDD" format the range ends with, inclusive
+    :param urls: urls of the sources from which the data was cached. Empty - all cached feeds
+    :param output_format: "text", "json" or "jsonl", see print_feed()
+    :param storage: CacheStorage object to read feeds from. None - storage from the settings
+    :return: number of printed feeds
+    """
+    if storage is None:
+        with open_cache_storage() as storage:
+            return stream_cached_range(first_day, last_day, urls, output_format, storage)
+    logger.info(f'Streaming cached feeds from {first_day} to {last_day}')
+    if storage.is_empty():
+        logger.info('Feed cache is not created yet')
+        print(f'No output? Check the logs then {SHRUG_EMOJI}')
+        return 0
+    feeds_number = print_cached_feeds(iter_cached_range(first_day, last_day, urls, storage), output_format)
+    if not feeds_number:
+        print(f'No items? Check the logs then {SHRUG_EMOJI}')
+    return feeds_number
 
 
 
@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+import logging
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+from exceptions.custom_exceptions import ImageDownloadError
+from feed_cacher.image_store import get_image_store
+from perf_stats.perf_stats import perf_stats
+from settings.settings import IMAGE_WORKERS, IMAGE_TIMEOUT, IMAGE_RETRIES, IMAGE_RETRY_BACKOFF
+
+logger = logging.getLogger('RSSReader.image_loader')
+
+# Responses worth retrying: the server may answer successfully later
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+MAX_REDIRECTS = 5
+
+
+class ImageReport:
+    """Structured report of the images downloading: downloaded, already cached and failed images' urls"""
+
+    def __init__(self):
+        self.downloaded = []
+        self.cached = []
+        self.failed = {}
+
+    def update(self, other):
+        """
+        Add results of another report to this one
+        :param other: ImageReport object
+        """
+        self.downloaded += other.downloaded
+        self.cached += other.cached
+        self.failed.update(other.failed)
+
+    def as_dict(self):
+        return {'downloaded': self.downloaded, 'cached': self.cached, 'failed': self.failed}
+
+    def __str__(self):
+        return f'{len(self.downloaded)} images downloaded, {len(self.cached)} already cached, ' \
+               f'{len(self.failed)} failed'
+
+
+class ImageLoader:
+    """
+    Bounded pool of threads downloading images. Every thread keeps one keep-alive connection per host,
+    so images from the same CDN reuse the connection instead of new TCP / TLS handshake for every image.
+    Every download has a timeout and is retried with exponential backoff on network errors and temporary
+    server errors. Images are deduplicated by url: cached images, images being downloaded by the pool and
+    images failed during this run are not downloaded again. Downloaded images are put into ImageStore.
+    Results of all the downloads are collected in "report"
+    """
+
+    def __init__(self, store=None, workers=IMAGE_WORKERS, timeout=IMAGE_TIMEOUT, retries=IMAGE_RETRIES,
+                 backoff=IMAGE_RETRY_BACKOFF):
+        self.store = store or get_image_store()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ImageLoader')
+        self.local = threading.local()
+        self.lock = threading.RLock()
+        self.in_progress = {}
+        self.connections = []
+        self.report = ImageReport()
+
+    def download(self, image_urls):
+        """
+        Download images to the image store and wait for them
+        :param image_urls: iterable of images' urls
+        :return: ImageReport object
+        """
+        report = ImageReport()
+        futures = {}
+        with self.lock:
+            for image_url in dict.fromkeys(image_urls):
+                if image_url in self.in_progress:
+                    futures[image_url] = self.in_progress[image_url]
+                elif self.store.find(image_url):
+                    report.cached.append(image_url)
+                elif image_url in self.report.failed:
+                    report.failed[image_url] = self.report.failed[image_url]
+                else:
+                    future = self.executor.submit(self._download, image_url)
+                    future.add_done_callback(lambda _, url=image_url: self._done(url))
+                    futures[image_url] = self.in_progress[image_url] = future
+        if futures:
+            logger.info(f'Waiting for {len(futures)} images to download')
+            with perf_stats.timer('image download'):
+                wait(futures.values())
+        for image_url, future in futures.items():
+            error = future.exception()
+            if error:
+                logger.error(f'Something went wrong with image downloading. Image\'s url: "{image_url}". '
+                             f'Error Msg: {error}')
+                report.failed[image_url] = str(error)
+            else:
+                report.downloaded.append(image_url)
+        with self.lock:
+            self.report.update(report)
+        if futures or report.cached:
+            self.store.save()
+        perf_stats.count('images downloaded', len(report.downloaded))
+        perf_stats.count('images cached before', len(report.cached))
+        perf_stats.count('images failed', len(report.failed))
+        logger.info(f'OK. {report}')
+        return report
+
+    def _done(self, image_url):
+        with self.lock:
+            self.in_progress.pop(image_url, None)
+
+    def _download(self, image_url):
+        for attempt in range(self.retries + 1):
+            try:
+                content, content_type = self._fetch(image_url)
+                break
+            except (OSError, HTTPException, ImageDownloadError) as e:
+                retriable = not isinstance(e, ImageDownloadError) or e.status in RETRY_STATUSES
+                if not retriable or attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning('Retrying image "%s" in %ss. Error Msg: %s', image_url, delay, e)
+                time.sleep(delay)
+        self.store.add(image_url, content, content_type)
+
+    def _fetch(self, image_url):
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(image_url)
+            if parts.scheme not in ('http', 'https'):
+                raise ImageDownloadError(None, f'Unsupported image url "{image_url}"')
+            path = parts.path or '/'
+            if parts.query:
+                path += f'?{parts.query}'
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', path, headers={'User-Agent': 'RSSReader', 'Connection': 'keep-alive'})
+                response = connection.getresponse()
+                content = response.read()
+            except (OSError, HTTPException):
+                # Keep-alive connection could be closed by the server meanwhile, a new one is opened on retry
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                image_url = urljoin(image_url, response.getheader('Location'))
+                continue
+            if response.status >= 400:
+                raise ImageDownloadError(response.status, f'HTTP Error {response.status}: {response.reason}')
+            return content, response.getheader('Content-Type')
+        raise ImageDownloadError(None, 'Too many redirects')
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self.local, 'connections', None)
+        if connections is None:
+            connections = self.local.connections = {}
+        connection = connections.get((scheme, netloc))
+        if connection is None:
+            connection_class = HTTPSConnection if scheme == 'https' else HTTPConnection
+            connection = connections[(scheme, netloc)] = connection_class(netloc, timeout=self.timeout)
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def close(self):
+        self.executor.shutdown()
+        for connection in self.connections:
+            connection.close()
+
+
+_image_loader = None
+
+
+def get_image_loader():
+    """
+    :return: ImageLoader shared by the whole program run, so connections are reused across feeds
+    """
+    global _image_loader
+    if _image_loader is None:
+        _image_loader = ImageLoader()
+    return _image_loader
@@ -0,0 +1,244 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+
+from feed_cacher.cache_storage import file_lock, read_json, write_file_atomic, write_json_atomic
+from settings.settings import CACHE_IMGS_PATH, IMAGE_CACHE_MAX_SIZE, IMAGE_THUMBNAIL_SIZE
+
+logger = logging.getLogger('RSSReader.image_store')
+
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'BM', '.bmp'),
+)
+CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+    'image/avif': '.avif',
+}
+# Files of the store folder not in the index are deleted as orphans if they are older than this number of seconds,
+# younger ones can be written by another process at the moment
+ORPHAN_FILE_AGE = 60 * 60
+
+
+def image_extension(content, content_type=None):
+    """
+    Function to find out the real image's format by its first bytes, or by its HTTP Content-Type
+    :param content: image bytes
+    :param content_type: value of Content-Type header of the image's response
+    :return: file extension of the image
+    """
+    for signature, extension in IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return extension
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return '.webp'
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    return CONTENT_TYPES.get(content_type, '.img')
+
+
+class ImageStore:
+    """
+    Content-addressed store of the cached images. Every image is stored once under the hash of its bytes with its real
+    extension, however many urls, items and feeds refer to it. Downscaled thumbnail is generated once when Pillow
+    is installed. When total size of the store exceeds "max_size", least recently used images are evicted.
+    Index file keeps urls' images and images' sizes and last use time:
+    {"urls": {url: hash}, "images": {hash: {name, thumbnail, size, used}}}
+    """
+    INDEX_NAME = 'images_index.json'
+    THUMBNAILS_DIR_NAME = 'thumbnails'
+
+    def __init__(self, path=CACHE_IMGS_PATH, max_size=IMAGE_CACHE_MAX_SIZE, thumbnail_size=IMAGE_THUMBNAIL_SIZE):
+        self.path = path
+        self.index_path = path / self.INDEX_NAME
+        self.thumbnails_path = path / self.THUMBNAILS_DIR_NAME
+        self.max_size = max_size
+        self.thumbnail_size = thumbnail_size
+        self.lock = threading.RLock()
+        self.index = read_json(self.index_path, {'urls': {}, 'images': {}})
+
+    def find(self, image_url):
+        """
+        Find cached image of the url and mark it as recently used
+        :param image_url: url of the image
+        :return: dictionary with image's information. None if image is not cached
+        """
+        with self.lock:
+            image = self.index['images'].get(self.index['urls'].get(image_url))
+            if image and (self.path / image['name']).exists():
+                image['used'] = time.time()
+                return image
+            return None
+
+    def add(self, image_url, content, content_type=None):
+        """
+        Store image's bytes, unless the same image is stored already, and create its thumbnail
+        :param image_url: url of the image
+        :param content: image bytes
+        :param content_type: value of Content-Type header of the image's response
+        :return: dictionary with image's information
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        with self.lock:
+            image = self.index['images'].get(digest)
+        if image is None or not (self.path / image['name']).exists():
+            self.path.mkdir(parents=True, exist_ok=True)
+            image = {'name': f'{digest}{image_extension(content, content_type)}', 'thumbnail': None,
+                     'size': len(content)}
+            write_file_atomic(self.path / image['name'], content)
+            thumbnail = self.create_thumbnail(content, digest)
+            if thumbnail:
+                image['thumbnail'] = thumbnail.name
+                image['size'] += thumbnail.stat().st_size
+        else:
+            logger.info('Image "%s" is already stored as %s', image_url, image['name'])
+        with self.lock:
+            image['used'] = time.time()
+            self.index['images'][digest] = image
+            self.index['urls'][image_url] = digest
+        return image
+
+    def create_thumbnail(self, content, digest):
+        """
+        Create downscaled JPEG copy of the image, if Pillow is installed and the image is larger than thumbnail size
+        :param content: image bytes
+        :param digest: hash of the image bytes
+        :return: path to the thumbnail. None if thumbnail is not created
+        """
+        try:
+            from PIL import Image
+        except ImportError:
+            return None
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                if image.width <= self.thumbnail_size[0] and image.height <= self.thumbnail_size[1]:
+                    return None
+                image.draft('RGB', self.thumbnail_size)
+                image.thumbnail(self.thumbnail_size)
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+                self.thumbnails_path.mkdir(parents=True, exist_ok=True)
+                thumbnail_path = self.thumbnails_path / f'{digest}.jpg'
+                buffer = io.BytesIO()
+                image.save(buffer, 'JPEG', quality=80, optimize=True)
+                write_file_atomic(thumbnail_path, buffer.getvalue())
+                return thumbnail_path
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning(f'Thumbnail is not created. Error Msg: {e}')
+            return None
+
+    def resolve(self, image_url):
+        """
+        :param image_url: url of the image
+        :return: path to the image's thumbnail if it exists, otherwise to the image, relative to the store folder.
+        None if image is not cached
+        """
+        with self.lock:
+            image = self.index['images'].get(self.index['urls'].get(image_url))
+        if image is None:
+            return None
+        if image['thumbnail']:
+            return f'{self.THUMBNAILS_DIR_NAME}/{image["thumbnail"]}'
+        return image['name']
+
+    def save(self):
+        """
+        Merge the index with the changes of other processes, evict least recently used images if the store is
+        larger than "max_size" and write the index
+        """
+        with file_lock(self.index_path), self.lock:
+            self.merge_index()
+            self.evict()
+            write_json_atomic(self.index_path, self.index)
+
+    def merge_index(self):
+        """
+        Merge the index with the one written by other processes. Called under the index file lock
+        """
+        stored_index = read_json(self.index_path, {'urls': {}, 'images': {}})
+        for digest, image in stored_index['images'].items():
+            if digest not in self.index['images'] or self.index['images'][digest]['used'] < image['used']:
+                self.index['images'][digest] = image
+        self.index['urls'] = {**stored_index['urls'], **self.index['urls']}
+
+    def remove_orphans(self, image_urls):
+        """
+        Delete the images which none of the cached items refers to anymore, and the files left in the store folder
+        which are not in the index, e.g. by an interrupted download
+        :param image_urls: set of the images' urls of all the cached items
+        :return: tuple of the number and of the total size in bytes of the deleted files
+        """
+        removed = 0
+        removed_size = 0
+        with file_lock(self.index_path), self.lock:
+            self.merge_index()
+            self.index['urls'] = {url: digest for url, digest in self.index['urls'].items() if url in image_urls}
+            used_digests = set(self.index['urls'].values())
+            for digest in [digest for digest in self.index['images'] if digest not in used_digests]:
+                image = self.index['images'].pop(digest)
+                paths = [self.path / image['name']]
+                if image['thumbnail']:
+                    paths.append(self.thumbnails_path / image['thumbnail'])
+                for path in paths:
+                    if path.exists():
+                        removed_size += path.stat().st_size
+                        path.unlink()
+                removed += 1
+            names = {image['name'] for image in self.index['images'].values()}
+            thumbnails = {image['thumbnail'] for image in self.index['images'].values() if image['thumbnail']}
+            old_time = time.time() - ORPHAN_FILE_AGE
+            for folder, known_names in ((self.path, names), (self.thumbnails_path, thumbnails)):
+                if not folder.is_dir():
+                    continue
+                for path in folder.iterdir():
+                    if path.is_file() and path.name not in known_names and not path.name.startswith('.') \
+                            and path.name != self.INDEX_NAME and not path.name.endswith('.lock') \
+                            and path.stat().st_mtime < old_time:
+                        removed_size += path.stat().st_size
+                        path.unlink()
+                        removed += 1
+            write_json_atomic(self.index_path, self.index)
+        logger.info(f'OK. {removed} orphaned images are deleted')
+        return removed, removed_size
+
+    def evict(self):
+        """
+        Delete least recently used images until total size of the store is not larger than "max_size"
+        """
+        images = self.index['images']
+        total_size = sum(image['size'] for image in images.values())
+        if total_size <= self.max_size:
+            return
+        evicted = set()
+        for digest, image in sorted(images.items(), key=lambda pair: pair[1]['used']):
+            if total_size <= self.max_size:
+                break
+            (self.path / image['name']).unlink(missing_ok=True)
+            if image['thumbnail']:
+                (self.thumbnails_path / image['thumbnail']).unlink(missing_ok=True)
+            total_size -= image['size']
+            evicted.add(digest)
+            del images[digest]
+        self.index['urls'] = {url: digest for url, digest in self.index['urls'].items() if digest not in evicted}
+        logger.info(f'OK. {len(evicted)} least recently used images are evicted')
+
+
+_image_store = None
+
+
+def get_image_store():
+    """
+    :return: ImageStore shared by the whole program run
+    """
+    global _image_store
+    if _image_store is None:
+        _image_store = ImageStore()
+    return _image_store
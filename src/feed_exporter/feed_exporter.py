@@ -0,0 +1,221 @@
+"""
+Batch export of the cached items for analytics: one table of the items of all the feeds in Parquet or Arrow file
+if "pyarrow" is installed, otherwise in CSV or JSON Lines file. Items are read from the cache storage and written
+in chunks, so the memory doesn't depend on the number of the items. Every export writes a new file with the items
+cached after the previous export, the watermark of the exported items is kept next to the files
+"""
+import csv
+from importlib.util import find_spec
+from itertools import islice
+import json
+import logging
+import os
+from pathlib import Path
+import sys
+import time
+import uuid
+
+from feed_cacher.cache_storage import file_lock, open_cache_storage, read_json, write_json_atomic
+from perf_stats.perf_stats import perf_stats
+from settings.settings import EXPORT_CHUNK_ITEMS, EXPORT_FORMATS, EXPORT_PATH
+
+logger = logging.getLogger('RSSReader.feed_exporter')
+
+# Columns of the exported table. "day" is the UTC day the item is cached by, "timestamp" is UTC timestamp
+# of the item's date
+EXPORT_COLUMNS = ('netloc', 'day', 'title', 'date', 'timestamp', 'link', 'description', 'img')
+WATERMARKS_NAME = 'export_watermarks.json'
+
+
+def item_row(netloc, day, item):
+    """
+    :param netloc: netloc of the item's feed
+    :param day: date in "YYYYMMDD" format the item is cached by
+    :param item: FeedItem object
+    :return: tuple with values of EXPORT_COLUMNS. Missing values are None
+    """
+    title, date, link, description, img = item.to_row()
+    return netloc, day if day != 'None' else None, title, date, item.timestamp, link, description, img
+
+
+def arrow_schema():
+    import pyarrow
+
+    return pyarrow.schema([(column, pyarrow.float64() if column == 'timestamp' else pyarrow.string())
+                           for column in EXPORT_COLUMNS])
+
+
+def arrow_batch(schema, rows):
+    """
+    :param schema: pyarrow Schema of EXPORT_COLUMNS
+    :param rows: array of tuples with values of EXPORT_COLUMNS
+    :return: pyarrow RecordBatch of the rows
+    """
+    import pyarrow
+
+    return pyarrow.record_batch([pyarrow.array(column, type=field.type) for column, field in zip(zip(*rows), schema)],
+                                schema=schema)
+
+
+class ParquetExportWriter:
+    """Parquet file writer, every chunk of the items is one row group"""
+
+    def __init__(self, path):
+        import pyarrow.parquet
+
+        self.schema = arrow_schema()
+        self.writer = pyarrow.parquet.ParquetWriter(str(path), self.schema)
+
+    def write(self, rows):
+        import pyarrow
+
+        self.writer.write_table(pyarrow.Table.from_batches([arrow_batch(self.schema, rows)]))
+
+    def close(self):
+        self.writer.close()
+
+
+class ArrowExportWriter:
+    """Arrow IPC file writer, every chunk of the items is one record batch"""
+
+    def __init__(self, path):
+        import pyarrow.ipc
+
+        self.schema = arrow_schema()
+        self.writer = pyarrow.ipc.new_file(str(path), self.schema)
+
+    def write(self, rows):
+        self.writer.write_batch(arrow_batch(self.schema, rows))
+
+    def close(self):
+        self.writer.close()
+
+
+class CsvExportWriter:
+    """CSV file writer with the header of EXPORT_COLUMNS. Missing values are empty"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesExportWriter:
+    """JSON Lines file writer, one json object per item"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, rows):
+        self.file.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+# Writers by the export format: writer class, suffix of the exported files, and the modules the format requires
+EXPORT_WRITERS = {
+    'parquet': (ParquetExportWriter, '.parquet', ('pyarrow',)),
+    'arrow': (ArrowExportWriter, '.arrow', ('pyarrow',)),
+    'csv': (CsvExportWriter, '.csv', ()),
+    'jsonl': (JsonLinesExportWriter, '.jsonl', ()),
+}
+
+
+def is_available(export_format):
+    """
+    Function to find whether the packages of the export format are installed. They are looked for, but not imported
+    :param export_format: one of EXPORT_WRITERS keys
+    :return: True if the format can be written
+    """
+    return all(find_spec(module) for module in EXPORT_WRITERS[export_format][2])
+
+
+def default_export_format(formats=EXPORT_FORMATS):
+    """
+    :param formats: export formats in the order of preference
+    :return: the first of the formats which can be written. "jsonl" if none of them can
+    """
+    return next((export_format for export_format in formats if is_available(export_format)), 'jsonl')
+
+
+def chunks(iterable, size):
+    """
+    Generator of the arrays of "size" consecutive elements of the iterable, the last one can be shorter
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_cached_items(export_format=None, full=False, storage=None, export_path=EXPORT_PATH,
+                        chunk_items=EXPORT_CHUNK_ITEMS):
+    """
+    Function to export the items cached after the previous export into a new file of the export folder.
+    The file is written under a temporary name and renamed when it is complete, and the watermark is stored only
+    after that, so an interrupted export is repeated by the next one. The file is removed if the watermark
+    can't be stored. Watermarks are kept per cache storage, exports of different storages don't affect each other
+    :param export_format: one of EXPORT_WRITERS keys. None - the default one, see default_export_format()
+    :param full: export all the cached items instead of the ones cached after the previous export
+    :param storage: CacheStorage object to export items from. None - storage from the settings
+    :param export_path: path to the folder of the exported files
+    :param chunk_items: number of items converted and written at once
+    :return: tuple with the path to the exported file and the number of items exported. Path is None if there
+    are no items to export
+    """
+    if storage is None:
+        with open_cache_storage() as storage:
+            return export_cached_items(export_format, full, storage, export_path, chunk_items)
+    export_format = export_format or default_export_format()
+    writer_class, suffix, _ = EXPORT_WRITERS[export_format]
+    export_path.mkdir(parents=True, exist_ok=True)
+    watermarks_path = export_path / WATERMARKS_NAME
+    storage_key = str(Path(storage.path).resolve())
+    # Concurrent exports wait for each other, so they don't export the same items twice
+    with file_lock(watermarks_path):
+        watermarks = read_json(watermarks_path, {})
+        after = None if full else watermarks.get(storage_key)
+        until = storage.added_watermark()
+        target_path = export_path / f'items_{time.strftime("%Y%m%d_%H%M%S")}_{uuid.uuid4().hex[:8]}{suffix}'
+        temp_path = target_path.with_name(f'.{target_path.name}')
+        logger.info(f'Exporting {"all" if after is None else "new"} cached items into {target_path.name}')
+        items_number = 0
+        try:
+            with perf_stats.timer('export'):
+                writer = writer_class(temp_path)
+                try:
+                    for chunk in chunks(storage.iter_added(after, until), chunk_items):
+                        writer.write([item_row(*added_item) for added_item in chunk])
+                        items_number += len(chunk)
+                        logger.info('%d items are exported', items_number)
+                finally:
+                    writer.close()
+            if items_number:
+                os.replace(temp_path, target_path)
+            else:
+                temp_path.unlink()
+                target_path = None
+            watermarks[storage_key] = until
+            write_json_atomic(watermarks_path, watermarks)
+        except Exception as e:
+            # Exported file without the watermark stored would be exported again by the next export
+            temp_path.unlink(missing_ok=True)
+            if target_path is not None:
+                target_path.unlink(missing_ok=True)
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            file_name = '/'.join(Path(__file__).parts[-2:])
+            logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                         f'Function: export_cached_items')
+            raise
+    perf_stats.count('exported items', items_number)
+    logger.info(f'OK. {items_number} cached items are exported')
+    return target_path, items_number
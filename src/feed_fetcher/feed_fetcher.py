@@ -0,0 +1,85 @@
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
+from urllib.parse import urlparse
+
+from rss_parser.rss_parser import parse_rss_feed
+from settings.settings import FETCH_WORKERS, FETCH_PER_HOST, FETCH_TIMEOUT, PARSER_BACKEND
+
+logger = logging.getLogger('RSSReader.feed_fetcher')
+
+FeedResult = namedtuple('FeedResult', ['url', 'feed', 'error'])
+
+
+def read_feeds_file(path):
+    """
+    Function to read list of feed urls from the text file. One url per line, empty lines and lines
+    starting with "#" are skipped
+    :param path: path to the file with feed urls
+    :return: array of feed urls
+    """
+    logger.info(f'Reading feed urls from {path}')
+    with open(path, encoding='utf-8') as fr:
+        urls = [line.strip() for line in fr if line.strip() and not line.strip().startswith('#')]
+    logger.info(f'OK. {len(urls)} feed urls read')
+    return urls
+
+
+def _group_by_host(urls):
+    """
+    Function to split feed urls into queues by host, dropping duplicated urls
+    :param urls: array of feed urls
+    :return: dictionary with host as a key and queue of its urls as a value
+    """
+    hosts = {}
+    for url in dict.fromkeys(urls):
+        hosts.setdefault(urlparse(url).netloc, deque()).append(url)
+    return hosts
+
+
+def fetch_feeds(urls, limit, workers=FETCH_WORKERS, per_host=FETCH_PER_HOST, timeout=FETCH_TIMEOUT,
+                validators=None, backend=PARSER_BACKEND, connections=None):
+    """
+    Generator that fetches and parses many RSS feeds concurrently in the pool of threads.
+    Not more than "workers" feeds are fetched at the same time and not more than "per_host" of them from one host.
+    Feeds of a busy host wait in the queue without occupying a thread, so one slow host doesn't stall the others
+    :param urls: array of feed urls
+    :param limit: integer number of feed items to limit
+    :param workers: maximum number of feeds fetched at the same time
+    :param per_host: maximum number of feeds fetched at the same time from one host
+    :param timeout: number of seconds to wait for each server response
+    :param validators: dictionary with feed url as a key and dictionary with HTTP validators of its previous
+    response as a value, see connect_to_url(). Validators of the fetched feeds are updated in place
+    :param backend: feed parser backend, see parse_rss_feed()
+    :param connections: ConnectionPool object to fetch the feeds through its keep-alive connections. None - every
+    feed is fetched through a new connection
+    :return: yields FeedResult for every url as soon as it is fetched. "feed" is None if fetching failed
+    or feed is not modified, "error" is None if it succeeded
+    """
+    pending = _group_by_host(urls)
+    in_flight = dict.fromkeys(pending, 0)
+    running = {}
+    logger.info(f'Fetching {sum(map(len, pending.values()))} feeds from {len(pending)} hosts')
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for netloc in list(pending):
+                queue = pending[netloc]
+                while queue and in_flight[netloc] < per_host and len(running) < workers:
+                    url = queue.popleft()
+                    url_validators = validators.setdefault(url, {}) if validators is not None else None
+                    running[executor.submit(parse_rss_feed, url, limit, timeout, url_validators, backend,
+                                                   connections)] = url
+                    in_flight[netloc] += 1
+                if not queue:
+                    del pending[netloc]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = running.pop(future)
+                in_flight[urlparse(url).netloc] -= 1
+                error = future.exception()
+                if error:
+                    logger.error(f'Failed to fetch {url}. Error Msg: {error}')
+                    yield FeedResult(url, None, error)
+                else:
+                    yield FeedResult(url, future.result(), None)
+    logger.info('OK. Feeds fetched')
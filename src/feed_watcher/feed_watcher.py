@@ -0,0 +1,158 @@
+import heapq
+import logging
+import time
+
+from feed_cacher.feed_cacher import cache_feed, compact_cache, compaction_summary, is_feed_limited, \
+    load_http_validators, store_http_validators
+from feed_fetcher.feed_fetcher import fetch_feeds
+from rss_parser.connection_pool import ConnectionPool
+from settings.settings import FETCH_WORKERS, FETCH_PER_HOST, FETCH_TIMEOUT, PARSER_BACKEND, WATCH_INTERVAL, \
+    WATCH_MAX_INTERVAL, CACHE_COMPACT_INTERVAL
+
+logger = logging.getLogger('RSSReader.feed_watcher')
+
+
+class FeedSchedule:
+    """Polling state of one feed"""
+
+    def __init__(self, url, interval):
+        self.url = url
+        self.interval = interval
+        self.next_poll = 0
+        self.ttl = None
+        self.skip_hours = []
+        self.unchanged = 0
+        self.errors = 0
+
+    def reschedule(self, now, base_interval, max_interval):
+        """
+        Calculate the time of the next poll. The interval is doubled for every poll in a row which failed
+        or found no new items, it is not shorter than feed's <ttl>, and hours of feed's <skipHours> are skipped
+        :param now: time of the poll in seconds since the epoch
+        :param base_interval: interval between polls of the feed which has new items, seconds
+        :param max_interval: maximum interval between polls, seconds
+        """
+        backoff = max(self.unchanged, self.errors)
+        self.interval = min(base_interval * 2 ** backoff, max_interval)
+        if self.ttl:
+            self.interval = max(self.interval, self.ttl * 60)
+        next_poll = now + self.interval
+        for _ in range(24):
+            if time.gmtime(next_poll).tm_hour not in self.skip_hours:
+                break
+            next_poll = (next_poll // 3600 + 1) * 3600
+        self.next_poll = next_poll
+
+
+class FeedWatcher:
+    """
+    Long-running poller of many feeds. Every feed is polled on its own schedule, see FeedSchedule.reschedule().
+    Feeds due at the same time are fetched concurrently by fetch_feeds(). The cache storage, HTTP validators,
+    keep-alive connections to the feeds' hosts and the image loader with its connections stay open between polls,
+    and polls are always conditional.
+    The cache is compacted after the first round and then once per "compact_interval", see compact_cache()
+    """
+
+    def __init__(self, urls, storage, limit=None, interval=WATCH_INTERVAL, max_interval=WATCH_MAX_INTERVAL,
+                 workers=FETCH_WORKERS, per_host=FETCH_PER_HOST, timeout=FETCH_TIMEOUT, backend=PARSER_BACKEND,
+                 retention=None, compact_interval=CACHE_COMPACT_INTERVAL):
+        """
+        :param urls: array of feed urls
+        :param storage: CacheStorage object to cache feeds to
+        :param limit: integer number of feed items to limit
+        :param interval: interval between polls of the feed which has new items, seconds
+        :param max_interval: maximum interval between polls of the feed which has no new items or fails, seconds
+        :param workers: maximum number of feeds fetched at the same time
+        :param per_host: maximum number of feeds fetched at the same time from one host
+        :param timeout: number of seconds to wait for each server response
+        :param backend: feed parser backend, see parse_rss_feed()
+        :param retention: dictionary with "max_age", "max_feed_items" and "max_size" arguments of compact_cache().
+        None - no retention limits, the cache is still compacted
+        :param compact_interval: interval between compactions of the cache, seconds. None - never compacted
+        """
+        self.storage = storage
+        self.limit = limit
+        self.interval = interval
+        self.max_interval = max(max_interval, interval)
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.backend = backend
+        self.schedules = {url: FeedSchedule(url, interval) for url in dict.fromkeys(urls)}
+        self.validators = load_http_validators()
+        self.connections = ConnectionPool(timeout)
+        self.queue = [(0, url) for url in self.schedules]
+        self.retention = retention or {}
+        self.compact_interval = compact_interval
+        self.next_compaction = 0
+
+    def poll(self, urls):
+        """
+        Fetch and cache the feeds once and schedule their next polls
+        :param urls: array of feed urls
+        :return: number of new items cached
+        """
+        request_validators = {url: dict(self.validators.get(url, {})) for url in urls}
+        cached_validators = {}
+        new_items = 0
+        for url, feed, error in fetch_feeds(urls, self.limit, self.workers, self.per_host, self.timeout,
+                                            request_validators, self.backend, self.connections):
+            schedule = self.schedules[url]
+            if error:
+                schedule.errors += 1
+            elif feed is None:
+                schedule.errors = 0
+                schedule.unchanged += 1
+            else:
+                schedule.ttl = feed.ttl
+                schedule.skip_hours = feed.skip_hours
+                try:
+                    feed_new_items = cache_feed(url, feed, self.storage)
+                except Exception as e:
+                    # Validators of the feed are not stored, so the next poll fetches it again in full
+                    logger.error(f'Failed to cache {url}. Error Msg: {e}')
+                    schedule.errors += 1
+                else:
+                    schedule.errors = 0
+                    schedule.unchanged = 0 if feed_new_items else schedule.unchanged + 1
+                    # Validators of the feed cut short by the limit are used by this watcher only, which polls
+                    # with the same limit, see is_feed_limited()
+                    self.validators[url] = request_validators[url]
+                    if not is_feed_limited(feed, self.limit):
+                        cached_validators[url] = request_validators[url]
+                    new_items += feed_new_items
+                    logger.info(f'{url}: {feed_new_items} new items')
+            schedule.reschedule(time.time(), self.interval, self.max_interval)
+            heapq.heappush(self.queue, (schedule.next_poll, url))
+            logger.info(f'Next poll of {url} in {schedule.interval}s')
+        store_http_validators(cached_validators)
+        return new_items
+
+    def run(self, polls=None):
+        """
+        Poll feeds when they are due until interrupted
+        :param polls: number of polling rounds to stop after. None - run until interrupted
+        """
+        logger.info(f'Watching {len(self.schedules)} feeds')
+        rounds = 0
+        try:
+            while polls is None or rounds < polls:
+                now = time.time()
+                if self.queue[0][0] > now:
+                    time.sleep(min(self.queue[0][0] - now, 60))
+                    continue
+                # Feeds due within a second are polled together
+                due = []
+                while self.queue and self.queue[0][0] <= now + 1:
+                    due.append(heapq.heappop(self.queue)[1])
+                new_items = self.poll(due)
+                rounds += 1
+                print(f'{time.strftime("%Y-%m-%d %H:%M:%S")} Polled {len(due)} feeds, {new_items} new items cached')
+                if self.compact_interval is not None and time.time() >= self.next_compaction:
+                    stats = compact_cache(self.storage, **self.retention)
+                    self.next_compaction = time.time() + self.compact_interval
+                    print(f'{time.strftime("%Y-%m-%d %H:%M:%S")} Compacted the cache: {compaction_summary(stats)}')
+        except KeyboardInterrupt:
+            logger.info('Watching is stopped')
+        finally:
+            self.connections.close()
@@ -1,15 +1,19 @@
+from concurrent.futures import ProcessPoolExecutor
 import hashlib
+from itertools import islice
 import logging
+import os
 import shutil
 import sys
 from pathlib import Path
+import time
 import uuid
 
-import jinja2.exceptions
-from jinja2 import Environment, FileSystemLoader
-from xhtml2pdf import pisa
-
-from settings.settings import CACHE_DIR_PATH, CACHE_IMGS_PATH, FORMAT_TARGET_PATH, TEMPLATES_LOCATION
+from feed_cacher.image_store import get_image_store
+from perf_stats.perf_stats import perf_stats
+from rss_parser.feed_model import Feed
+from settings.settings import CACHE_DIR_PATH, CACHE_IMGS_PATH, CACHE_PDF_CHUNKS_PATH, CACHE_TEMPLATES_PATH, \
+    FORMAT_TARGET_PATH, HTML_WRITE_BUFFER, PDF_CHUNK_ITEMS, PDF_CHUNKS_MAX_AGE, PDF_WORKERS, TEMPLATES_LOCATION
 
 logger = logging.getLogger('RSSReader.converter')
 
@@ -18,38 +22,134 @@ def get_cached_image(item):
     """
     Jinja custom template filter to get images for item that were cached from rss feed
     :param item: RSS feed item
-    :return: path to item's cached image
+    :return: path to item's cached image thumbnail, or to the image if it has no thumbnail.
+    Image's url if image is not cached
     """
-    item_hash = hashlib.md5(bytes(item['title'], 'UTF-8')).hexdigest()
-    image_path = f'../{CACHE_DIR_PATH.name}/{CACHE_IMGS_PATH.name}/{item_hash}.jpg'
+    if item.img is None:
+        return None
+    cached_image = get_image_store().resolve(item.img)
+    if cached_image is None:
+        return item.img
+    image_path = f'../{CACHE_DIR_PATH.name}/{CACHE_IMGS_PATH.name}/{cached_image}'
     return image_path
 
 
+_environment = None
+
+
+def get_jinja_environment():
+    """
+    :return: Jinja Environment shared by the whole program run, so the template is compiled once per run.
+    Compiled templates are also kept on disk, and the next runs load them instead of compiling the template again
+    """
+    global _environment
+    if _environment is None:
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+        logger.debug('Creating Jinja Environment')
+        CACHE_TEMPLATES_PATH.mkdir(parents=True, exist_ok=True)
+        _environment = Environment(loader=FileSystemLoader(TEMPLATES_LOCATION),
+                                   bytecode_cache=FileSystemBytecodeCache(str(CACHE_TEMPLATES_PATH)))
+        _environment.filters["get_cached_image"] = get_cached_image
+        logger.debug('OK. Jinja Environment created')
+    return _environment
+
+
 def setup_jinja():
     """
     Function to setup Jinja html templatizer
     :return: Jinja template object
     """
-    logger.debug('Creating Jinja Environment')
-    environment = Environment(loader=FileSystemLoader(TEMPLATES_LOCATION))
-    environment.filters["get_cached_image"] = get_cached_image
-    html_template = environment.get_template('html_template.html')
-    logger.debug('OK. Jinja Environment created')
-    return html_template
+    return get_jinja_environment().get_template('html_template.html')
 
 
-def convert_to_html(feeds):
+def html_pages(feeds, page_items):
+    """
+    Generator of the pages of the feeds, which are read only while the page is filled
+    :param feeds: iterable of Feed objects. Their items can be iterators
+    :param page_items: number of items of every page, the last page can have less
+    :return: tuples of array of Feed objects with the items of the page and True if it is the last page
+    """
+    page = []
+    page_size = 0
+    for feed in feeds:
+        page_feed = None
+        for item in feed.items:
+            if page_size == page_items:
+                yield page, False
+                page = []
+                page_size = 0
+                page_feed = None
+            if page_feed is None:
+                page_feed = Feed(feed.title, feed.description, feed.link, [], feed.ttl, feed.skip_hours)
+                page.append(page_feed)
+            page_feed.items.append(item)
+            page_size += 1
+    yield page, True
+
+
+def page_file_name(file_name, page_number):
+    """
+    :return: name of the html file of the page, the first page has the name of the whole file
+    """
+    return file_name if page_number == 1 else f'{Path(file_name).stem}_{page_number}.html'
+
+
+def page_links(file_name, page_number, is_last):
+    """
+    :return: html of the links to the previous and the next pages
+    """
+    previous_link = f'<a href="{page_file_name(file_name, page_number - 1)}">Previous page</a> ' \
+        if page_number > 1 else ''
+    next_link = f' <a href="{page_file_name(file_name, page_number + 1)}">Next page</a>' if not is_last else ''
+    return f'<nav class="pages">{previous_link}Page {page_number}{next_link}</nav>'
+
+
+def add_links(chunks, links):
+    """
+    Generator of the rendered html chunks with the links inserted before the end of the document's body
+    :param chunks: iterable of strings
+    :param links: html of the links
+    """
+    for chunk in chunks:
+        if links and '</body>' in chunk:
+            chunk = chunk.replace('</body>', f'{links}</body>', 1)
+            links = None
+        yield chunk
+    if links:
+        yield links
+
+
+def write_html(template, feeds, target_path, links=None):
+    """
+    Function to render the template into the file chunk by chunk while it is rendered, so the whole document is never
+    kept in memory
+    :param template: Jinja template object
+    :param feeds: iterable of Feed objects. Their items can be iterators
+    :param target_path: path to the html file
+    :param links: html of the links to the other pages. None - the document is not paginated
+    """
+    with open(target_path, 'w', encoding='utf-8', buffering=HTML_WRITE_BUFFER) as file, \
+            perf_stats.timer('render html'):
+        file.writelines(add_links(template.generate(feeds=feeds), links))
+
+
+def convert_to_html(feeds, page_items=None):
     """
     Function that accepts list of RSS feed,
     formats information to html file
-    :param feeds: array of feed
+    :param feeds: array or iterator of feed. Items of the feeds can be iterators, e.g. read from the cache while
+    converted, see CacheStorage.iter_feeds()
+    :param page_items: number of items of every html file, the files are linked to each other. None - one file
     """
+    import jinja2.exceptions
+
     logger.info('Creating RSS feed in HTML format')
     html_file_name = f"rss_feed_{str(uuid.uuid4())[:6]}.html"
     try:
         if not FORMAT_TARGET_PATH.exists():
             logger.info('Creating directory for HTML files')
-            FORMAT_TARGET_PATH.mkdir()
+            FORMAT_TARGET_PATH.mkdir(parents=True)
             logger.info('OK. Directory for HTML files is created')
         html_template_files_path = FORMAT_TARGET_PATH / 'html_template_files'
         if not html_template_files_path.exists():
@@ -64,9 +164,14 @@ def convert_to_html(feeds):
         target_path = FORMAT_TARGET_PATH / html_file_name
         logger.info(f'Writing file to {target_path}')
         template = setup_jinja()
-        with open(target_path, 'w+', encoding='utf-8') as file:
-            file.write(template.render(feeds=feeds))
-        logger.info('OK. HTML file created')
+        if page_items is None:
+            write_html(template, feeds, target_path)
+            logger.info('OK. HTML file created')
+        else:
+            for page_number, (page, is_last) in enumerate(html_pages(feeds, page_items), 1):
+                write_html(template, page, FORMAT_TARGET_PATH / page_file_name(html_file_name, page_number),
+                           page_links(html_file_name, page_number, is_last))
+            logger.info(f'OK. {page_number} linked HTML files created')
         print(f'HTML file path: {target_path}')
     except TypeError:
         logger.error("Not valid path or input data.")
@@ -86,6 +191,149 @@ def convert_to_html(feeds):
         raise
 
 
+def pdf_chunks(feeds, chunk_items=PDF_CHUNK_ITEMS):
+    """
+    Generator of the parts of the feeds converted into separate PDF documents: at most "chunk_items" consecutive
+    items of one feed, in the order of the feed
+    :param feeds: iterable of Feed objects. Their items can be iterators
+    :param chunk_items: maximum number of items of one part
+    :return: yields tuples of Feed object with the items of the part and True if it continues the previous part
+    of the same feed, so the feed's header is not rendered again
+    """
+    for feed in feeds:
+        items = iter(feed.items)
+        continued = False
+        while True:
+            part_items = list(islice(items, chunk_items))
+            if continued and not part_items:
+                break
+            yield Feed(feed.title, feed.description, feed.link, part_items, feed.ttl, feed.skip_hours), continued
+            continued = True
+
+
+def render_pdf_chunk(source_html_text, chunk_path):
+    """
+    Function to convert html text into pdf file. It is run by the worker processes. The file is written atomically,
+    so the file of a failed or interrupted conversion is never reused
+    :param source_html_text: html text
+    :param chunk_path: path to the pdf file
+    :exception: raises ValueError if xhtml2pdf fails to convert the html
+    :return: path to the pdf file
+    """
+    from xhtml2pdf import pisa
+
+    temp_path = chunk_path.with_name(f'{chunk_path.name}.{os.getpid()}.tmp')
+    try:
+        with open(temp_path, "w+b") as target:
+            result = pisa.CreatePDF(source_html_text, dest=target, encoding='utf-8')
+        if result.err:
+            raise ValueError(f'{result.err} errors converting html into {chunk_path.name}')
+        os.replace(temp_path, chunk_path)
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        file_name = '/'.join(Path(__file__).parts[-2:])
+        logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                     f'Function: render_pdf_chunk')
+        raise
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return chunk_path
+
+
+def merge_pdfs(paths, target_path):
+    """
+    Function to merge pdf files into one
+    :param paths: array of paths to pdf files, in the order of their pages in the merged file
+    :param target_path: path to the merged pdf file
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        # xhtml2pdf before 0.2.8 depends on PyPDF3 instead of pypdf
+        from PyPDF3 import PdfFileMerger as PdfWriter
+
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(str(path))
+    with open(target_path, "w+b") as target:
+        writer.write(target)
+    writer.close()
+
+
+def remove_old_chunks(chunks_path, max_age=PDF_CHUNKS_MAX_AGE):
+    """
+    Function to remove rendered pdf chunks which were not used by the conversions for "max_age" days
+    :param chunks_path: path to the folder with pdf chunks
+    :param max_age: number of days
+    """
+    expired = time.time() - max_age * 24 * 60 * 60
+    for chunk_path in chunks_path.glob('*.pdf'):
+        try:
+            if chunk_path.stat().st_mtime < expired:
+                chunk_path.unlink()
+        except FileNotFoundError:
+            # Removed by the concurrent conversion
+            pass
+
+
+def render_pdf(feeds, target_path, template, chunks_path=CACHE_PDF_CHUNKS_PATH, workers=PDF_WORKERS):
+    """
+    Function to convert feeds into pdf file by parts: every "PDF_CHUNK_ITEMS" consecutive items of the feed are
+    rendered into html and converted into separate pdf chunk in the pool of processes, and the chunks are merged.
+    Chunks are named by the hash of their html, so the chunks which are not changed since the previous conversions
+    are not converted again. The template gets "continued" variable, true for the chunks continuing the previous one
+    of the same feed, which don't repeat the feed's header
+    :param feeds: array of Feed objects
+    :param target_path: path to the pdf file
+    :param template: Jinja template object
+    :param chunks_path: path to the folder with pdf chunks
+    :param workers: maximum number of processes converting chunks at the same time
+    :return: tuple of numbers of converted chunks and of all the chunks
+    """
+    # Imported before the workers are forked, so they don't import it again
+    from xhtml2pdf import pisa  # noqa: F401
+
+    chunks_path.mkdir(parents=True, exist_ok=True)
+    chunk_paths = []
+    converted = set()
+    futures = []
+    executor = None
+    try:
+        for chunk, continued in pdf_chunks(feeds):
+            source_html_text = template.render(feeds=[chunk], continued=continued)
+            chunk_path = chunks_path / f'{hashlib.sha256(source_html_text.encode("utf-8")).hexdigest()}.pdf'
+            chunk_paths.append(chunk_path)
+            if chunk_path.exists() or chunk_path in converted:
+                continue
+            converted.add(chunk_path)
+            if workers > 1:
+                if executor is None:
+                    executor = ProcessPoolExecutor(workers)
+                # Chunks are converted while the next ones are rendered
+                futures.append(executor.submit(render_pdf_chunk, source_html_text, chunk_path))
+            else:
+                render_pdf_chunk(source_html_text, chunk_path)
+        # Failed conversion of a chunk fails the whole file instead of merging the chunks without it
+        for future in futures:
+            future.result()
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        file_name = '/'.join(Path(__file__).parts[-2:])
+        logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                     f'Function: render_pdf')
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    logger.info(f'{len(converted)} of {len(chunk_paths)} PDF chunks are converted, '
+                f'the others are not changed since the previous conversions')
+    merge_pdfs(chunk_paths, target_path)
+    for chunk_path in set(chunk_paths):
+        os.utime(chunk_path)
+    remove_old_chunks(chunks_path)
+    return len(converted), len(chunk_paths)
+
+
 def convert_to_pdf(feeds):
     """
     Function that accepts list of RSS feed,
@@ -99,9 +347,10 @@ def convert_to_pdf(feeds):
     try:
         logger.info(f'Writing file to {target_path}')
         template = setup_jinja()
-        source_html_text = template.render(feeds=feeds)
-        with open(target_path, "w+b") as target:
-            pisa.CreatePDF(source_html_text, dest=target, encoding='utf-8')
+        with perf_stats.timer('render pdf'):
+            converted, chunks = render_pdf(feeds, target_path, template)
+        perf_stats.count('pdf chunks converted', converted)
+        perf_stats.count('pdf chunks reused', chunks - converted)
         logger.info('OK. PDF file created')
         print(f'PDF file path: {target_path}')
     except FileNotFoundError:
@@ -0,0 +1,105 @@
+"""Per-stage timers and counters of the program run, collected only if they are requested by "--stats" option"""
+from contextlib import contextmanager
+import json
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger('RSSReader.perf_stats')
+
+
+class PerfStats:
+    """
+    Timers and counters of the program's stages: fetch, parse, date normalization, cache, image download and render.
+    Stages run by several threads at the same time, e.g. fetching of many feeds, have their times summed, so they
+    can be longer than the whole run. Nothing is collected until the stats are enabled, so disabled stats cost
+    one attribute check per stage
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def enable(self):
+        self.enabled = True
+        self.started = time.perf_counter()
+
+    def add_time(self, stage, seconds, calls=1):
+        """
+        :param stage: name of the stage
+        :param seconds: time spent in the stage
+        :param calls: number of the stage's runs the time is spent by
+        """
+        with self.lock:
+            stage_stats = self.stages.setdefault(stage, [0, 0.0])
+            stage_stats[0] += calls
+            stage_stats[1] += seconds
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Context manager adding the time of its block to the stage
+        :param stage: name of the stage
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def count(self, counter, number=1):
+        """
+        :param counter: name of the counter
+        :param number: number to add to the counter
+        """
+        if self.enabled:
+            with self.lock:
+                self.counters[counter] = self.counters.get(counter, 0) + number
+
+    def as_dict(self):
+        """
+        :return: dictionary with the run's wall time, calls and seconds of every stage and the counters
+        """
+        from rss_parser.date_parser import parse_date
+
+        with self.lock:
+            date_cache = parse_date.cache_info()
+            return {
+                'wall_seconds': round(time.perf_counter() - self.started, 6),
+                'stages': {stage: {'calls': calls, 'seconds': round(seconds, 6)}
+                           for stage, (calls, seconds) in self.stages.items()},
+                'counters': {**self.counters, 'date cache hits': date_cache.hits,
+                             'date cache misses': date_cache.misses},
+            }
+
+    def write_summary(self, stream=None):
+        """
+        Method to write the stats as a readable table
+        :param stream: text stream to write to. None - stderr, so the summary doesn't mix with the printed feeds
+        """
+        stats = self.as_dict()
+        stream = stream or sys.stderr
+        stream.write(f'Run took {stats["wall_seconds"]:.3f}s\n{"stage":<20} {"calls":>8} {"seconds":>10}\n')
+        for stage, stage_stats in stats['stages'].items():
+            stream.write(f'{stage:<20} {stage_stats["calls"]:>8} {stage_stats["seconds"]:>10.3f}\n')
+        for counter, number in stats['counters'].items():
+            stream.write(f'{counter:<20} {number:>8}\n')
+
+    def write_json(self, path):
+        """
+        :param path: path to the json file
+        """
+        logger.info(f'Writing performance stats to {path}')
+        with open(path, 'w', encoding='utf-8') as fw:
+            json.dump(self.as_dict(), fw, indent=2)
+        logger.info('OK. Performance stats are written')
+
+
+perf_stats = PerfStats()
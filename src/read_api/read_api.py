@@ -0,0 +1,337 @@
+"""
+Local HTTP read API over the feeds cache for the programs which would otherwise run "rss_reader --date ... --json"
+for every query. Worker threads keep their cache storages open between requests, and the responses are cached
+in memory until the cache is changed, so the clients get them without reading the cache again.
+Every response has an ETag, and the requests with the matching "If-None-Match" get "304 Not Modified"
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import mimetypes
+from pathlib import Path
+import re
+import sys
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from exceptions.custom_exceptions import ArgumentError
+from feed_cacher.cache_storage import open_cache_storage, utc_day
+from feed_cacher.feed_cacher import group_feeds, latest_cached_items, merge_cached_range
+from perf_stats.perf_stats import perf_stats
+from settings.settings import API_LATEST_LIMIT, API_RESPONSE_CACHE_SIZE, API_WORKERS, CACHE_BACKEND, \
+    CACHE_COMPRESSION, CACHE_DIR_PATH, CACHE_IMGS_PATH, SEARCH_LIMIT, TEMPLATES_LOCATION
+
+logger = logging.getLogger('RSSReader.read_api')
+
+DATE_PATTERN = re.compile(r'\d{8}(-\d{8})?')
+JSON_TYPE = 'application/json; charset=utf-8'
+HTML_TYPE = 'text/html; charset=utf-8'
+# Static files referred to by the HTML pages: url prefix and the folder of the files. Cached images are referred to
+# relatively to the page, see get_cached_image()
+STATIC_FOLDERS = {
+    '/html_template_files/': TEMPLATES_LOCATION / 'html_template_files',
+    f'/{CACHE_DIR_PATH.name}/{CACHE_IMGS_PATH.name}/': CACHE_IMGS_PATH,
+}
+
+
+def query_value(query, name, pattern=None):
+    """
+    :param query: dictionary of the query parameters, see parse_qs()
+    :param name: name of the parameter
+    :param pattern: compiled regular expression the value should match. None - any value
+    :exception: raises ArgumentError if the value doesn't match the pattern
+    :return: the last value of the parameter. None if it is not provided
+    """
+    values = query.get(name)
+    if not values:
+        return None
+    if pattern is not None and not pattern.fullmatch(values[-1]):
+        raise ArgumentError(f'"{name}" parameter is not in the correct format')
+    return values[-1]
+
+
+def query_number(query, name, default=None):
+    """
+    :exception: raises ArgumentError if the value is not a positive integer
+    :return: the value of the parameter as an integer, "default" if it is not provided
+    """
+    value = query_value(query, name, re.compile(r'[1-9]\d*'))
+    return int(value) if value is not None else default
+
+
+def query_feeds(storage, query):
+    """
+    Function to read the feeds requested by the query parameters, the same as the command line arguments:
+    "date" - YYYYMMDD or YYYYMMDD-YYYYMMDD, "days" - number of the last days, "search" - search query,
+    "url" - feed url, can be repeated, "limit" - number of items
+    :param storage: CacheStorage object
+    :param query: dictionary of the query parameters, see parse_qs()
+    :exception: raises ArgumentError if the parameters are not correct
+    :return: array of Feed objects
+    """
+    date = query_value(query, 'date', DATE_PATTERN)
+    days = query_number(query, 'days')
+    search = query_value(query, 'search')
+    urls = query.get('url', [])
+    limit = query_number(query, 'limit')
+    if date and days:
+        raise ArgumentError('"days" parameter can\'t be used with "date"')
+    if date and date[:8] > date[-8:]:
+        raise ArgumentError('The range of dates in "date" parameter ends before it starts')
+    if days:
+        first_day, last_day = utc_day(days - 1), utc_day()
+    elif date:
+        first_day, last_day = date[:8], date[-8:]
+    else:
+        first_day = last_day = None
+    if search is not None:
+        if not re.search(r'\w', search):
+            raise ArgumentError('"search" parameter has no words to search')
+        netlocs = [urlparse(url).netloc for url in urls] or None
+        return group_feeds(storage, storage.search(search, netlocs, first_day, last_day, limit or SEARCH_LIMIT))
+    if first_day is None:
+        raise ArgumentError('One of "date", "days" or "search" parameters is required')
+    if first_day == last_day and not days:
+        return [feed for url in urls or [None]
+                for feed in storage.load_feeds(first_day, urlparse(url).netloc if url else None, limit)]
+    return merge_cached_range(first_day, last_day, urls, limit, storage)
+
+
+def feeds_json(feeds):
+    """
+    :param feeds: iterable of Feed objects
+    :return: json document of the array of the feeds, the same as "--json" prints for every feed
+    """
+    return json.dumps([feed.to_dict() for feed in feeds], ensure_ascii=False).encode('utf-8')
+
+
+def feeds_html(feeds):
+    """
+    :param feeds: iterable of Feed objects
+    :return: html document rendered by the template of convert_to_html()
+    """
+    from format_converter.converter import setup_jinja
+
+    with perf_stats.timer('render html'):
+        return ''.join(setup_jinja().generate(feeds=feeds)).encode('utf-8')
+
+
+class ResponseCache:
+    """Least recently used responses, bounded by their total size in bytes. Shared by the worker threads"""
+
+    def __init__(self, max_size=API_RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.responses = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            response = self.responses.get(key)
+            if response is not None:
+                self.responses.move_to_end(key)
+            return response
+
+    def put(self, key, response):
+        """
+        :param key: hashable key of the response
+        :param response: tuple of the body bytes, the content type and the ETag. Responses larger than a quarter
+        of the cache are not kept
+        """
+        if len(response[0]) > self.max_size // 4:
+            return
+        with self.lock:
+            if key in self.responses:
+                return
+            self.responses[key] = response
+            self.size += len(response[0])
+            while self.size > self.max_size:
+                _, (body, _, _) = self.responses.popitem(last=False)
+                self.size -= len(body)
+
+
+class ReadApi:
+    """
+    Queries of the read API. Every worker thread opens its own cache storage on its first request, SQLite connections
+    can't be shared between the threads. Storages re-read the cache only when it is changed, see
+    CacheStorage.version(), and the responses are cached by the version of the cache they are read from
+    """
+
+    def __init__(self, backend=CACHE_BACKEND, compression=CACHE_COMPRESSION, cache_size=API_RESPONSE_CACHE_SIZE):
+        """
+        :param backend: name of the cache storage backend, see open_cache_storage()
+        :param compression: compression of the cache storage, see open_cache_storage()
+        :param cache_size: maximum total size of the cached responses in bytes
+        """
+        self.backend = backend
+        self.compression = compression
+        self.responses = ResponseCache(cache_size)
+        self.local = threading.local()
+        self.routes = {
+            '/feeds': self.feeds,
+            '/items': lambda storage, query: (feeds_json(query_feeds(storage, query)), JSON_TYPE),
+            '/latest': self.latest,
+            '/html': lambda storage, query: (feeds_html(query_feeds(storage, query)), HTML_TYPE),
+        }
+
+    def storage(self):
+        """
+        :return: tuple of the worker thread's CacheStorage object and the version of the cache
+        """
+        if getattr(self.local, 'storage', None) is None:
+            logger.info(f'Opening "{self.backend}" cache storage for {threading.current_thread().name}')
+            self.local.storage = open_cache_storage(self.backend, self.compression)
+            self.local.version = None
+        version = self.local.storage.version()
+        if version != self.local.version:
+            self.local.storage.refresh()
+            self.local.version = version
+        return self.local.storage, version
+
+    @staticmethod
+    def feeds(storage, query):
+        feeds = [{'netloc': netloc, **(storage.feed_info(netloc) or {}), 'days': len(storage.days_index(netloc))}
+                 for netloc in storage.feed_netlocs()]
+        return json.dumps(feeds, ensure_ascii=False).encode('utf-8'), JSON_TYPE
+
+    @staticmethod
+    def latest(storage, query):
+        feeds = latest_cached_items(query.get('url', []), query_number(query, 'limit', API_LATEST_LIMIT), storage)
+        return feeds_json(feeds), JSON_TYPE
+
+    def respond(self, path, query_string):
+        """
+        :param path: path of the request's url
+        :param query_string: query of the request's url
+        :exception: raises ArgumentError if the query parameters are not correct, and KeyError if there is no such
+        route
+        :return: tuple of the body bytes, the content type and the ETag
+        """
+        route = self.routes[path]
+        storage, version = self.storage()
+        query = parse_qs(query_string)
+        key = (version, path, tuple(sorted((name, tuple(values)) for name, values in query.items())))
+        response = self.responses.get(key)
+        if response is not None:
+            perf_stats.count('api cached responses')
+            return response
+        with perf_stats.timer('api query'):
+            body, content_type = route(storage, query)
+        response = (body, content_type, f'"{hashlib.md5(body).hexdigest()}"')
+        self.responses.put(key, response)
+        return response
+
+
+def static_file(path):
+    """
+    :param path: path of the request's url
+    :return: path to the static file, see STATIC_FOLDERS. None if the url is not a static file's one
+    """
+    for prefix, folder in STATIC_FOLDERS.items():
+        if path.startswith(prefix):
+            file_path = (folder / path[len(prefix):]).resolve()
+            if file_path.is_relative_to(folder.resolve()) and file_path.is_file():
+                return file_path
+    return None
+
+
+class ReadApiHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of the read API: GET /feeds, /items, /latest and /html, and the static files of the html pages
+    """
+    server_version = 'RSSReaderAPI'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            file_path = static_file(url.path)
+            if file_path is not None:
+                stat = file_path.stat()
+                etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+                if self.headers.get('If-None-Match') == etag:
+                    return self.send_body(304, b'', None, etag)
+                content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+                return self.send_body(200, file_path.read_bytes(), content_type, etag)
+            if url.path not in self.server.api.routes:
+                return self.send_error_body(404, f'Not found: {url.path}')
+            body, content_type, etag = self.server.api.respond(url.path, url.query)
+            if self.headers.get('If-None-Match') == etag:
+                return self.send_body(304, b'', None, etag)
+            self.send_body(200, body, content_type, etag)
+        except ArgumentError as e:
+            self.send_error_body(400, str(e))
+        except Exception as e:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            file_name = '/'.join(Path(__file__).parts[-2:])
+            logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                         f'Function: do_GET')
+            self.send_error_body(500, f'{exc_type.__name__}: {e}')
+
+    def send_body(self, status, body, content_type, etag):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            # Clients revalidate the response on every request, the ETag makes it cheap
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_body(self, status, message):
+        self.send_body(status, json.dumps({'error': message}).encode('utf-8'), JSON_TYPE, None)
+
+    def log_message(self, message_format, *args):
+        logger.info('%s - ' + message_format, self.address_string(), *args)
+
+
+class ReadApiServer(ThreadingHTTPServer):
+    """
+    HTTP server handling the requests by a fixed pool of worker threads, so their cache storages stay open.
+    Every connection is closed after its response (HTTP/1.0), so idle clients don't hold the workers
+    """
+    # Connections waiting to be accepted, the clients connecting above it retry in a second
+    request_queue_size = 128
+
+    def __init__(self, address, api, workers=API_WORKERS):
+        """
+        :param address: tuple of the host and the port. Port 0 - any free port
+        :param api: ReadApi object
+        :param workers: number of worker threads
+        """
+        self.api = api
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='read_api')
+        super().__init__(address, ReadApiHandler)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def serve(host, port, backend=CACHE_BACKEND, compression=CACHE_COMPRESSION, workers=API_WORKERS):
+    """
+    Function to serve the read API until interrupted
+    :param host: address to listen on
+    :param port: port to listen on
+    :param backend: name of the cache storage backend, see open_cache_storage()
+    :param compression: compression of the cache storage, see open_cache_storage()
+    :param workers: number of worker threads
+    """
+    with ReadApiServer((host, port), ReadApi(backend, compression), workers) as server:
+        print(f'Serving the cache on {server.url}/ (feeds, items, latest, html). Press Ctrl+C to stop')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info('Read API is stopped')
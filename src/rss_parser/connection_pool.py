@@ -0,0 +1,135 @@
+"""
+Keep-alive HTTP connections to the feeds' hosts, kept between the polls of the feed watcher, so the feeds of the next
+rounds are fetched without a new TCP / TLS handshake
+"""
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+import logging
+import socket
+import threading
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger('RSSReader.connection_pool')
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+
+class PooledResponse:
+    """
+    File-like object reading the response of the pooled connection. When it is closed, the connection is returned
+    to the pool if the response is read to the end, otherwise the connection is closed
+    """
+
+    def __init__(self, pool, key, connection, response):
+        self.pool = pool
+        self.key = key
+        self.connection = connection
+        self.response = response
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def getcode(self):
+        return self.status
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self.response.read()
+        return self.response.read(size)
+
+    def close(self):
+        if self.connection is not None:
+            self.pool.release(self.key, self.connection, self.response)
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Idle keep-alive connections by the scheme and the host. Every connection serves one request at a time: it is taken
+    from the pool for the request and returned when its response is read to the end. Connection which was closed
+    by the server while it was idle is replaced with a new one
+    """
+
+    def __init__(self, timeout=None):
+        """
+        :param timeout: number of seconds to wait for each server response. None - wait without limit
+        """
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = {}
+
+    def acquire(self, key):
+        """
+        :param key: tuple of the scheme and the netloc
+        :return: tuple of the connection and True if it is an idle one, which could be closed by the server meanwhile
+        """
+        with self.lock:
+            if self.idle.get(key):
+                return self.idle[key].pop(), True
+        scheme, netloc = key
+        connection_class = HTTPSConnection if scheme == 'https' else HTTPConnection
+        return connection_class(netloc, timeout=self.timeout), False
+
+    def release(self, key, connection, response):
+        """
+        Return the connection to the pool if its response is read to the end and the server keeps it open,
+        otherwise close it
+        """
+        if response.length == 0:
+            # Body of "304 Not Modified" and the empty ones is not read by the caller
+            response.read()
+        if response.isclosed() and not response.will_close:
+            with self.lock:
+                self.idle.setdefault(key, []).append(connection)
+        else:
+            response.close()
+            connection.close()
+
+    def request(self, url, headers):
+        """
+        Send GET request through the pooled connection, following the redirects
+        :param url: url of the request
+        :param headers: dictionary with the request headers
+        :exception: raises ConnectionError if url is not http(s) or redirects too many times
+        :return: PooledResponse object
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https'):
+                raise ConnectionError(f'Unsupported url "{url}"')
+            path = parts.path or '/'
+            if parts.query:
+                path += f'?{parts.query}'
+            key = (parts.scheme, parts.netloc)
+            while True:
+                connection, idle = self.acquire(key)
+                try:
+                    connection.request('GET', path, headers={'User-Agent': 'RSSReader', **headers})
+                    response = connection.getresponse()
+                    break
+                except (OSError, HTTPException) as e:
+                    connection.close()
+                    # Slow server is not asked again
+                    if not idle or isinstance(e, socket.timeout):
+                        raise
+                    logger.info('Idle connection to "%s" is closed, opening a new one. Error Msg: %s', parts.netloc, e)
+            if response.status in REDIRECT_STATUSES and response.getheader('Location'):
+                response.read()
+                self.release(key, connection, response)
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            return PooledResponse(self, key, connection, response)
+        raise ConnectionError('Too many redirects')
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
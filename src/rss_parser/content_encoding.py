@@ -0,0 +1,135 @@
+"""
+HTTP content encodings of the feed responses: gzip and deflate, and brotli and zstd if their packages are installed.
+Compressed responses are decompressed while they are read by the parser, so the whole body is never kept in memory
+"""
+from functools import lru_cache
+from importlib.util import find_spec
+import logging
+import zlib
+
+from perf_stats.perf_stats import perf_stats
+from settings.settings import ACCEPT_ENCODINGS
+
+logger = logging.getLogger('RSSReader.content_encoding')
+
+# Number of compressed bytes read from the response at once
+READ_SIZE = 64 * 1024
+
+
+class DeflateDecompressor:
+    """
+    Decompressor of "deflate" encoding. It is zlib stream by the standard, but some servers send raw deflate data,
+    so the format is found by the first bytes
+    """
+
+    def __init__(self):
+        self.decompressor = None
+
+    def decompress(self, data):
+        if self.decompressor is None:
+            self.decompressor = zlib.decompressobj()
+            try:
+                return self.decompressor.decompress(data)
+            except zlib.error:
+                self.decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self.decompressor.decompress(data)
+
+
+class BrotliDecompressor:
+    """Decompressor of "br" encoding with "brotli" or "brotlicffi" package"""
+
+    def __init__(self):
+        try:
+            import brotli
+        except ImportError:
+            import brotlicffi as brotli
+        self.decompressor = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self.decompressor.process(data)
+
+
+def zstd_decompressor():
+    """
+    :return: decompressor of "zstd" encoding with "zstandard" package
+    """
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+# Decompressor factories by the content encoding, and the modules the encoding requires
+CONTENT_DECODERS = {
+    'gzip': (lambda: zlib.decompressobj(16 + zlib.MAX_WBITS), ()),
+    'x-gzip': (lambda: zlib.decompressobj(16 + zlib.MAX_WBITS), ()),
+    'deflate': (DeflateDecompressor, ()),
+    'br': (BrotliDecompressor, ('brotli', 'brotlicffi')),
+    'zstd': (zstd_decompressor, ('zstandard',)),
+}
+
+
+@lru_cache(maxsize=None)
+def accept_encoding(encodings=ACCEPT_ENCODINGS):
+    """
+    Function to find which of the encodings can be decompressed. Optional packages are looked for, but not imported
+    :param encodings: content encodings in the order of preference
+    :return: value of "Accept-Encoding" header
+    """
+    available = [
+        encoding for encoding in encodings
+        if encoding in CONTENT_DECODERS
+        and (not CONTENT_DECODERS[encoding][1] or any(find_spec(module) for module in CONTENT_DECODERS[encoding][1]))
+    ]
+    return ', '.join(available) or 'identity'
+
+
+class DecodedStream:
+    """File-like object reading the decompressed body of the response. Counts the bytes received and decoded"""
+
+    def __init__(self, stream, decompressor=None):
+        """
+        :param stream: file-like object with the response body, e.g. http response
+        :param decompressor: object with decompress(data) method. None - the body is not compressed
+        """
+        self.stream = stream
+        self.decompressor = decompressor
+        self.buffer = bytearray()
+        self.eof = False
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = None
+        if self.decompressor is None:
+            data = self.stream.read() if size is None else self.stream.read(size)
+            perf_stats.count('bytes on wire', len(data))
+            perf_stats.count('bytes decoded', len(data))
+            return data
+        while (size is None or len(self.buffer) < size) and not self.eof:
+            compressed = self.stream.read(READ_SIZE)
+            if not compressed:
+                self.eof = True
+                break
+            perf_stats.count('bytes on wire', len(compressed))
+            self.buffer += self.decompressor.decompress(compressed)
+        size = len(self.buffer) if size is None else min(size, len(self.buffer))
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        perf_stats.count('bytes decoded', len(data))
+        return data
+
+
+def decode_response(response):
+    """
+    Function to decompress the response body by its "Content-Encoding" header while it is read
+    :param response: http response
+    :exception: raises ConnectionError if the encoding is not supported
+    :return: file-like object reading the decompressed body
+    """
+    encoding = (response.headers.get('Content-Encoding') or 'identity').strip().lower()
+    if encoding == 'identity':
+        return DecodedStream(response)
+    if encoding not in CONTENT_DECODERS:
+        logger.error(f'Content encoding "{encoding}" is not supported')
+        raise ConnectionError(f'Content encoding "{encoding}" is not supported')
+    logger.info(f'Decompressing "{encoding}" response')
+    return DecodedStream(response, CONTENT_DECODERS[encoding][0]())
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+import logging
+import threading
+
+from perf_stats.perf_stats import perf_stats
+from settings.settings import DATE_CACHE_SIZE, DATE_SHAPES_CACHE_SIZE
+
+logger = logging.getLogger('RSSReader.date_parser')
+
+# Digits are replaced to get the shape of the date string, e.g. "Sat, 00 Apr 0000 00:00:00 GMT".
+# Dates of the same feed have the same shape, so the parser which succeeded once is tried first next time.
+# Shapes are kept in the order of their use, at most DATE_SHAPES_CACHE_SIZE of them
+_SHAPE_TABLE = str.maketrans('0123456789', '0000000000')
+_shape_parsers = {}
+_shape_parsers_lock = threading.Lock()
+
+
+def parse_rfc822_date(text):
+    """
+    :param text: date string in RFC 822 format of RSS <pubDate>, e.g. "Sat, 30 Apr 2022 19:42:08 GMT"
+    :return: datetime object
+    """
+    date = parsedate_to_datetime(text)
+    if date is None:
+        raise ValueError(f'Not RFC 822 date: "{text}"')
+    return date
+
+
+def parse_iso_date(text):
+    """
+    :param text: date string in RFC 3339 / ISO 8601 format, e.g. "2022-04-30T19:42:08Z"
+    :return: datetime object
+    """
+    return datetime.fromisoformat(text)
+
+
+def parse_fuzzy_date(text):
+    """
+    Slow fallback for the dates of other formats
+    :param text: date string
+    :return: datetime object
+    """
+    from dateutil.parser import parse, ParserError
+
+    try:
+        return parse(text)
+    except (ParserError, OverflowError) as e:
+        raise ValueError(str(e))
+
+
+DATE_PARSERS = (parse_rfc822_date, parse_iso_date, parse_fuzzy_date)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(text):
+    """
+    Function to parse date of the feed item. Fast RFC 822 and RFC 3339 parsers are tried before dateutil.
+    Results are memoized, as well as the parser which succeeded for the shape of the date string
+    :param text: date string
+    :return: datetime object. Date without timezone is considered UTC. None if date can't be parsed
+    """
+    if not perf_stats.enabled:
+        return normalize_date(text)
+    with perf_stats.timer('date normalization'):
+        return normalize_date(text)
+
+
+def remember_parser(shape, date_parser, max_size=DATE_SHAPES_CACHE_SIZE):
+    """
+    Function to remember the parser which succeeded for the shape of the date string. The least recently used shape
+    is forgotten when there are "max_size" of them
+    :param shape: date string with its digits replaced with "0"
+    :param date_parser: one of DATE_PARSERS
+    :param max_size: maximum number of remembered shapes
+    """
+    # Feeds are parsed by several threads at the same time
+    with _shape_parsers_lock:
+        _shape_parsers.pop(shape, None)
+        if len(_shape_parsers) >= max_size:
+            del _shape_parsers[next(iter(_shape_parsers))]
+        _shape_parsers[shape] = date_parser
+
+
+def normalize_date(text):
+    """
+    :param text: date string
+    :return: datetime object, see parse_date(). None if date can't be parsed
+    """
+    text = text.strip()
+    shape = text.translate(_SHAPE_TABLE)
+    known_parser = _shape_parsers.get(shape)
+    for date_parser in (known_parser, *DATE_PARSERS) if known_parser else DATE_PARSERS:
+        try:
+            date = date_parser(text)
+        except (TypeError, ValueError):
+            continue
+        remember_parser(shape, date_parser)
+        return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+    logger.warning('Date "%s" can\'t be parsed', text)
+    return None
+
@@ -0,0 +1,256 @@
+"""
+Formats of the feeds: RSS 2.0, RSS 1.0 (RDF) and Atom. The format is sniffed from the first bytes of the document,
+and its items are extracted from the parsed elements into FeedItem objects of the same shape for every format.
+New formats are registered in FEED_FORMATS by the local name of their root element
+"""
+import html
+import logging
+import re
+
+from rss_parser.date_parser import parse_date
+from rss_parser.feed_model import FeedItem
+
+logger = logging.getLogger('RSSReader.feed_formats')
+
+HTML_TAG_PATTERN = re.compile(r'<[^>]*>')
+MEDIA_NS = '{http://search.yahoo.com/mrss/}'
+MEDIA_CONTENT_TAG = f'{MEDIA_NS}content'
+RDF_NS = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}'
+RSS1_NS = '{http://purl.org/rss/1.0/}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+ATOM_LINK_TAG = f'{ATOM_NS}link'
+# Number of the first bytes of the document the format is sniffed by
+SNIFF_SIZE = 4096
+COMMENT_PATTERN = re.compile(rb'<!--.*?-->', re.DOTALL)
+# The first start tag of the document. XML declaration, processing instructions and doctype don't start with a letter
+ROOT_TAG_PATTERN = re.compile(rb'<(?:[A-Za-z_][\w.\-]*:)?([A-Za-z_][\w.\-]*)')
+
+
+def html_to_text(text):
+    """
+    Function to strip HTML tags and unescape HTML entities of the text without building a document tree
+    :param text: text with HTML markup
+    :return: plain text
+    """
+    return html.unescape(HTML_TAG_PATTERN.sub('', text))
+
+
+def first_children(element):
+    """
+    :param element: lxml element
+    :return: dictionary with the tag as a key and the first child element with this tag as a value
+    """
+    fields = {}
+    for child in element:
+        fields.setdefault(child.tag, child)
+    return fields
+
+
+def element_text(element):
+    """
+    :return: stripped text of the element. None if there is no element or it has no text
+    """
+    return element.text.strip() if element is not None and element.text else None
+
+
+def media_url(element, fields):
+    """
+    :param element: lxml element of the feed item
+    :param fields: first children of the item, see first_children()
+    :return: url of the item's media:content image. None if the item has no image
+    """
+    media = fields.get(MEDIA_CONTENT_TAG)
+    if media is None:
+        media = element.find(f'.//{MEDIA_CONTENT_TAG}')
+    return media.get('url') if media is not None else None
+
+
+class FeedFormat:
+    """
+    Base class of the feed formats. Items are the elements with "item_tag", feed's title, description, link and ttl
+    are the children of the element with "channel_tag" listed in "channel_tags"
+    """
+    name = None
+    item_tag = None
+    channel_tag = None
+    channel_tags = {}
+
+    def channel_value(self, element):
+        """
+        :param element: lxml element of the channel's field
+        :return: value of the field. None if the element doesn't provide it
+        """
+        return element.text
+
+    def item(self, element):
+        """
+        :param element: lxml element of the feed item
+        :return: FeedItem object
+        """
+        raise NotImplementedError
+
+
+class Rss2Format(FeedFormat):
+    name = 'RSS 2.0'
+    item_tag = 'item'
+    channel_tag = 'channel'
+    channel_tags = {'title': 'title', 'description': 'description', 'link': 'link', 'ttl': 'ttl'}
+
+    def item(self, element):
+        fields = first_children(element)
+        title = fields.get('title')
+        date = fields.get('pubDate')
+        description = fields.get('description')
+        return FeedItem(
+            title=html_to_text(title.text or '') if title is not None else None,
+            date=parse_date(date.text) if date is not None and date.text else None,
+            link=element_text(fields.get('link')),
+            description=html_to_text(description.text) if description is not None and description.text else None,
+            img=media_url(element, fields),
+            guid=element_text(fields.get('guid')),
+        )
+
+
+class Rss1Format(FeedFormat):
+    """RSS 1.0: RDF document with the items next to the channel, dates are in Dublin Core <dc:date>"""
+    name = 'RSS 1.0'
+    item_tag = f'{RSS1_NS}item'
+    channel_tag = f'{RSS1_NS}channel'
+    channel_tags = {f'{RSS1_NS}title': 'title', f'{RSS1_NS}description': 'description', f'{RSS1_NS}link': 'link'}
+
+    def item(self, element):
+        fields = first_children(element)
+        title = fields.get(f'{RSS1_NS}title')
+        date = fields.get(f'{DC_NS}date')
+        description = fields.get(f'{RSS1_NS}description')
+        return FeedItem(
+            title=html_to_text(title.text or '') if title is not None else None,
+            date=parse_date(date.text) if date is not None and date.text else None,
+            link=element_text(fields.get(f'{RSS1_NS}link')),
+            description=html_to_text(description.text) if description is not None and description.text else None,
+            img=media_url(element, fields),
+            guid=element.get(f'{RDF_NS}about'),
+        )
+
+
+class AtomFormat(FeedFormat):
+    """Atom: the feed element is the channel, links are in "href" attribute, texts can be plain, html or xhtml"""
+    name = 'Atom'
+    item_tag = f'{ATOM_NS}entry'
+    channel_tag = f'{ATOM_NS}feed'
+    channel_tags = {f'{ATOM_NS}title': 'title', f'{ATOM_NS}subtitle': 'description', ATOM_LINK_TAG: 'link'}
+
+    @staticmethod
+    def text(element):
+        """
+        :param element: lxml element of Atom text construct
+        :return: plain text of the element. None if there is no element
+        """
+        if element is None:
+            return None
+        text_type = element.get('type', 'text')
+        if text_type == 'xhtml':
+            return ''.join(element.itertext()).strip()
+        if text_type == 'html':
+            return html_to_text(element.text or '')
+        return element.text or ''
+
+    @staticmethod
+    def link(element):
+        """
+        :param element: lxml element of Atom link
+        :return: url of the link if it is the alternate version of the feed or the entry, None otherwise
+        """
+        return element.get('href') if element.get('rel', 'alternate') == 'alternate' else None
+
+    def channel_value(self, element):
+        if element.tag == ATOM_LINK_TAG:
+            return self.link(element)
+        return self.text(element)
+
+    def item(self, element):
+        # Links are read in the same pass as the other children, an entry can have several of them
+        fields = {}
+        link = None
+        image = None
+        for child in element:
+            tag = child.tag
+            if tag == ATOM_LINK_TAG:
+                link = link or self.link(child)
+                if child.get('rel') == 'enclosure' and child.get('type', '').startswith('image/'):
+                    image = image or child.get('href')
+            else:
+                fields.setdefault(tag, child)
+        thumbnail = fields.get(f'{MEDIA_NS}thumbnail')
+        date = fields.get(f'{ATOM_NS}published')
+        if date is None:
+            date = fields.get(f'{ATOM_NS}updated')
+        description = fields.get(f'{ATOM_NS}summary')
+        if description is None:
+            description = fields.get(f'{ATOM_NS}content')
+        return FeedItem(
+            title=self.text(fields.get(f'{ATOM_NS}title')),
+            date=parse_date(date.text) if date is not None and date.text else None,
+            link=link,
+            description=self.text(description) or None,
+            img=media_url(element, fields) or image or (thumbnail.get('url') if thumbnail is not None else None),
+            guid=element_text(fields.get(f'{ATOM_NS}id')),
+        )
+
+
+# Feed formats by the local name of the document's root element
+FEED_FORMATS = {
+    'rss': Rss2Format(),
+    'RDF': Rss1Format(),
+    'feed': AtomFormat(),
+}
+
+
+def root_format(tag):
+    """
+    :param tag: qualified tag of the document's root element, e.g. "{http://www.w3.org/2005/Atom}feed"
+    :return: FeedFormat object. None if the format is unknown
+    """
+    return FEED_FORMATS.get(tag.rpartition('}')[2])
+
+
+def sniff_format(prefix):
+    """
+    Function to find the format of the document by the name of its root element, without parsing the document
+    :param prefix: the first bytes of the document
+    :return: FeedFormat object. None if the format is unknown or the root element is not in the prefix
+    """
+    match = ROOT_TAG_PATTERN.search(COMMENT_PATTERN.sub(b'', prefix))
+    return FEED_FORMATS.get(match.group(1).decode('ascii')) if match else None
+
+
+class PrefixedStream:
+    """File-like object reading the bytes read from the stream already, and then the rest of the stream"""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data = self.prefix + self.stream.read()
+            self.prefix = b''
+            return data
+        data = self.prefix[:size]
+        self.prefix = self.prefix[size:]
+        return data
+
+
+def sniff_stream(stream):
+    """
+    Function to sniff the format of the document while it is read from the stream
+    :param stream: file-like object with the document, e.g. http response
+    :return: tuple of file-like object reading the whole document and FeedFormat object, None if it is not sniffed
+    """
+    prefix = stream.read(SNIFF_SIZE)
+    feed_format = sniff_format(prefix)
+    logger.info(f'Feed format: {feed_format.name if feed_format else "unknown"}')
+    return PrefixedStream(prefix, stream), feed_format
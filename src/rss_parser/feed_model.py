@@ -0,0 +1,183 @@
+"""Compact records of the parsed feeds and their items"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import re
+from typing import List, Optional
+
+from rss_parser.date_parser import parse_date
+
+# Placeholder of the missing values in the json cache and output of the previous versions
+EMPTY = 'Empty'
+# UTC offset of the stored date, see FeedItem.to_row(). Historical offsets have seconds too
+STORED_OFFSET_PATTERN = re.compile(r'([+-])(\d{2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?')
+
+
+def _value(value):
+    """
+    :param value: value from the json cache, output or database
+    :return: value itself. None if the value is missing
+    """
+    return None if value == EMPTY else value
+
+
+@lru_cache(maxsize=None)
+def _stored_timezone(offset):
+    """
+    :param offset: UTC offset of the stored date, e.g. "+03:00"
+    :return: timezone object with the offset. None if it is not an offset
+    """
+    match = STORED_OFFSET_PATTERN.fullmatch(offset)
+    if match is None:
+        return None
+    sign, hours, minutes, seconds = match.groups()
+    delta = timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds or 0))
+    return timezone(-delta if sign == '-' else delta)
+
+
+def _stored_date(date, timestamp):
+    """
+    Function to restore the date of the cached item. The date is built from its stored timestamp and UTC offset
+    without parsing, it is parsed only if the timestamp is not stored, e.g. by the previous versions
+    :param date: stored date string "YYYY-MM-DD HH:MM:SS[.ffffff]+HH:MM", see FeedItem.to_row()
+    :param timestamp: stored UTC timestamp of the date. None - timestamp is not stored
+    :return: datetime object. None if the item has no date
+    """
+    if not date:
+        return None
+    if timestamp is not None and len(date) > 19:
+        stored_timezone = _stored_timezone(date[26:] if date[19] == '.' else date[19:])
+        if stored_timezone is not None:
+            try:
+                return datetime.fromtimestamp(timestamp, stored_timezone)
+            except (OverflowError, OSError, ValueError):
+                # Dates out of the range of the platform's time functions, e.g. before 1970 on Windows
+                pass
+    return parse_date(date)
+
+
+@dataclass
+class FeedItem:
+    """
+    Item of the feed. Slotted record without instance dictionary, so millions of items loaded from the cache take
+    several times less memory than dictionaries. Missing values are None.
+    RSS <guid> is used only to tell the items apart while caching them, it is not cached and not printed
+    """
+    __slots__ = ('title', 'date', 'link', 'description', 'img', 'guid')
+    title: Optional[str]
+    date: Optional[datetime]
+    link: Optional[str]
+    description: Optional[str]
+    img: Optional[str]
+    guid: Optional[str]
+
+    # Fields of the cache and output
+    FIELDS = ('title', 'date', 'link', 'description', 'img')
+
+    @property
+    def timestamp(self):
+        """
+        :return: UTC timestamp of the item's date. None if the item has no date
+        """
+        return self.date.timestamp() if self.date else None
+
+    @property
+    def day(self):
+        """
+        :return: UTC day of the item's date in YYYYMMDD format, the item is cached by it. "None" if the item has
+        no date
+        """
+        return self.date.astimezone(timezone.utc).strftime('%Y%m%d') if self.date else 'None'
+
+    @classmethod
+    def from_dict(cls, item):
+        """
+        Create item from the dictionary of json cache or output, including the ones of the previous versions
+        with "Empty" instead of missing values
+        :param item: dictionary with item's fields and optionally the "timestamp" of the cache, see to_cache_dict()
+        :return: FeedItem object
+        """
+        return cls(_value(item.get('title')), _stored_date(_value(item.get('date')), item.get('timestamp')),
+                   _value(item.get('link')), _value(item.get('description')), _value(item.get('img')), None)
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Create item from the database row
+        :param row: tuple with values of FIELDS, date is a string, optionally followed by the timestamp
+        :return: FeedItem object
+        """
+        title, date, link, description, img = map(_value, row[:5])
+        return cls(title, _stored_date(date, row[5] if len(row) > 5 else None), link, description, img, None)
+
+    def to_row(self):
+        """
+        :return: tuple with values of FIELDS for the database, date is a string
+        """
+        return self.title, str(self.date) if self.date else None, self.link, self.description, self.img
+
+    def to_dict(self):
+        """
+        :return: dictionary for json output
+        """
+        return dict(zip(self.FIELDS, self.to_row()))
+
+    def to_cache_dict(self):
+        """
+        :return: dictionary for json cache. Timestamp of the date is added, so the date is not parsed when the item
+        is read from the cache, see from_dict()
+        """
+        item = self.to_dict()
+        if self.date:
+            item['timestamp'] = self.timestamp
+        return item
+
+
+@dataclass
+class Feed:
+    """
+    Parsed feed. Polling hints "ttl" (minutes) and "skip_hours" are set if the feed provides them.
+    Items of the feed read from the cache for printing can be an iterator, see CacheStorage.iter_feeds()
+    """
+    __slots__ = ('title', 'description', 'link', 'items', 'ttl', 'skip_hours')
+    title: Optional[str]
+    description: Optional[str]
+    link: Optional[str]
+    items: List[FeedItem]
+    ttl: Optional[int]
+    skip_hours: List[int]
+
+    INFO_FIELDS = ('title', 'description', 'link')
+
+    @classmethod
+    def from_dict(cls, feed, items=None):
+        """
+        Create feed from the dictionary of json cache or output
+        :param feed: dictionary with feed's fields
+        :param items: array of FeedItem objects. None - items are created from the dictionary's "items"
+        :return: Feed object
+        """
+        if items is None:
+            items = [FeedItem.from_dict(item) for item in feed.get('items', [])]
+        return cls(_value(feed.get('title')), _value(feed.get('description')), _value(feed.get('link')), items,
+                   feed.get('ttl'), feed.get('skip_hours') or [])
+
+    def info(self):
+        """
+        :return: dictionary with feed's title, description and link for the cache
+        """
+        return {key: getattr(self, key) for key in self.INFO_FIELDS}
+
+    def to_dict(self, with_items=True):
+        """
+        :param with_items: add dictionaries of the items
+        :return: dictionary for json output. Polling hints are added only if the feed provides them
+        """
+        feed = self.info()
+        if self.ttl is not None:
+            feed['ttl'] = self.ttl
+        if self.skip_hours:
+            feed['skip_hours'] = self.skip_hours
+        if with_items:
+            feed['items'] = [item.to_dict() for item in self.items]
+        return feed
@@ -0,0 +1,79 @@
+"""Writers of the feeds to the text stream, item by item, without building the whole output in memory"""
+import json
+import logging
+import sys
+
+from rss_parser.feed_model import EMPTY, FeedItem
+
+logger = logging.getLogger('RSSReader.feed_writer')
+
+
+def write_text_feed(feed, stream):
+    """
+    Function to write feed in the readable text format
+    :param feed: Feed object. Its items can be an iterator, they are consumed once
+    :param stream: text stream to write to
+    """
+    stream.write(f'Feed: {feed.title or EMPTY}\nDescription: {feed.description or EMPTY}\n'
+                 f'Feed Link: {feed.link or EMPTY}\n\n')
+    for i, item in enumerate(feed.items):
+        lines = ''.join(f'\t{key.title()}: {value or EMPTY}\n'
+                        for key, value in zip(FeedItem.FIELDS, item.to_row()))
+        stream.write(f'Item {i + 1}:\n{lines}\n')
+    stream.write('\n')
+
+
+ITEM_PREFIXES = tuple(f'      {json.dumps(key)}: ' for key in FeedItem.FIELDS)
+
+
+def _indent(text, spaces):
+    return text.replace('\n', '\n' + ' ' * spaces)
+
+
+def write_json_feed(feed, stream):
+    """
+    Function to write feed as JSON document, the same as json.dumps(feed.to_dict(), indent=2) does
+    :param feed: Feed object. Its items can be an iterator, they are consumed once
+    :param stream: text stream to write to
+    """
+    stream.write('{\n')
+    info = feed.to_dict(with_items=False)
+    for key, value in info.items():
+        stream.write(f'  {json.dumps(key)}: {_indent(json.dumps(value, indent=2), 2)},\n')
+    stream.write('  "items": [')
+    separator = '\n    '
+    for item in feed.items:
+        # Item's values are scalars, so they are encoded one by one with the fast encoder instead of the indenting one
+        fields = ',\n'.join(f'{prefix}{json.dumps(value)}' for prefix, value in zip(ITEM_PREFIXES, item.to_row()))
+        stream.write(f'{separator}{{\n{fields}\n    }}')
+        separator = ',\n    '
+    stream.write('\n  ]\n}\n' if separator != '\n    ' else ']\n}\n')
+
+
+def write_jsonl_feed(feed, stream):
+    """
+    Function to write feed in JSON Lines format: one JSON object per item with the feed's title and link in it
+    :param feed: Feed object. Its items can be an iterator, they are consumed once
+    :param stream: text stream to write to
+    """
+    for item in feed.items:
+        stream.write(json.dumps({'feed_title': feed.title, 'feed_link': feed.link, **item.to_dict()}) + '\n')
+
+
+FEED_WRITERS = {
+    'text': write_text_feed,
+    'json': write_json_feed,
+    'jsonl': write_jsonl_feed,
+}
+
+
+def write_feed(feed, output_format='text', stream=None):
+    """
+    Function to write feed to the stream in the output format
+    :param feed: Feed object
+    :param output_format: one of FEED_WRITERS keys
+    :param stream: text stream to write to. None - stdout
+    """
+    logger.info(f'Writing RSS feed as {output_format}')
+    FEED_WRITERS[output_format](feed, stream or sys.stdout)
+    logger.info('OK. RSS feed is written')
@@ -1,40 +1,83 @@
-import json
+import io
 import logging
 from pathlib import Path
 import re
 import sys
-from urllib.request import urlopen
-
-from bs4 import BeautifulSoup
-from dateutil import parser
 
 from exceptions.custom_exceptions import ArgumentError
+from perf_stats.perf_stats import perf_stats
+from rss_parser.content_encoding import accept_encoding, decode_response
+from rss_parser.date_parser import parse_date
+from rss_parser.feed_formats import FEED_FORMATS, html_to_text, root_format, sniff_stream
+from rss_parser.feed_model import Feed, FeedItem
+from rss_parser.feed_writer import write_feed, write_text_feed
+from settings.settings import PARSER_BACKEND
 
 logger = logging.getLogger('RSSReader.rss_parser')
 
 
-def connect_to_url(url):
+def connect_to_url(url, timeout=None, validators=None, connections=None):
     """
-    Function to check connection to provided url and return http response
+    Function to check connection to provided url and return http response.
+    If HTTP validators of the previous response are provided, the request is conditional and the server may answer
+    that feed is not modified. Compressed response is requested, see decode_response()
     :param url: url of website with feed xml data
+    :param timeout: number of seconds to wait for the server response. None - wait without limit
+    :param validators: dictionary with "etag" and "last_modified" of the previous response. It is updated in place
+    with validators of the new response
+    :param connections: ConnectionPool object to send the request through its keep-alive connections.
+    None - the request is sent by urllib.request.urlopen() through a new connection
     :exception: raises ConnectionError if url is invalid or unreachable
-    :return: response object returned from urllib.request.urlopen()
+    :return: response object returned from urllib.request.urlopen() or PooledResponse object. None if feed is not
+    modified
     """
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    request = Request(url, headers={'Accept-Encoding': accept_encoding()})
+    if validators is not None:
+        if validators.get('etag'):
+            request.add_header('If-None-Match', validators['etag'])
+        if validators.get('last_modified'):
+            request.add_header('If-Modified-Since', validators['last_modified'])
     try:
         logger.info(f'Checking connection to {url}')
-        response = urlopen(url)
+        if connections is not None:
+            response = connections.request(url, dict(request.header_items()))
+        else:
+            response = urlopen(request, timeout=timeout) if timeout else urlopen(request)
         status_code = response.getcode()
+        if status_code == 304:
+            response.close()
+            logger.info(f'OK. Feed is not modified since the last poll')
+            return None
         if 200 <= status_code < 400:
             logger.info(f'URL is valid. Status code: {status_code}')
         elif 400 <= status_code < 500:
+            response.close()
             logger.error(f'URL is invalid. Status code: {status_code}')
             raise ConnectionError(f'URL is invalid. Status code: {status_code}')
         elif 500 <= status_code < 600:
+            response.close()
             logger.error(f'Internal Server Error. Status code: {status_code}')
             raise ConnectionError(f'Internal Server Error. Status code: {status_code}')
+    except HTTPError as e:
+        if e.code == 304:
+            logger.info(f'OK. Feed is not modified since the last poll')
+            return None
+        logger.error(f'Something went wrong. Error Msg: {e}')
+        raise
     except Exception as e:
         logger.error(f'Something went wrong. Error Msg: {e}')
         raise
+    if validators is not None:
+        validators.clear()
+        validators.update({
+            key: value
+            for key, value in (('etag', response.headers.get('ETag')),
+                               ('last_modified', response.headers.get('Last-Modified')))
+            if value
+        })
     logger.info(f'OK. Connection checked')
     return response
 
@@ -45,6 +88,8 @@ def create_soup_parser(content):
     :param content: content got from http response
     :return: BeautifulSoup object if no errors
     """
+    from bs4 import BeautifulSoup
+
     logger.info(f'Checking if website contains RSS feed')
     soup = BeautifulSoup(content, "lxml-xml")
     if not soup.find('rss'):
@@ -54,99 +99,194 @@ def create_soup_parser(content):
     return soup
 
 
-def parse_rss_feed(url, limit):
+def parse_soup_feed(content, limit):
     """
-    Function that parses RSS feed from the url provided and creates dictionary with the key feed information
-    :param url: url of website with feed xml data
+    Function that parses the whole RSS document with BeautifulSoup and creates Feed object with the key feed
+    information
+    :param content: content got from http response
     :param limit: integer number of feed items to limit
-    :return: dictionary with feed data
+    :return: Feed object
     """
-    logger.info(f'Parsing RSS feed in {url}')
-    response = connect_to_url(url)
-    content = response.read()
+    from bs4 import BeautifulSoup
+
     soup = create_soup_parser(content)
     feed_items = []
     logger.info('Searching for RSS feed items')
     try:
         for item in soup.find_all('item', limit=limit):
-            item_dict = {
-                'title': BeautifulSoup(item.title.string, 'lxml').text,
-                'date': str(parser.parse(item.pubDate.string)) if item.pubDate else 'Empty',
-                'link': item.link.string if item.link else 'Empty',
-                'description': BeautifulSoup(item.description.string, 'lxml').text
-                                if item.description
-                                else 'Empty',
-                'img': item.find('media:content')['url'] if item.find('media:content') else 'Empty'
-            }
-            feed_items.append(item_dict)
+            feed_item = FeedItem(
+                title=BeautifulSoup(item.title.string, 'lxml').text,
+                date=parse_date(item.pubDate.string) if item.pubDate and item.pubDate.string else None,
+                link=item.link.string if item.link else None,
+                description=BeautifulSoup(item.description.string, 'lxml').text if item.description else None,
+                img=item.find('media:content')['url'] if item.find('media:content') else None,
+                guid=item.guid.string.strip() if item.guid and item.guid.string else None,
+            )
+            feed_items.append(feed_item)
         logger.info('OK. RSS feed items found')
-        logger.info('Creating RSS feed dictionary')
-        feed = {
-            'title': soup.title.string,
-            'description': BeautifulSoup(soup.description.string, 'lxml').text.strip('\n')
+        logger.info('Creating RSS feed object')
+        ttl, skip_hours = schedule_hints(soup.ttl.string if soup.ttl else None,
+                                         [hour.string for hour in soup.skipHours.find_all('hour')]
+                                         if soup.skipHours else [])
+        feed = Feed(
+            title=soup.title.string,
+            description=BeautifulSoup(soup.description.string, 'lxml').text.strip('\n')
             if soup.description.string
-            else 'Empty',
-            'link': soup.find('link', text=re.compile(r'\w+')).string,
-            'items': feed_items,
-        }
+            else None,
+            link=soup.find('link', text=re.compile(r'\w+')).string,
+            items=feed_items,
+            ttl=ttl,
+            skip_hours=skip_hours,
+        )
     except Exception as e:
         exc_type, exc_obj, exc_tb = sys.exc_info()
         file_name = '/'.join(Path(__file__).parts[-2:])
         logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
-                     f'Function: parse_rss_feed(url, limit)')
+                     f'Function: parse_soup_feed(content, limit)')
         raise
-    logger.info('OK. RSS feed dictionary created')
-    logger.info(f'OK. Parsed RSS feed')
+    logger.info('OK. RSS feed object created')
     return feed
 
 
-def feed_items_to_string(feed_items):
+def schedule_hints(ttl, skip_hours):
     """
-    Function that converts array of feed items to prettified string for output
-    :param feed_items: array of RSS feed items
-    :return: prettified string from feed items array
+    Function to collect feed's polling hints: RSS <ttl> and <skipHours> elements
+    :param ttl: text of <ttl> element, number of minutes the feed can be cached for
+    :param skip_hours: array of texts of <skipHours><hour> elements, hours in GMT the feed should not be polled
+    :return: tuple with ttl as integer number, None if not provided, and skip hours as sorted array of integers
     """
-    logger.info('Converting feed items array to string for printing')
-    items_string = ""
-    for i, item in enumerate(feed_items):
-        items_string += f"Item {i + 1}:\n"
-        for key, value in item.items():
-            items_string += f"\t{key.title()}: {value}\n"
-        items_string += '\n'
-    logger.info('OK. Feed items converted to string')
-    return items_string
+    hours = sorted({int(hour.strip()) for hour in skip_hours if hour and hour.strip().isdigit()})
+    return int(ttl.strip()) if ttl and ttl.strip().isdigit() else None, hours
 
 
-def feed_to_string(feed):
+def parse_stream_feed(stream, limit, feed_format=None):
+    """
+    Function that parses RSS, RDF or Atom document incrementally while it is read from the stream and creates Feed
+    object with the key feed information. Reading stops as soon as "limit" items are parsed, and parsed items are
+    dropped from the document tree, so memory usage doesn't depend on the document size
+    :param stream: file-like object with the document, e.g. http response
+    :param limit: integer number of feed items to limit
+    :param feed_format: FeedFormat object, see FEED_FORMATS. None - format is found by the document's root element
+    :return: Feed object
+    """
+    from lxml import etree
+
+    logger.info('Searching for RSS feed items')
+    root = None
+    channel = {}
+    skip_hours = []
+    feed_items = []
+    inside_item = False
+    try:
+        context = etree.iterparse(stream, events=('start', 'end'), recover=True, resolve_entities=False)
+        for event, element in context:
+            # lxml builds the tag string on every access, namespaced tags of RDF and Atom are long
+            tag = element.tag
+            if event == 'start':
+                if root is None:
+                    root = element
+                    feed_format = root_format(tag) if feed_format is None else feed_format
+                    if feed_format is None or root_format(tag) is not feed_format:
+                        logger.error(f'Website does not contain RSS, RDF or Atom feed')
+                        raise ArgumentError('Website does not contain RSS, RDF or Atom feed')
+                    logger.info(f'OK. Website checked. {feed_format.name} feed found')
+                inside_item = inside_item or tag == feed_format.item_tag
+                continue
+            if tag == feed_format.item_tag:
+                inside_item = False
+                feed_items.append(feed_format.item(element))
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+                if limit and len(feed_items) >= limit:
+                    break
+            elif not inside_item and tag in feed_format.channel_tags \
+                    and element.getparent() is not None and element.getparent().tag == feed_format.channel_tag:
+                value = feed_format.channel_value(element)
+                if value is not None:
+                    channel.setdefault(feed_format.channel_tags[tag], value)
+            elif tag == 'hour' and element.getparent() is not None \
+                    and element.getparent().tag == 'skipHours':
+                skip_hours.append(element.text)
+        logger.info('OK. RSS feed items found')
+        logger.info('Creating RSS feed object')
+        ttl, skip_hours = schedule_hints(channel.get('ttl'), skip_hours)
+        feed = Feed(
+            title=channel.get('title') or None,
+            description=html_to_text(channel['description']).strip('\n') if channel.get('description') else None,
+            link=channel['link'].strip() if channel.get('link') else None,
+            items=feed_items,
+            ttl=ttl,
+            skip_hours=skip_hours,
+        )
+    except ArgumentError:
+        raise
+    except Exception as e:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        file_name = '/'.join(Path(__file__).parts[-2:])
+        logger.error(f'{exc_type.__name__}: {e}. File: {file_name}. Line №: {exc_tb.tb_lineno}. '
+                     f'Function: parse_stream_feed(stream, limit, feed_format)')
+        raise
+    logger.info('OK. RSS feed object created')
+    return feed
+
+
+def parse_rss_feed(url, limit, timeout=None, validators=None, backend=PARSER_BACKEND, connections=None):
     """
-    Function that converts feed dictionary to prettified string for output
-    :param feed: RSS feed as python dictionary
-    :return: prettified string from feed dictionary
+    Function that parses RSS feed from the url provided and creates Feed object with the key feed information
+    :param url: url of website with feed xml data
+    :param limit: integer number of feed items to limit
+    :param timeout: number of seconds to wait for the server response. None - wait without limit
+    :param validators: dictionary with HTTP validators of the previous response, see connect_to_url()
+    :param backend: "stream" to parse the response incrementally with lxml, "soup" to parse the whole document
+    with BeautifulSoup. The format of the feed is sniffed from the first bytes of the response, and RDF and Atom feeds
+    are always parsed with lxml
+    :param connections: ConnectionPool object to fetch the feed through, see connect_to_url()
+    :return: Feed object. None if feed is not modified since the previous response
     """
-    logger.info('Converting feed dictionary to prettified string')
-    output_text = f"""Feed: {feed['title']}
-Description: {feed['description']}
-Feed Link: {feed['link']}
+    logger.info(f'Parsing RSS feed in {url}')
+    with perf_stats.timer('fetch'):
+        response = connect_to_url(url, timeout, validators, connections)
+    if response is None:
+        perf_stats.count('feeds not modified')
+        return None
+    # Stream parser reads the response body while parsing it, so its download and decompression time is a part of
+    # "parse" stage
+    with response, perf_stats.timer('parse'):
+        stream, feed_format = sniff_stream(decode_response(response))
+        if backend == 'soup' and feed_format in (None, FEED_FORMATS['rss']):
+            feed = parse_soup_feed(stream.read(), limit)
+        else:
+            feed = parse_stream_feed(stream, limit, feed_format)
+    perf_stats.count('feeds parsed')
+    perf_stats.count('items parsed', len(feed.items))
+    logger.info(f'OK. Parsed RSS feed')
+    return feed
 
-{feed_items_to_string(feed['items'])}"""
+
+def feed_to_string(feed):
+    """
+    Function that converts feed to prettified string for output
+    :param feed: Feed object
+    :return: prettified string from feed
+    """
+    logger.info('Converting feed to prettified string')
+    output = io.StringIO()
+    write_text_feed(feed, output)
     logger.info('OK. Feed converted to string')
-    return output_text
+    return output.getvalue()
 
 
-def print_feed(feed, as_json):
+def print_feed(feed, output_format='text'):
     """
-    Function that prints parsed RSS feed to console
-    :param feed: dictionary with parsed RSS feed to be printed
-    :param as_json: boolean parameter to define output as json or not
+    Function that prints parsed RSS feed to console item by item
+    :param feed: Feed object to be printed
+    :param output_format: "text", "json" or "jsonl", see FEED_WRITERS
     """
-    output_text = feed_to_string(feed)
     try:
-        if as_json:
-            logger.info('Printing RSS feed as JSON')
-            print(json.dumps(feed, indent=2, sort_keys=False))
-        else:
-            logger.info('Printing RSS feed as usual')
-            print(output_text)
+        logger.info(f'Printing RSS feed as {output_format}')
+        with perf_stats.timer('output'):
+            write_feed(feed, output_format)
     except Exception as e:
         exc_type, exc_obj, exc_tb = sys.exc_info()
         file_name = '/'.join(Path(__file__).parts[-2:])
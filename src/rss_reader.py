@@ -1,11 +1,17 @@
 import logging
 import sys
 
-from argument_parser.arg_parser import create_arg_parser, check_args, logger as arg_parser_logger
-from feed_cacher.feed_cacher import cache_feed, collect_cached_feeds, print_cached_feeds, logger as feed_cacher_logger
-from format_converter.converter import convert_to_html, convert_to_pdf, logger as converter_logger
-from rss_parser.rss_parser import parse_rss_feed, print_feed, logger as rss_parser_logger
-from settings.settings import LOGGER_LEVEL, SHRUG_EMOJI, logger as settings_logger
+from argument_parser.arg_parser import create_arg_parser, check_args, get_date_range, get_output_format, \
+    get_retention
+from feed_cacher.feed_cacher import cache_feed, collect_cached_range, compact_cache, compaction_summary, \
+    is_feed_limited, iter_cached_feeds, iter_cached_range, print_cached_feeds, search_cached_feeds, \
+    stream_cached_feeds, stream_cached_range, load_http_validators, store_http_validators
+from feed_cacher.cache_storage import migrate_json_cache, open_cache_storage
+from feed_cacher.dedup import get_duplicate_index
+from feed_fetcher.feed_fetcher import fetch_feeds, read_feeds_file
+from perf_stats.perf_stats import perf_stats
+from rss_parser.rss_parser import parse_rss_feed, print_feed
+from settings.settings import LOGGER_LEVEL, SHRUG_EMOJI, CACHE_FILE_PATH, SEARCH_LIMIT, create_root_path
 
 main_logger = logging.getLogger('RSSReader')
 main_logger.setLevel(LOGGER_LEVEL)
@@ -15,7 +21,77 @@ logger_formatter = logging.Formatter('%(asctime)s - "%(name)s" - %(levelname)s:
 logger_handler.setFormatter(logger_formatter)
 main_logger.addHandler(logger_handler)
 
-_loggers = [main_logger, arg_parser_logger, converter_logger, feed_cacher_logger, rss_parser_logger, settings_logger]
+# Loggers of the modules are got by their names, so the modules imported only by the options which need them
+# are not imported at startup
+_loggers = [main_logger, *(logging.getLogger(f'RSSReader.{name}') for name in (
+    'arg_parser', 'cache_storage', 'connection_pool', 'content_encoding', 'converter', 'date_parser', 'dedup',
+    'feed_cacher', 'feed_exporter', 'feed_fetcher', 'feed_formats', 'feed_watcher', 'feed_writer', 'image_loader',
+    'image_store', 'perf_stats', 'read_api', 'rss_parser', 'settings'
+))]
+
+
+def fetch_many_feeds(urls, args, validators, storage):
+    """
+    Function that fetches several RSS feeds concurrently, prints and caches each of them as soon as it is fetched.
+    Failed feeds don't stop the others and are reported at the end. HTTP validators of the cached feeds are stored,
+    unless the feed is cut short by the limit, see is_feed_limited()
+    :param urls: array of feed urls
+    :param args: Namespace object with the provided arguments
+    :param validators: dictionary with stored HTTP validators of the feeds
+    :param storage: CacheStorage object to cache feeds to
+    :return: array of fetched feeds
+    """
+    feeds = []
+    failed = []
+    cached_validators = {}
+    request_validators = {url: dict(validators.get(url, {})) if args.conditional else {} for url in urls}
+    for url, feed, error in fetch_feeds(urls, args.limit, args.workers, args.per_host, args.timeout,
+                                        request_validators, args.parser):
+        if error:
+            failed.append((url, error))
+            continue
+        if feed is None:
+            print(f'Feed is not modified since the last poll: {url}')
+            continue
+        print_feed(feed, get_output_format(args))
+        cache_feed(url, feed, storage)
+        if not is_feed_limited(feed, args.limit):
+            cached_validators[url] = request_validators[url]
+        feeds.append(feed)
+    store_http_validators(cached_validators)
+    if failed:
+        main_logger.warning(f'{len(failed)} of {len(failed) + len(feeds)} feeds failed')
+        for url, error in failed:
+            print(f'Failed to fetch {url}: {error}', file=sys.stderr)
+    return feeds
+
+
+def log_images_report():
+    """
+    Function to log the report of all the images downloaded during the program run
+    """
+    from feed_cacher.image_loader import get_image_loader
+
+    report = get_image_loader().report
+    main_logger.info(f'Images: {report}')
+    for image_url, error in report.failed.items():
+        main_logger.warning(f'Image is not cached: "{image_url}". Error Msg: {error}')
+
+
+def report_performance(args, profiler):
+    """
+    Function to output the performance stats and the profile of the run requested by the arguments
+    :param args: Namespace object with the provided arguments
+    :param profiler: cProfile.Profile object profiling the run. None - the run is not profiled
+    """
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        main_logger.info(f'Profile is written to {args.profile}')
+    if args.stats:
+        perf_stats.write_summary()
+    if args.stats_file:
+        perf_stats.write_json(args.stats_file)
 
 
 def main():
@@ -26,36 +102,126 @@ def main():
     for logger in _loggers:
         logger.disabled = args.verbose
     main_logger.info('Program started')
+    if args.stats or args.stats_file:
+        perf_stats.enable()
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
     try:
         check_args(args)
+        create_root_path()
+        output_format = get_output_format(args)
+        date_range = get_date_range(args)
+        if args.to_html or args.to_pdf:
+            from format_converter.converter import convert_to_html, convert_to_pdf
         if args.dest_file:
             main_logger.info('Changing files destination folder')
             with open('settings/USER_PATH.py', 'w', encoding='utf-8') as fw:
                 dest_file = args.dest_file.replace('\\', '/')
                 fw.write(f'USER_PATH = "{dest_file}"')
             main_logger.info(f'OK. Destination folder is changed to {dest_file}')
-        if not args.date and args.URL:
-            feed = parse_rss_feed(args.URL, args.limit)
-            print_feed(feed, args.json)
-            cache_feed(args.URL, feed)
-            feeds = [feed]
-            if args.to_html:
-                convert_to_html(feeds)
-            if args.to_pdf:
+        if args.migrate_cache:
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                items_number = migrate_json_cache(CACHE_FILE_PATH, storage)
+                print(f'{items_number} cached items are migrated to {storage.path}')
+        urls = args.URL + (read_feeds_file(args.feeds_file) if args.feeds_file else [])
+        if urls and not args.date and not date_range and not args.search:
+            get_duplicate_index().min_similarity = None if args.keep_duplicates else args.dedup_similarity
+        if args.watch:
+            from feed_watcher.feed_watcher import FeedWatcher
+
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                watcher = FeedWatcher(urls, storage, args.limit, args.interval * 60, workers=args.workers,
+                                      per_host=args.per_host, timeout=args.timeout, backend=args.parser,
+                                      retention=get_retention(args))
+                watcher.run()
+            log_images_report()
+        elif args.export:
+            from feed_exporter.feed_exporter import export_cached_items
+
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                export_path, items_number = export_cached_items(args.export_format, args.full_export, storage)
+            print(f'{items_number} cached items are exported to {export_path}' if export_path
+                  else 'No cached items to export since the previous export')
+        elif args.serve:
+            from read_api.read_api import serve
+
+            serve(args.host, args.port, args.cache_backend, args.cache_compression, args.api_workers)
+        elif args.search:
+            first_day, last_day = date_range or (args.date, args.date)
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                feeds = search_cached_feeds(args.search, first_day, last_day, urls, args.limit or SEARCH_LIMIT,
+                                            storage)
+            print_cached_feeds(feeds, output_format)
+            if feeds and args.to_html:
+                convert_to_html(feeds, args.html_page_items)
+            if feeds and args.to_pdf:
                 convert_to_pdf(feeds)
-        elif args.date:
-            feeds = collect_cached_feeds(args.date, args.URL, args.limit)
-            print_cached_feeds(feeds, args.json)
-            if args.to_html:
-                convert_to_html(feeds)
-            if args.to_pdf:
+        elif date_range and args.limit is None:
+            # Items of the range are printed and converted while they are read from the cache, without keeping
+            # all of them in memory
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                feeds_number = stream_cached_range(*date_range, urls, output_format, storage)
+                if feeds_number and args.to_html:
+                    convert_to_html(iter_cached_range(*date_range, urls, storage), args.html_page_items)
+                if feeds_number and args.to_pdf:
+                    convert_to_pdf(iter_cached_range(*date_range, urls, storage))
+        elif date_range:
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                feeds = collect_cached_range(*date_range, urls, args.limit, storage)
+            print_cached_feeds(feeds, output_format)
+            if feeds and args.to_html:
+                convert_to_html(feeds, args.html_page_items)
+            if feeds and args.to_pdf:
                 convert_to_pdf(feeds)
+        elif not args.date and len(urls) == 1:
+            validators = load_http_validators()
+            url_validators = dict(validators.get(urls[0], {})) if args.conditional else {}
+            feed = parse_rss_feed(urls[0], args.limit, args.timeout, url_validators, args.parser)
+            if feed is None:
+                print(f'Feed is not modified since the last poll: {urls[0]}')
+            else:
+                print_feed(feed, output_format)
+                with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                    cache_feed(urls[0], feed, storage)
+                log_images_report()
+                if not is_feed_limited(feed, args.limit):
+                    store_http_validators({urls[0]: url_validators})
+                feeds = [feed]
+                if args.to_html:
+                    convert_to_html(feeds, args.html_page_items)
+                if args.to_pdf:
+                    convert_to_pdf(feeds)
+        elif not args.date and urls:
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                feeds = fetch_many_feeds(urls, args, load_http_validators(), storage)
+            log_images_report()
+            if feeds and args.to_html:
+                convert_to_html(feeds, args.html_page_items)
+            if feeds and args.to_pdf:
+                convert_to_pdf(feeds)
+        elif args.date:
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                feeds_number = sum(stream_cached_feeds(args.date, url, args.limit, output_format, storage)
+                                   for url in urls or [None])
+                if feeds_number and args.to_html:
+                    convert_to_html(iter_cached_feeds(args.date, urls, args.limit, storage), args.html_page_items)
+                if feeds_number and args.to_pdf:
+                    convert_to_pdf(iter_cached_feeds(args.date, urls, args.limit, storage))
+        if args.compact and not args.watch:
+            with open_cache_storage(args.cache_backend, args.cache_compression) as storage:
+                print(compaction_summary(compact_cache(storage, **get_retention(args))))
 
     except Exception:
         if args.verbose:
             sys.exit(f'Error occurred {SHRUG_EMOJI}. Try again with "--verbose" option for more information')
         else:
             sys.exit()
+    finally:
+        report_performance(args, profiler)
     main_logger.info('Program end')
 
 
@@ -2,6 +2,7 @@ from pathlib import Path
 
 """Settings of the program"""
 import logging
+import os
 from logging import DEBUG, INFO, WARNING, ERROR, CRITICAL
 
 from settings.USER_PATH import USER_PATH
@@ -14,26 +15,115 @@ LOGGER_LEVEL = INFO
 VERSION = 0.4
 # Emojis
 SHRUG_EMOJI = r'¯\_(ツ)_/¯'
+# Multi-feed fetching. Maximum number of feeds fetched at the same time, in total and per one host
+FETCH_WORKERS = 8
+FETCH_PER_HOST = 2
+# Feed parser. "stream" - incremental lxml parser, "soup" - BeautifulSoup parser of the whole document
+PARSER_BACKEND = 'stream'
+# Number of parsed feed items' dates remembered, so the same date string is parsed once
+DATE_CACHE_SIZE = 4096
+# Number of date string shapes the successful parser is remembered for, the least recently used ones are forgotten
+DATE_SHAPES_CACHE_SIZE = 256
+# Images downloading. Number of parallel downloads, seconds to wait for one image, number of retries and seconds
+# before the first retry, doubled for every next one
+IMAGE_WORKERS = 8
+IMAGE_TIMEOUT = 15
+IMAGE_RETRIES = 3
+IMAGE_RETRY_BACKOFF = 0.5
+# Cached images. Maximum total size in bytes, least recently used images are evicted above it.
+# Maximum width and height of the thumbnails used for HTML and PDF files
+IMAGE_CACHE_MAX_SIZE = 500 * 1024 * 1024
+IMAGE_THUMBNAIL_SIZE = (480, 480)
+# Watch mode. Interval between polls of a feed in seconds, and the maximum interval it grows to
+# for a feed which has no new items or fails
+WATCH_INTERVAL = 30 * 60
+WATCH_MAX_INTERVAL = 24 * 60 * 60
+# Feeds cache storage. "sqlite" - indexed SQLite database, "sharded" - folder of files per feed and per day,
+# "json" - one json document
+CACHE_BACKEND = 'sqlite'
+# Full-text search of the cached items. Number of results printed if "--limit" is not provided, and weight of the
+# title's words against the description's ones in the ranking
+SEARCH_LIMIT = 20
+SEARCH_TITLE_WEIGHT = 10.0
+# Near-duplicate items. Minimum share of common words of the title and description, from 0 to 1, for a new item
+# to be considered a copy of the cached one, e.g. the same story of another feed, and not to be cached
+DEDUP_SIMILARITY = 0.7
+# Number of seconds to wait for the server response while fetching a feed
+FETCH_TIMEOUT = 30
+# PDF conversion. Number of processes rendering PDF chunks at the same time, maximum number of items of one chunk,
+# and number of days a rendered chunk is kept for the next conversions after it was used last time
+PDF_WORKERS = os.cpu_count() or 1
+PDF_CHUNK_ITEMS = 50
+PDF_CHUNKS_MAX_AGE = 30
+# Size of the buffer of HTML file written while the template is rendered, in bytes
+HTML_WRITE_BUFFER = 1024 * 1024
+# Content encodings of the feed responses in the order of preference. "br" and "zstd" are requested only if
+# "brotli" (or "brotlicffi") and "zstandard" packages are installed
+ACCEPT_ENCODINGS = ('zstd', 'br', 'gzip', 'deflate')
+# Compression of the day shards of "sharded" cache storage: None - JSON Lines, "gzip" - gzip compressed JSON Lines.
+# Level of gzip compression, from 1 (fastest) to 9 (smallest)
+CACHE_COMPRESSION = None
+CACHE_COMPRESSION_LEVEL = 6
+# Cache retention, applied by "--compact" and once a day in watch mode. Maximum age of the cached items in days,
+# maximum number of the newest items kept per feed and maximum size of the cache storage in bytes. None - no limit
+CACHE_MAX_AGE = None
+CACHE_MAX_FEED_ITEMS = None
+CACHE_MAX_SIZE = None
+CACHE_COMPACT_INTERVAL = 24 * 60 * 60
+# Number of days the hashes of the cached items are remembered after they are seen last time, so the items removed
+# from the cache are not cached again while their feed still has them
+SEEN_HASHES_DAYS = 90
+# Local read API. Address the server listens on, number of worker threads, every one has its own cache storage
+# open between requests, maximum total size of the cached responses in bytes, and default number of the newest
+# items of every feed returned by "/latest"
+API_HOST = '127.0.0.1'
+API_PORT = 8080
+API_WORKERS = 4
+API_RESPONSE_CACHE_SIZE = 64 * 1024 * 1024
+API_LATEST_LIMIT = 20
+# Export of the cached items for analytics. Formats in the order of preference, the first one whose packages are
+# installed is used by default: "parquet" and "arrow" require "pyarrow". Number of items converted and written at once
+EXPORT_FORMATS = ('parquet', 'csv')
+EXPORT_CHUNK_ITEMS = 20000
 
 # Setting root path for project's caching and html formatting
 ROOT_PATH = Path.home() / 'Desktop' / 'RSS-READER'
 
+# Destination folder which doesn't exist is reset to Default by create_root_path()
+_reset_user_path = False
 if USER_PATH.title() != "None":
     USER_PATH = Path(USER_PATH)
     if USER_PATH.exists():
         ROOT_PATH = USER_PATH / 'RSS-READER'
     else:
         logger.error(f'Something wrong with {USER_PATH}')
-        logger.info('Changing files destination folder to Default')
-        with open('settings/USER_PATH.py', 'w', encoding='utf-8') as fw:
-            fw.write(f'USER_PATH = "None"')
-        logger.info(f'OK. Destination folder is changed to {ROOT_PATH}')
+        _reset_user_path = True
 
-if not ROOT_PATH.exists():
-    ROOT_PATH.mkdir()
 CACHE_DIR_PATH = ROOT_PATH / 'CachedFeeds'
 CACHE_FILE_PATH = CACHE_DIR_PATH / 'feeds_cache.json'
+CACHE_DB_PATH = CACHE_DIR_PATH / 'feeds_cache.sqlite3'
+CACHE_SHARDS_PATH = CACHE_DIR_PATH / 'FeedShards'
 CACHE_IMGS_PATH = CACHE_DIR_PATH / 'CachedFeedImages'
+CACHE_VALIDATORS_PATH = CACHE_DIR_PATH / 'http_validators.json'
+CACHE_FINGERPRINTS_PATH = CACHE_DIR_PATH / 'items_fingerprints.sqlite3'
+CACHE_TEMPLATES_PATH = CACHE_DIR_PATH / 'CompiledTemplates'
+CACHE_PDF_CHUNKS_PATH = CACHE_DIR_PATH / 'RenderedPDFChunks'
 
 FORMAT_TARGET_PATH = ROOT_PATH / 'FormatConverter'
+EXPORT_PATH = ROOT_PATH / 'Export'
 TEMPLATES_LOCATION = Path(__file__).parent.parent / 'format_converter' / 'templates'
+
+
+def create_root_path():
+    """
+    Function to create the root folder of project's caching and html formatting, if it doesn't exist, and to reset
+    the destination folder which doesn't exist to Default. It is called by the program run instead of settings
+    import, so importing settings doesn't touch the filesystem
+    """
+    if _reset_user_path:
+        logger.info('Changing files destination folder to Default')
+        with open(Path(__file__).with_name('USER_PATH.py'), 'w', encoding='utf-8') as fw:
+            fw.write(f'USER_PATH = "None"')
+        logger.info(f'OK. Destination folder is changed to {ROOT_PATH}')
+    if not ROOT_PATH.exists():
+        ROOT_PATH.mkdir(parents=True)
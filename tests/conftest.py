@@ -0,0 +1,17 @@
+"""
+The sources are imported the way the program imports them, as well as the fixtures of the benchmarks, and the home
+folder is replaced with a temporary one before the settings are imported, so the tests never touch the user's cache
+"""
+import os
+from pathlib import Path
+import sys
+import tempfile
+
+SRC_PATH = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(SRC_PATH))
+# Generated feeds and the local HTTP server of the benchmarks are the fixtures of the tests too
+sys.path.insert(0, str(SRC_PATH.parent / 'benchmarks'))
+
+_home = Path(tempfile.mkdtemp(prefix='rss_reader_tests_'))
+(_home / 'Desktop').mkdir()
+os.environ['HOME'] = str(_home)
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+import json
+
+import pytest
+
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage, migrate_json_cache
+from feed_cacher.dedup import legacy_item_hash
+from rss_parser.feed_model import FeedItem
+
+BACKENDS = {
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+}
+FEED_INFO = {'title': 'Fixture feed', 'description': None, 'link': 'https://news.example.com/'}
+START = datetime(2022, 4, 28, tzinfo=timezone.utc)
+
+
+def dated_items():
+    """
+    :return: array of tuples with the item's hash, the day it is cached by and FeedItem object. Items of the json
+    cache of the previous versions with unknown date format are cached by a day, but have no date
+    """
+    items = []
+    for day_number in range(4):
+        day_start = START + timedelta(days=day_number)
+        day = day_start.strftime('%Y%m%d')
+        for i in range(3):
+            items.append((f'{day}-{i}', day, FeedItem(f'Story {day} {i}', day_start + timedelta(hours=7 * i),
+                                                      None, None, None, None)))
+        items.append((f'{day}-undated', day, FeedItem(f'Story {day} without date', None, None, None, None, None)))
+    items.append(('undated', 'None', FeedItem('Story without date', None, None, None, None, None)))
+    return items
+
+
+def range_titles(backend, path, first_day, last_day):
+    storage_class, file_name = BACKENDS[backend]
+    with storage_class(path / file_name) as storage:
+        storage.save_feed('news.example.com', FEED_INFO, dated_items())
+        return [item.title for item in storage.iter_range('news.example.com', first_day, last_day)]
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'sharded'])
+@pytest.mark.parametrize('first_day, last_day', [('20220428', '20220501'), ('20220429', '20220430'),
+                                                 ('20220430', '20220430'), ('20220502', '20220503')])
+def test_range_is_the_same_in_every_backend(tmp_path, backend, first_day, last_day):
+    expected = range_titles('json', tmp_path / 'json', first_day, last_day)
+    assert range_titles(backend, tmp_path / backend, first_day, last_day) == expected
+
+
+def test_range_has_items_without_date(tmp_path):
+    titles = range_titles('sqlite', tmp_path, '20220430', '20220430')
+    assert titles == ['Story 20220430 2', 'Story 20220430 1', 'Story 20220430 0', 'Story 20220430 without date']
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_days_of_the_next_save_are_found(tmp_path, backend):
+    storage_class, file_name = BACKENDS[backend]
+    first, second = dated_items()[:3], dated_items()[4:7]
+    with storage_class(tmp_path / file_name) as storage:
+        storage.save_feed('news.example.com', FEED_INFO, first)
+        assert storage.range_days('news.example.com', '20220428', '20220501') == ['20220428']
+        storage.save_feed('news.example.com', FEED_INFO, second)
+        assert storage.range_days('news.example.com', '20220428', '20220501') == ['20220428', '20220429']
+        assert len(list(storage.iter_range('news.example.com', '20220428', '20220501'))) == 6
+
+
+def test_compressed_shards_are_read_back(tmp_path):
+    first, second = dated_items()[:3], dated_items()[3:]
+    with ShardedCacheStorage(tmp_path / 'FeedShards', compression='gzip') as storage:
+        storage.save_feed('news.example.com', FEED_INFO, first)
+        storage.save_feed('news.example.com', FEED_INFO, second)
+        assert sorted((storage.path / 'news.example.com').glob('*.jsonl')) == []
+        titles = [item.title for item in storage.iter_range('news.example.com', '20220428', '20220501')]
+        storage.compact()
+        assert [item.title for item in storage.iter_range('news.example.com', '20220428', '20220501')] == titles
+    assert titles == range_titles('json', tmp_path / 'json', '20220428', '20220501')
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'sharded'])
+def test_items_without_title_are_migrated(tmp_path, backend):
+    json_path = tmp_path / 'feeds_cache.json'
+    json_path.write_text(json.dumps({'news.example.com': {
+        **FEED_INFO,
+        'dates': {'20220430': [
+            {'title': 'Story', 'date': 'Sat, 30 Apr 2022 19:42:08 GMT', 'link': 'Empty', 'description': 'Empty',
+             'img': 'Empty'},
+            {'title': None, 'link': 'https://news.example.com/untitled.html'},
+        ]},
+    }}), encoding='utf-8')
+    storage_class, file_name = BACKENDS[backend]
+    with storage_class(tmp_path / backend / file_name) as storage:
+        assert migrate_json_cache(json_path, storage) == 2
+        items = list(storage.iter_range('news.example.com', '20220430', '20220430'))
+        assert sorted(items, key=lambda item: item.title or '')[0].link == 'https://news.example.com/untitled.html'
+        hashes = [legacy_item_hash(item) for item in items]
+        assert storage.find_cached_hashes('news.example.com', hashes) == set(hashes)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_feeds_are_in_the_order_they_were_cached(tmp_path, backend):
+    netlocs = ['zeta.example.com', 'alpha.example.com', 'mid.example.com']
+    storage_class, file_name = BACKENDS[backend]
+    with storage_class(tmp_path / file_name) as storage:
+        for netloc in netlocs:
+            storage.save_feed(netloc, {**FEED_INFO, 'title': netloc}, dated_items()[:3])
+        storage.save_feed('alpha.example.com', {**FEED_INFO, 'title': 'alpha.example.com'}, dated_items()[4:7])
+        assert storage.feed_netlocs() == netlocs
+        assert [feed.title for feed in storage.load_feeds('20220428')] == netlocs
+        assert [feed.title for feed in storage.load_feeds('20220429')] == ['alpha.example.com']
@@ -0,0 +1,53 @@
+"""
+Concurrent cache writers: many processes cache different items of one feed into one cache directory at the same
+time, afterwards every item should be found in the cache
+"""
+from datetime import datetime, timezone
+import multiprocessing
+
+import pytest
+
+from feed_cacher import dedup, image_loader
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage
+from feed_cacher.dedup import NearDuplicateIndex
+from feed_cacher.feed_cacher import cache_feed
+from feed_cacher.image_loader import ImageLoader
+from feed_cacher.image_store import ImageStore
+from rss_parser.feed_model import Feed, FeedItem
+
+URL = 'https://news.example.com/rss'
+DATE = datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc)
+BACKENDS = {
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+}
+PROCESSES = 8
+ROUNDS = 5
+ITEMS = 20
+
+
+def write_items(backend, cache_dir, writer):
+    """
+    Cache ROUNDS feeds of ITEMS unique items each, opening the storage again every round. Signatures of the items
+    and the images are kept in the cache directory too
+    """
+    storage_class, file_name = BACKENDS[backend]
+    dedup._duplicate_index = NearDuplicateIndex(cache_dir / 'items_fingerprints.sqlite3')
+    image_loader._image_loader = ImageLoader(ImageStore(cache_dir / 'Images'))
+    for round_number in range(ROUNDS):
+        items = [FeedItem(f'Writer {writer} round {round_number} item {i}', DATE, None, None, None, None)
+                 for i in range(ITEMS)]
+        with storage_class(cache_dir / file_name) as storage:
+            cache_feed(URL, Feed('Stress feed', None, URL, items, None, []), storage)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_concurrent_writers_lose_no_items(tmp_path, backend):
+    with multiprocessing.get_context('fork').Pool(PROCESSES) as pool:
+        pool.starmap(write_items, [(backend, tmp_path, writer) for writer in range(PROCESSES)])
+    storage_class, file_name = BACKENDS[backend]
+    with storage_class(tmp_path / file_name) as storage:
+        feeds = storage.load_feeds('20220430', 'news.example.com')
+    assert len(feeds) == 1
+    assert len(feeds[0].items) == PROCESSES * ROUNDS * ITEMS
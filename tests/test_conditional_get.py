@@ -0,0 +1,52 @@
+import pytest
+
+from fixtures import FixtureServer, generate_rss
+
+from rss_parser.connection_pool import ConnectionPool
+from rss_parser.rss_parser import connect_to_url, parse_rss_feed
+
+
+@pytest.fixture
+def server():
+    with FixtureServer() as server:
+        yield server
+
+
+def test_response_validators_are_kept(server):
+    url = server.add('/feed.xml', generate_rss(5))
+    validators = {}
+    with connect_to_url(url, 10, validators) as response:
+        assert response.read() == generate_rss(5)
+    assert validators['etag'].startswith('"')
+    assert validators['last_modified'] == FixtureServer.LAST_MODIFIED
+
+
+@pytest.mark.parametrize('pooled', [False, True], ids=['urlopen', 'pool'])
+def test_not_modified_feed_is_none(server, pooled):
+    url = server.add('/feed.xml', generate_rss(5))
+    connections = ConnectionPool(10) if pooled else None
+    validators = {}
+    assert len(parse_rss_feed(url, None, 10, validators, connections=connections).items) == 5
+    stored = dict(validators)
+    assert parse_rss_feed(url, None, 10, validators, connections=connections) is None
+    assert validators == stored
+    assert server.requests_count == 2
+    if connections is not None:
+        connections.close()
+
+
+def test_modified_feed_is_parsed_again(server):
+    url = server.add('/feed.xml', generate_rss(5))
+    validators = {}
+    parse_rss_feed(url, None, 10, validators)
+    stored = dict(validators)
+    server.add('/feed.xml', generate_rss(6))
+    assert len(parse_rss_feed(url, None, 10, validators).items) == 6
+    assert validators['etag'] != stored['etag']
+
+
+def test_request_without_validators_is_not_conditional(server):
+    url = server.add('/feed.xml', generate_rss(5))
+    parse_rss_feed(url, None, 10, {})
+    assert len(parse_rss_feed(url, None, 10, None).items) == 5
+    assert len(parse_rss_feed(url, None, 10, {}).items) == 5
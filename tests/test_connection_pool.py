@@ -0,0 +1,47 @@
+import pytest
+
+from fixtures import FixtureServer, generate_rss
+
+from feed_fetcher.feed_fetcher import fetch_feeds
+from rss_parser.connection_pool import ConnectionPool
+from rss_parser.rss_parser import parse_rss_feed
+
+
+@pytest.fixture
+def server():
+    with FixtureServer() as server:
+        yield server
+
+
+def test_connections_are_reused_between_rounds(server):
+    urls = [server.add(f'/feeds/{number}.xml', generate_rss(20, f'Feed {number}')) for number in range(4)]
+    connections = ConnectionPool(10)
+    validators = {}
+    for _ in range(3):
+        results = list(fetch_feeds(urls, None, 4, 2, 10, validators, 'stream', connections))
+        assert [error for _, _, error in results] == [None] * 4
+    connections.close()
+    # The first round is fetched in full and the next ones answer "304 Not Modified", all through two connections
+    assert server.requests_count == 12
+    assert server.connections_count == 2
+
+
+def test_response_not_read_to_the_end_closes_its_connection(server):
+    url = server.add('/feed.xml', generate_rss(2000))
+    connections = ConnectionPool(10)
+    assert len(parse_rss_feed(url, 5, connections=connections).items) == 5
+    assert len(parse_rss_feed(url, None, connections=connections).items) == 2000
+    assert len(parse_rss_feed(url, None, connections=connections).items) == 2000
+    connections.close()
+    assert server.connections_count == 2
+
+
+def test_closed_idle_connection_is_replaced(server):
+    url = server.add('/feed.xml', generate_rss(20))
+    connections = ConnectionPool(10)
+    parse_rss_feed(url, None, connections=connections)
+    for idle in connections.idle.values():
+        for connection in idle:
+            connection.sock.close()
+    assert len(parse_rss_feed(url, None, connections=connections).items) == 20
+    connections.close()
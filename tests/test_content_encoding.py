@@ -0,0 +1,75 @@
+import gzip
+from importlib.util import find_spec
+import io
+import zlib
+
+import pytest
+
+from fixtures import generate_rss
+
+from rss_parser.content_encoding import CONTENT_DECODERS, DecodedStream, decode_response
+
+BODY = generate_rss(200)
+
+
+class FakeResponse(io.BytesIO):
+    """Response body with the headers of http response"""
+
+    def __init__(self, body, encoding=None):
+        super().__init__(body)
+        self.headers = {'Content-Encoding': encoding} if encoding else {}
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def brotli_compress(data):
+    try:
+        import brotli
+    except ImportError:
+        import brotlicffi as brotli
+    return brotli.compress(data)
+
+
+def read_all(stream, size):
+    chunks = []
+    while chunk := stream.read(size):
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+ENCODINGS = [
+    ('gzip', gzip.compress),
+    ('x-gzip', gzip.compress),
+    ('deflate', zlib.compress),
+    ('deflate', raw_deflate),
+    pytest.param('br', brotli_compress, marks=pytest.mark.skipif(
+        not (find_spec('brotli') or find_spec('brotlicffi')), reason='brotli is not installed')),
+]
+
+
+@pytest.mark.parametrize('encoding, compress', ENCODINGS)
+@pytest.mark.parametrize('size', [1, 100, 64 * 1024, -1])
+def test_response_is_decoded(encoding, compress, size):
+    stream = decode_response(FakeResponse(compress(BODY), encoding))
+    assert read_all(stream, size) == BODY
+
+
+@pytest.mark.parametrize('encoding, compress', ENCODINGS)
+def test_stream_reads_no_more_than_asked(encoding, compress):
+    stream = DecodedStream(io.BytesIO(compress(BODY)), CONTENT_DECODERS[encoding][0]())
+    assert stream.read(10) == BODY[:10]
+    assert stream.read() == BODY[10:]
+    assert stream.read(10) == b''
+
+
+def test_identity_response_is_read_as_is():
+    assert read_all(decode_response(FakeResponse(BODY)), 100) == BODY
+    assert read_all(decode_response(FakeResponse(BODY, 'identity')), 100) == BODY
+
+
+def test_unknown_encoding_is_refused():
+    with pytest.raises(ConnectionError):
+        decode_response(FakeResponse(BODY, 'compress'))
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from format_converter.converter import pdf_chunks, render_pdf_chunk
+from rss_parser.feed_model import Feed, FeedItem
+
+START = datetime(2022, 4, 30, 19, 42, tzinfo=timezone.utc)
+
+
+def test_chunks_keep_the_order_of_the_feed():
+    # Items of two days are interleaved, as in a feed sorted by its own rules
+    items = [FeedItem(f'Story {i}', START - timedelta(days=i % 2), None, None, None, None) for i in range(7)]
+    feed = Feed('Fixture feed', None, None, iter(items), None, [])
+    chunks = list(pdf_chunks([feed, Feed('Empty feed', None, None, [], None, [])], chunk_items=3))
+    assert [(chunk.title, [item.title for item in chunk.items], continued) for chunk, continued in chunks] == [
+        ('Fixture feed', ['Story 0', 'Story 1', 'Story 2'], False),
+        ('Fixture feed', ['Story 3', 'Story 4', 'Story 5'], True),
+        ('Fixture feed', ['Story 6'], True),
+        ('Empty feed', [], False),
+    ]
+
+
+def test_failed_chunk_is_not_kept(tmp_path, monkeypatch):
+    pisa = pytest.importorskip('xhtml2pdf.pisa')
+
+    class FailedResult:
+        err = 1
+
+    monkeypatch.setattr(pisa, 'CreatePDF', lambda *args, **kwargs: FailedResult())
+    with pytest.raises(ValueError):
+        render_pdf_chunk('<p>Story</p>', tmp_path / 'chunk.pdf')
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_chunk_is_rendered(tmp_path):
+    pytest.importorskip('xhtml2pdf')
+    chunk_path = render_pdf_chunk('<p>Story</p>', tmp_path / 'chunk.pdf')
+    assert chunk_path.read_bytes().startswith(b'%PDF')
+    assert list(tmp_path.iterdir()) == [chunk_path]
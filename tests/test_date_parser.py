@@ -0,0 +1,14 @@
+from datetime import datetime, timezone
+
+from rss_parser import date_parser
+from rss_parser.date_parser import normalize_date, parse_iso_date, parse_rfc822_date, remember_parser
+
+
+def test_shapes_of_the_dates_are_bounded(monkeypatch):
+    monkeypatch.setattr(date_parser, '_shape_parsers', {})
+    assert normalize_date('Sat, 30 Apr 2022 19:42:08 GMT') == datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc)
+    for number in range(10):
+        remember_parser(f'shape {number}', parse_iso_date, max_size=4)
+    remember_parser('shape 7', parse_iso_date, max_size=4)
+    remember_parser('Sat, 00 Apr 0000 00:00:00 GMT', parse_rfc822_date, max_size=4)
+    assert list(date_parser._shape_parsers) == ['shape 8', 'shape 9', 'shape 7', 'Sat, 00 Apr 0000 00:00:00 GMT']
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from feed_cacher import dedup
+from feed_cacher.cache_storage import SqliteCacheStorage
+from feed_cacher.dedup import NearDuplicateIndex
+from feed_cacher.feed_cacher import cache_feed
+from rss_parser.feed_model import Feed, FeedItem
+
+START = datetime(2022, 4, 30, 19, 42, tzinfo=timezone.utc)
+
+
+def story(number, netloc='news.example.com'):
+    """
+    :return: FeedItem of the story with its own guid and link, stories differ by their number only
+    """
+    link = f'https://{netloc}/{number}.html'
+    return FeedItem(f'Fixture feed story {number}', START - timedelta(minutes=17 * number), link,
+                    f'Description of the story {number} and its details from the fixture feed', None, link)
+
+
+@pytest.fixture
+def duplicate_index(tmp_path, monkeypatch):
+    index = NearDuplicateIndex(tmp_path / 'items_fingerprints.sqlite3')
+    monkeypatch.setattr(dedup, '_duplicate_index', index)
+    yield index
+    index.close()
+
+
+def test_items_of_one_feed_are_not_near_duplicates(tmp_path, duplicate_index):
+    feed = Feed('Fixture feed', None, 'https://news.example.com/', [story(number) for number in range(30)], None, [])
+    with SqliteCacheStorage(tmp_path / 'feeds_cache.sqlite3') as storage:
+        assert cache_feed('https://news.example.com/rss', feed, storage) == 30
+        assert sum(storage.day_counts('news.example.com').values()) == 30
+
+
+def test_story_of_another_feed_is_near_duplicate(tmp_path, duplicate_index):
+    with SqliteCacheStorage(tmp_path / 'feeds_cache.sqlite3') as storage:
+        cache_feed('https://news.example.com/rss', Feed('First', None, None, [story(1)], None, []), storage)
+        own_story = FeedItem('Weather in the mountains', START, 'https://other.example.com/weather.html',
+                             'Snow is expected on the passes tonight', None, 'https://other.example.com/weather.html')
+        syndicated = Feed('Second', None, None, [story(1, 'other.example.com'), own_story], None, [])
+        assert cache_feed('https://other.example.com/rss', syndicated, storage) == 1
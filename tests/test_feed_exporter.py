@@ -0,0 +1,89 @@
+import csv
+import json
+
+import pytest
+
+from feed_cacher.cache_storage import SqliteCacheStorage
+from feed_exporter import feed_exporter
+from feed_exporter.feed_exporter import WATERMARKS_NAME, export_cached_items
+from rss_parser.feed_model import FeedItem
+
+FEED_INFO = {'title': 'Fixture feed', 'description': None, 'link': 'https://news.example.com/'}
+
+
+def dated_items(first, last):
+    return [(f'hash-{i}', '20220430', FeedItem(f'Story {i}', None, None, None, None, None))
+            for i in range(first, last)]
+
+
+def exported_titles(path):
+    with open(path, encoding='utf-8', newline='') as fr:
+        return [row['title'] for row in csv.DictReader(fr)]
+
+
+def exported_files(export_path):
+    return sorted(path.name for path in export_path.iterdir()
+                  if not path.name.startswith(WATERMARKS_NAME))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    with SqliteCacheStorage(tmp_path / 'feeds_cache.sqlite3') as storage:
+        storage.save_feed('news.example.com', FEED_INFO, dated_items(0, 5))
+        yield storage
+
+
+def test_next_export_has_only_new_items(tmp_path, storage):
+    export_path = tmp_path / 'export'
+    first_path, first_number = export_cached_items('csv', storage=storage, export_path=export_path, chunk_items=2)
+    assert (exported_titles(first_path), first_number) == ([f'Story {i}' for i in range(5)], 5)
+    assert export_cached_items('csv', storage=storage, export_path=export_path) == (None, 0)
+    storage.save_feed('news.example.com', FEED_INFO, dated_items(5, 8))
+    second_path, second_number = export_cached_items('csv', storage=storage, export_path=export_path)
+    assert (exported_titles(second_path), second_number) == (['Story 5', 'Story 6', 'Story 7'], 3)
+
+
+def test_full_export_has_all_items(tmp_path, storage):
+    export_path = tmp_path / 'export'
+    export_cached_items('csv', storage=storage, export_path=export_path)
+    path, items_number = export_cached_items('csv', full=True, storage=storage, export_path=export_path)
+    assert (exported_titles(path), items_number) == ([f'Story {i}' for i in range(5)], 5)
+
+
+def test_failed_export_is_repeated(tmp_path, storage, monkeypatch):
+    export_path = tmp_path / 'export'
+    export_cached_items('csv', storage=storage, export_path=export_path)
+    watermarks = (export_path / WATERMARKS_NAME).read_text(encoding='utf-8')
+    files = exported_files(export_path)
+    storage.save_feed('news.example.com', FEED_INFO, dated_items(5, 10))
+    write = feed_exporter.CsvExportWriter.write
+
+    def fail_second_chunk(writer, rows):
+        if rows[0][2] != 'Story 5':
+            raise OSError('No space left on device')
+        write(writer, rows)
+
+    monkeypatch.setattr(feed_exporter.CsvExportWriter, 'write', fail_second_chunk)
+    with pytest.raises(OSError):
+        export_cached_items('csv', storage=storage, export_path=export_path, chunk_items=2)
+    assert exported_files(export_path) == files
+    assert (export_path / WATERMARKS_NAME).read_text(encoding='utf-8') == watermarks
+    monkeypatch.undo()
+    path, items_number = export_cached_items('csv', storage=storage, export_path=export_path)
+    assert (exported_titles(path), items_number) == ([f'Story {i}' for i in range(5, 10)], 5)
+
+
+def test_export_is_removed_if_watermark_is_not_stored(tmp_path, storage, monkeypatch):
+    export_path = tmp_path / 'export'
+
+    def fail(path, data, **kwargs):
+        raise OSError('Read-only file system')
+
+    monkeypatch.setattr(feed_exporter, 'write_json_atomic', fail)
+    with pytest.raises(OSError):
+        export_cached_items('jsonl', storage=storage, export_path=export_path)
+    assert exported_files(export_path) == []
+    monkeypatch.undo()
+    path, _ = export_cached_items('jsonl', storage=storage, export_path=export_path)
+    with open(path, encoding='utf-8') as fr:
+        assert [json.loads(line)['title'] for line in fr] == [f'Story {i}' for i in range(5)]
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+import io
+
+import pytest
+
+from fixtures import generate_feed
+
+from exceptions.custom_exceptions import ArgumentError
+from rss_parser.feed_formats import FEED_FORMATS, sniff_format, sniff_stream
+from rss_parser.feed_model import FeedItem
+from rss_parser.rss_parser import parse_stream_feed
+
+pytest.importorskip('lxml')
+
+FORMATS = {'rss': 'rss', 'rdf': 'RDF', 'atom': 'feed'}
+
+
+@pytest.mark.parametrize('feed_format', FORMATS)
+def test_format_is_sniffed_by_the_root_element(feed_format):
+    document = generate_feed(3, feed_format)
+    assert sniff_format(document[:200]) is FEED_FORMATS[FORMATS[feed_format]]
+    # Comments and the doctype before the root element are skipped
+    prolog = b'<?xml version="1.0"?>\n<!-- <rss> in the comment -->\n<!DOCTYPE any>\n'
+    assert sniff_format(prolog + document.split(b'?>', 1)[1]) is FEED_FORMATS[FORMATS[feed_format]]
+
+
+def test_unknown_document_is_not_sniffed():
+    assert sniff_format(b'<?xml version="1.0"?><html><body>Not a feed</body></html>') is None
+    assert sniff_format(b'') is None
+
+
+@pytest.mark.parametrize('feed_format', FORMATS)
+def test_feed_of_every_format_is_parsed(feed_format):
+    stream, sniffed_format = sniff_stream(io.BytesIO(generate_feed(30, feed_format)))
+    feed = parse_stream_feed(stream, 10, sniffed_format)
+    assert (feed.title, feed.description, feed.link) == \
+        ('Fixture feed', 'Generated feed with 30 items', 'https://news.example.com/')
+    assert len(feed.items) == 10
+    assert feed.items[1] == FeedItem('Fixture feed story 1', datetime(2022, 4, 30, 19, 25, 8, tzinfo=timezone.utc),
+                                     'https://news.example.com/1.html', 'Description of the story 1 & its details',
+                                     'https://img.example.com/1.jpg', 'https://news.example.com/1.html')
+
+
+def test_document_of_another_format_is_rejected():
+    with pytest.raises(ArgumentError):
+        parse_stream_feed(io.BytesIO(generate_feed(3, 'atom')), None, FEED_FORMATS['rss'])
+    with pytest.raises(ArgumentError):
+        parse_stream_feed(io.BytesIO(b'<html><body>Not a feed</body></html>'), None)
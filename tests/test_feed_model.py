@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage
+from rss_parser import feed_model
+from rss_parser.feed_model import FeedItem
+
+BACKENDS = {
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+}
+DATES = [
+    datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc),
+    datetime(2022, 4, 30, 22, 42, 8, 250000, tzinfo=timezone(timedelta(hours=3))),
+    datetime(1969, 7, 20, 20, 17, 40, tzinfo=timezone(-timedelta(hours=4, minutes=30))),
+    # Local mean time of the historical dates has the offset with seconds
+    datetime(1880, 1, 1, 12, tzinfo=timezone(timedelta(hours=1, minutes=24, seconds=4))),
+]
+ITEMS = [FeedItem(f'Story {i}', date, None, None, None, None) for i, date in enumerate(DATES)]
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    def parse_date(text):
+        raise AssertionError(f'Date "{text}" is parsed')
+
+    monkeypatch.setattr(feed_model, 'parse_date', parse_date)
+
+
+@pytest.mark.parametrize('item', ITEMS, ids=[str(date) for date in DATES])
+def test_stored_date_is_restored_from_timestamp(item, no_parsing):
+    for restored in FeedItem.from_row((*item.to_row(), item.timestamp)), FeedItem.from_dict(item.to_cache_dict()):
+        assert restored == item
+        assert restored.to_row() == item.to_row()
+
+
+def test_date_without_timestamp_is_parsed():
+    item = ITEMS[1]
+    assert FeedItem.from_row(item.to_row()) == item
+    assert FeedItem.from_dict(item.to_dict()) == item
+    assert FeedItem.from_dict({'title': 'Story', 'date': 'Sat, 30 Apr 2022 19:42:08 GMT'}).date == DATES[0]
+
+
+def test_item_without_date_has_no_timestamp(no_parsing):
+    item = FeedItem('Story', None, None, None, None, None)
+    assert 'timestamp' not in item.to_cache_dict()
+    assert FeedItem.from_row((*item.to_row(), None)) == FeedItem.from_dict(item.to_cache_dict()) == item
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_cached_dates_are_not_parsed(tmp_path, backend, no_parsing):
+    storage_class, file_name = BACKENDS[backend]
+    with storage_class(tmp_path / file_name) as storage:
+        storage.save_feed('news.example.com', {'title': 'Fixture feed', 'description': None, 'link': None},
+                          [(f'hash-{i}', '20220430', item) for i, item in enumerate(ITEMS)])
+        cached = storage.load_feeds('20220430')[0].items
+    assert [item.to_row() for item in cached] == [item.to_row() for item in ITEMS]
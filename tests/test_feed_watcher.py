@@ -0,0 +1,45 @@
+from feed_watcher import feed_watcher
+from feed_watcher.feed_watcher import FeedWatcher
+from rss_parser.feed_model import Feed
+
+URLS = ['https://news.example.com/rss', 'https://broken.example.com/rss', 'https://other.example.com/rss']
+
+
+def test_failed_caching_does_not_stop_the_poll(monkeypatch):
+    def fetch_feeds(urls, *args):
+        for url in urls:
+            yield url, Feed(url, None, None, [], None, []), None
+
+    def cache_feed(url, feed, storage):
+        if 'broken' in url:
+            raise OSError('No space left on device')
+        return 2
+
+    monkeypatch.setattr(feed_watcher, 'fetch_feeds', fetch_feeds)
+    monkeypatch.setattr(feed_watcher, 'cache_feed', cache_feed)
+    monkeypatch.setattr(feed_watcher, 'store_http_validators', lambda validators: None)
+    monkeypatch.setattr(feed_watcher, 'load_http_validators', lambda: {})
+    watcher = FeedWatcher(URLS, None)
+    watcher.queue.clear()
+    assert watcher.poll(URLS) == 4
+    assert [watcher.schedules[url].errors for url in URLS] == [0, 1, 0]
+    assert sorted(url for _, url in watcher.queue) == sorted(URLS)
+
+
+def test_validators_of_limited_feed_are_not_stored(monkeypatch):
+    stored = {}
+
+    def fetch_feeds(urls, limit, workers, per_host, timeout, validators, *args):
+        for url, items_number in zip(urls, [1, 2]):
+            validators[url] = {'etag': f'"{url}"'}
+            yield url, Feed(url, None, None, [None] * items_number, None, []), None
+
+    monkeypatch.setattr(feed_watcher, 'fetch_feeds', fetch_feeds)
+    monkeypatch.setattr(feed_watcher, 'cache_feed', lambda url, feed, storage: len(feed.items))
+    monkeypatch.setattr(feed_watcher, 'store_http_validators', stored.update)
+    monkeypatch.setattr(feed_watcher, 'load_http_validators', lambda: {})
+    watcher = FeedWatcher(URLS[::2], None, limit=2)
+    watcher.poll(URLS[::2])
+    # The feed cut short by the limit is polled conditionally by the watcher, but its validators are not stored
+    assert stored == {URLS[0]: {'etag': f'"{URLS[0]}"'}}
+    assert sorted(watcher.validators) == sorted(URLS[::2])
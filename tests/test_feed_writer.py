@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+import io
+import json
+
+import pytest
+
+from rss_parser.feed_model import Feed, FeedItem
+from rss_parser.feed_writer import write_feed, write_jsonl_feed
+
+DATE = datetime(2022, 4, 30, 19, 42, 8, tzinfo=timezone.utc)
+ITEMS = [
+    FeedItem('Story 1', DATE, 'https://news.example.com/1.html', 'Description "quoted"\nin two lines',
+             'https://img.example.com/1.jpg', 'https://news.example.com/1.html'),
+    FeedItem('Историја – ünïcode 📰', None, None, None, None, None),
+]
+FEEDS = {
+    'items': Feed('Fixture feed', 'Feed description', 'https://news.example.com/', ITEMS, None, []),
+    'schedule': Feed('Fixture feed', None, None, ITEMS, 60, [1, 2, 3]),
+    'no items': Feed(None, None, None, [], None, []),
+}
+
+
+def written(feed, output_format):
+    stream = io.StringIO()
+    write_feed(feed, output_format, stream)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize('feed', FEEDS.values(), ids=FEEDS)
+def test_json_is_the_same_as_json_dumps(feed):
+    assert written(feed, 'json') == json.dumps(feed.to_dict(), indent=2) + '\n'
+
+
+def test_items_iterator_is_written_once():
+    feed = FEEDS['items']
+    expected = written(feed, 'json')
+    assert written(Feed(feed.title, feed.description, feed.link, iter(ITEMS), None, []), 'json') == expected
+
+
+def test_jsonl_has_a_line_per_item():
+    lines = written(FEEDS['items'], 'jsonl').splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'feed_title': 'Fixture feed', 'feed_link': 'https://news.example.com/', **item.to_dict()} for item in ITEMS]
+
+
+def test_text_has_every_field():
+    assert written(FEEDS['items'], 'text') == (
+        'Feed: Fixture feed\nDescription: Feed description\nFeed Link: https://news.example.com/\n\n'
+        'Item 1:\n'
+        '\tTitle: Story 1\n'
+        f'\tDate: {ITEMS[0].to_row()[1]}\n'
+        '\tLink: https://news.example.com/1.html\n'
+        '\tDescription: Description "quoted"\nin two lines\n'
+        '\tImg: https://img.example.com/1.jpg\n\n'
+        'Item 2:\n'
+        '\tTitle: Историја – ünïcode 📰\n'
+        '\tDate: Empty\n\tLink: Empty\n\tDescription: Empty\n\tImg: Empty\n\n'
+        '\n'
+    )
+
+
+def test_writers_write_to_stdout_by_default(capsys):
+    write_feed(FEEDS['items'], 'jsonl')
+    stream = io.StringIO()
+    write_jsonl_feed(FEEDS['items'], stream)
+    assert capsys.readouterr().out == stream.getvalue()
@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from fixtures import ODD_DATE_FORMATS, generate_rss
+
+from rss_parser.rss_parser import parse_soup_feed, parse_stream_feed
+
+pytest.importorskip('bs4')
+pytest.importorskip('lxml')
+
+SCHEDULED_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/">
+<channel>
+<title>Scheduled feed</title>
+<link>https://news.example.com/</link>
+<description><![CDATA[<p>Feed with <i>polling</i> hints</p>]]></description>
+<ttl>60</ttl>
+<skipHours><hour>1</hour><hour>3</hour><hour>2</hour></skipHours>
+<item>
+<title>Story with CDATA</title>
+<link>https://news.example.com/cdata.html</link>
+<description><![CDATA[<p>Description <b>in CDATA</b></p>]]></description>
+<pubDate>Sat, 30 Apr 2022 19:42:08 GMT</pubDate>
+</item>
+<item>
+<title>Story without date and link</title>
+<description>Plain description</description>
+</item>
+</channel>
+</rss>"""
+
+
+@pytest.mark.parametrize('document', [
+    generate_rss(50),
+    generate_rss(50, with_media=False, date_formats=ODD_DATE_FORMATS),
+    SCHEDULED_FEED,
+], ids=['media', 'odd dates', 'schedule'])
+@pytest.mark.parametrize('limit', [None, 7])
+def test_backends_parse_the_same_feed(document, limit):
+    assert parse_stream_feed(io.BytesIO(document), limit) == parse_soup_feed(document, limit)
+
+
+def test_schedule_hints_are_parsed():
+    feed = parse_stream_feed(io.BytesIO(SCHEDULED_FEED), None)
+    assert (feed.ttl, feed.skip_hours) == (60, [1, 2, 3])
+    assert feed.description == 'Feed with polling hints'
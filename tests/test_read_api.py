@@ -0,0 +1,42 @@
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from read_api.read_api import ReadApi, ReadApiServer
+
+
+@pytest.fixture
+def server():
+    api = ReadApi('sqlite')
+
+    def broken_route(storage, query):
+        raise KeyError('title')
+
+    api.routes['/broken'] = broken_route
+    with ReadApiServer(('127.0.0.1', 0), api, workers=2) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+def status(url):
+    try:
+        with urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_unknown_route_is_not_found(server):
+    assert status(f'{server.url}/missing') == (404, {'error': 'Not found: /missing'})
+
+
+def test_error_of_a_route_is_internal(server):
+    code, body = status(f'{server.url}/broken')
+    assert code == 500
+    assert body['error'].startswith('KeyError')
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from feed_cacher.cache_storage import JsonCacheStorage, ShardedCacheStorage, SqliteCacheStorage
+from feed_cacher.feed_cacher import search_cached_feeds
+from rss_parser.feed_model import FeedItem
+
+BACKENDS = {
+    'json': (JsonCacheStorage, 'feeds_cache.json'),
+    'sqlite': (SqliteCacheStorage, 'feeds_cache.sqlite3'),
+    'sharded': (ShardedCacheStorage, 'FeedShards'),
+}
+FEEDS = {
+    'news.example.com': ({'title': 'News', 'description': None, 'link': 'https://news.example.com/'}, [
+        ('Weather for the weekend', 29, 'Clouds hide the eclipse'),
+        ('Eclipse of the sun', 30, 'The eclipse is seen in the whole country'),
+        ('Football results', 30, 'Local team wins'),
+    ]),
+    'sky.example.com': ({'title': 'Sky', 'description': None, 'link': 'https://sky.example.com/'}, [
+        ('Eclipse photos', 28, 'Photos of the solar eclipse'),
+        ('Moon landing anniversary', 30, 'Fifty years of the first landing'),
+        ('Eclipse photos', 30, 'Photos of the solar eclipse'),
+    ]),
+}
+
+
+def dated_item(title, day, description):
+    date = datetime(2022, 4, day, 12, tzinfo=timezone.utc)
+    return f'{title} {day}', date.strftime('%Y%m%d'), FeedItem(title, date, None, description, None, None)
+
+
+@pytest.fixture(params=BACKENDS)
+def storage(request, tmp_path):
+    storage_class, file_name = BACKENDS[request.param]
+    with storage_class(tmp_path / file_name) as storage:
+        for netloc, (feed_info, items) in FEEDS.items():
+            storage.save_feed(netloc, feed_info, [dated_item(*item) for item in items])
+        yield storage
+
+
+def found(storage, query, **kwargs):
+    return [(netloc, item.title, item.date.day) for netloc, item in storage.search(query, **kwargs)]
+
+
+def test_title_words_rank_higher(storage):
+    results = found(storage, 'eclipse')
+    assert results[-1] == ('news.example.com', 'Weather for the weekend', 29)
+    assert set(results[:-1]) == {('news.example.com', 'Eclipse of the sun', 30),
+                                 ('sky.example.com', 'Eclipse photos', 28), ('sky.example.com', 'Eclipse photos', 30)}
+
+
+def test_items_of_the_same_rank_are_newest_first(storage):
+    assert found(storage, 'photos') == [('sky.example.com', 'Eclipse photos', 30),
+                                        ('sky.example.com', 'Eclipse photos', 28)]
+
+
+def test_every_word_is_found(storage):
+    assert found(storage, 'solar eclipse') == [('sky.example.com', 'Eclipse photos', 30),
+                                               ('sky.example.com', 'Eclipse photos', 28)]
+    assert found(storage, 'solar football') == []
+
+
+def test_prefix_matches_words_starting_with_it(storage):
+    assert found(storage, 'land*') == [('sky.example.com', 'Moon landing anniversary', 30)]
+    assert found(storage, 'land') == []
+
+
+def test_search_is_filtered(storage):
+    assert found(storage, 'eclipse', netlocs=['news.example.com'], limit=1) == [
+        ('news.example.com', 'Eclipse of the sun', 30)]
+    assert found(storage, 'eclipse', first_day='20220428', last_day='20220429') == [
+        ('sky.example.com', 'Eclipse photos', 28), ('news.example.com', 'Weather for the weekend', 29)]
+
+
+def test_feeds_are_ordered_by_their_best_item(storage):
+    feeds = search_cached_feeds('eclipse', None, None, [], None, storage)
+    best_netloc = found(storage, 'eclipse')[0][0]
+    assert [feed.link for feed in feeds][0] == f'https://{best_netloc}/'
+    assert sorted((feed.title, len(feed.items)) for feed in feeds) == [('News', 2), ('Sky', 2)]
+    assert feeds[0].items[0].title != 'Weather for the weekend'
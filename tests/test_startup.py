@@ -0,0 +1,49 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_PATH = Path(__file__).parent.parent / 'src'
+IMPORT_TIME_PATTERN = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| *(\S+)')
+# Median import time of the program modules, ms. The same budget as the one of benchmarks/bench_startup.py
+STARTUP_BUDGET = 150
+# Modules imported only by the options which need them
+LAZY_MODULES = ('bs4', 'dateutil', 'jinja2', 'lxml', 'PIL', 'pyarrow', 'xhtml2pdf', 'feed_cacher.image_loader',
+                'feed_exporter', 'feed_watcher', 'format_converter', 'read_api')
+
+
+def import_program():
+    """
+    :return: dictionary with the module name as a key and its cumulative import time in ms as a value, of the import
+    of the program's main module in a new interpreter
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import rss_reader'], cwd=SRC_PATH,
+                            env=os.environ, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return {match.group(3): int(match.group(2)) / 1000
+            for match in map(IMPORT_TIME_PATTERN.match, result.stderr.splitlines()) if match}
+
+
+def test_startup_is_within_budget():
+    assert statistics.median(import_program()['rss_reader'] for _ in range(5)) <= STARTUP_BUDGET
+
+
+def test_optional_modules_are_not_imported_at_startup():
+    imported = [module for module in import_program()
+                if any(module == lazy or module.startswith(f'{lazy}.') for lazy in LAZY_MODULES)]
+    assert imported == []
+
+
+def test_settings_import_creates_no_files(tmp_path):
+    # Destination folder which doesn't exist is the case the settings reset
+    code = ('import sys, types\n'
+            'sys.modules["settings.USER_PATH"] = types.SimpleNamespace(USER_PATH="/nonexistent/destination")\n'
+            'import settings.settings')
+    settings_files = sorted(path.name for path in (SRC_PATH / 'settings').iterdir())
+    user_path = (SRC_PATH / 'settings' / 'USER_PATH.py').read_text()
+    subprocess.run([sys.executable, '-c', code], cwd=tmp_path, check=True, stdout=subprocess.DEVNULL,
+                   env={**os.environ, 'HOME': str(tmp_path), 'PYTHONPATH': str(SRC_PATH)})
+    assert list(tmp_path.iterdir()) == []
+    assert sorted(path.name for path in (SRC_PATH / 'settings').iterdir()) == settings_files
+    assert (SRC_PATH / 'settings' / 'USER_PATH.py').read_text() == user_path